@@ -0,0 +1 @@
+"""Замеры производительности горячих путей бота: разбор сообщений, запись и чтение БД, построение отчётов."""
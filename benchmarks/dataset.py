@@ -0,0 +1,221 @@
+"""
+Synthetic expense database generator.
+
+Fills a SQLite file in the bot's schema with several years of expenses from several users:
+a description vocabulary with per-item typical amounts, log-normal amount spread,
+month-of-year and weekday seasonality, uneven user activity and daytime-weighted timestamps.
+The same seed and --end always produce the same rows.
+
+Usage:
+    python -m benchmarks.dataset expenses.db --years 3 --users 4 --per-day 3
+    python -m benchmarks.dataset big.db --years 5 --users 50 --per-day 11 --replace   # ~1M rows
+"""
+
+import argparse
+import math
+import os
+import random
+import sqlite3
+import sys
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta
+from itertools import islice
+
+from src import db, strings
+
+SEED = 20240501
+YEARS_DEFAULT = 3
+USERS_DEFAULT = 4
+PER_DAY_DEFAULT = 3.0
+AMOUNT_SIGMA_DEFAULT = 0.6
+BATCH_ROWS = 50_000
+
+# Множители числа расходов по месяцам (январь — декабрь): провал после праздников, отпуска летом, декабрь
+MONTH_SEASONALITY = (0.8, 0.85, 0.95, 1.0, 1.05, 1.1, 1.15, 1.1, 1.0, 1.0, 1.05, 1.4)
+# Множители по дням недели (понедельник — воскресенье)
+WEEKDAY_SEASONALITY = (0.9, 0.9, 0.95, 0.95, 1.1, 1.25, 1.15)
+# Вес часа суток для времени расхода: ночью почти ничего, пики в обед и вечером
+HOUR_WEIGHTS = (1, 0, 0, 0, 0, 1, 2, 4, 6, 6, 6, 7, 9, 8, 6, 6, 7, 9, 10, 9, 7, 5, 3, 2)
+
+
+@dataclass(frozen=True)
+class VocabularyItem:
+    """Описание расхода, типичная (медианная) сумма и относительная частота."""
+
+    description: str
+    median_amount: float
+    weight: float = 1.0
+
+
+DEFAULT_VOCABULARY = (
+    VocabularyItem("продукты", 1800, 10),
+    VocabularyItem("кофе", 250, 6),
+    VocabularyItem("обед", 450, 6),
+    VocabularyItem("такси", 600, 3),
+    VocabularyItem("метро", 70, 5),
+    VocabularyItem("бензин", 2800, 2),
+    VocabularyItem("аптека", 900, 2),
+    VocabularyItem("хозтовары", 700, 2),
+    VocabularyItem("одежда", 4500, 1),
+    VocabularyItem("кино", 800, 1),
+    VocabularyItem("ресторан", 3500, 1),
+    VocabularyItem("подарки", 3000, 1),
+    VocabularyItem("коммуналка", 6500, 0.3),
+    VocabularyItem("интернет", 600, 0.3),
+    VocabularyItem("детский сад", 5000, 0.3),
+    VocabularyItem("запчасти для велосипеда", 1500, 0.2),
+)
+
+
+@dataclass
+class DatasetSpec:
+    """Параметры набора данных: период, пользователи, словарь, распределение сумм и сезонность."""
+
+    end: date
+    years: int = YEARS_DEFAULT
+    users: int = USERS_DEFAULT
+    per_day: float = PER_DAY_DEFAULT
+    vocabulary: tuple[VocabularyItem, ...] = DEFAULT_VOCABULARY
+    amount_sigma: float = AMOUNT_SIGMA_DEFAULT
+    seasonal: bool = True
+    seed: int = SEED
+
+    @property
+    def start(self) -> date:
+        """Первый день периода: years лет до end включительно."""
+        return self.end - timedelta(days=round(365.25 * self.years) - 1)
+
+
+def load_vocabulary(path: str) -> tuple[VocabularyItem, ...]:
+    """
+    Читает словарь из файла: строка «описание;медианная сумма[;вес]», пустые строки и строки с # пропускаются.
+    Бросает ValueError для некорректной строки.
+    """
+    items = []
+    with open(path, encoding="utf-8") as file:
+        for number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = [part.strip() for part in line.split(";")]
+            try:
+                if len(parts) not in (2, 3) or not parts[0]:
+                    raise ValueError(line)
+                items.append(VocabularyItem(parts[0], float(parts[1]), float(parts[2]) if len(parts) == 3 else 1.0))
+            except ValueError as err:
+                raise ValueError(f"{path}:{number}: expected 'description;median_amount[;weight]'") from err
+    if not items:
+        raise ValueError(f"{path}: vocabulary is empty")
+    return tuple(items)
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    """Возвращает случайное число из распределения Пуассона (алгоритм Кнута; средние здесь небольшие)."""
+    if mean <= 0:
+        return 0
+    if mean > 30:
+        return max(0, round(rng.gauss(mean, math.sqrt(mean))))
+    threshold, count, product = math.exp(-mean), 0, rng.random()
+    while product > threshold:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def generate_rows(spec: DatasetSpec) -> Iterator[tuple[str, float, str, int]]:
+    """Возвращает строки (описание, сумма, created_at, user_id) по дням, от старых к новым."""
+    rng = random.Random(spec.seed)
+    descriptions = [item.description for item in spec.vocabulary]
+    weights = [item.weight for item in spec.vocabulary]
+    # log-нормальное распределение с медианой median_amount: mu = ln(медианы)
+    mus = {item.description: math.log(item.median_amount) for item in spec.vocabulary}
+    # Пользователи тратят неравномерно: активность от 0.3 до ~3 средней
+    activity = [min(3.0, rng.paretovariate(2.5) * 0.5) + 0.3 for _ in range(spec.users)]
+    scale = spec.users / sum(activity)
+    hours = range(24)
+
+    day = spec.start
+    while day <= spec.end:
+        seasonal = 1.0
+        if spec.seasonal:
+            seasonal = MONTH_SEASONALITY[day.month - 1] * WEEKDAY_SEASONALITY[day.weekday()]
+        for user_index in range(spec.users):
+            count = _poisson(rng, spec.per_day * activity[user_index] * scale * seasonal)
+            if not count:
+                continue
+            chosen = rng.choices(descriptions, weights, k=count)
+            chosen_hours = rng.choices(hours, HOUR_WEIGHTS, k=count)
+            for description, hour in zip(chosen, chosen_hours):
+                created_at = datetime(
+                    day.year, day.month, day.day, hour, rng.randrange(60), rng.randrange(60), tzinfo=UTC
+                )
+                amount = round(rng.lognormvariate(mus[description], spec.amount_sigma), 2)
+                yield description, amount, created_at.isoformat(timespec="seconds"), user_index + 1
+        day += timedelta(days=1)
+
+
+def fill_database(db_path: str, spec: DatasetSpec, batch_rows: int = BATCH_ROWS) -> int:
+    """
+    Создаёт БД в схеме бота и заполняет её строками generate_rows(spec) пакетами по batch_rows в транзакции.
+    Возвращает число вставленных строк.
+    """
+    db.init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    inserted = 0
+    try:
+        # Данные можно сгенерировать заново, поэтому на время загрузки fsync не нужен
+        conn.execute("PRAGMA synchronous = OFF")
+        rows = generate_rows(spec)
+        while batch := list(islice(rows, batch_rows)):
+            with conn:
+                conn.executemany(strings.DB_INSERT_SQL, batch)
+            inserted += len(batch)
+    finally:
+        conn.close()
+    return inserted
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Точка входа CLI."""
+    parser = argparse.ArgumentParser(description="Генерирует БД расходов за несколько лет от нескольких пользователей.")
+    parser.add_argument("db_path", help="файл SQLite (таблица создаётся, строки добавляются к существующим)")
+    parser.add_argument("--years", type=int, default=YEARS_DEFAULT, help="за сколько лет до --end")
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today(), help="последний день, YYYY-MM-DD")
+    parser.add_argument("--users", type=int, default=USERS_DEFAULT, help="число пользователей (id от 1)")
+    parser.add_argument("--per-day", type=float, default=PER_DAY_DEFAULT, help="расходов на пользователя в день")
+    parser.add_argument("--vocabulary", help="файл словаря: «описание;медианная сумма[;вес]» в строке")
+    parser.add_argument("--amount-sigma", type=float, default=AMOUNT_SIGMA_DEFAULT, help="разброс сумм (log-норм.)")
+    parser.add_argument("--no-seasonality", action="store_true", help="одинаковая частота во все месяцы и дни")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--replace", action="store_true", help="удалить существующий файл перед генерацией")
+    args = parser.parse_args(argv)
+
+    spec = DatasetSpec(
+        end=args.end,
+        years=args.years,
+        users=args.users,
+        per_day=args.per_day,
+        vocabulary=load_vocabulary(args.vocabulary) if args.vocabulary else DEFAULT_VOCABULARY,
+        amount_sigma=args.amount_sigma,
+        seasonal=not args.no_seasonality,
+        seed=args.seed,
+    )
+    if args.replace:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.db_path + suffix):
+                os.remove(args.db_path + suffix)
+
+    started_at = time.perf_counter()
+    inserted = fill_database(args.db_path, spec)
+    elapsed = time.perf_counter() - started_at
+    sys.stdout.write(
+        f"Inserted {inserted} expenses ({spec.start} .. {spec.end}, {spec.users} users) into {args.db_path} "
+        f"in {elapsed:.1f} s ({inserted / elapsed if elapsed else 0:.0f} rows/s)\n"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+"""
+Local stand-in for the Telegram Bot API over HTTP.
+
+Implements the methods the bot uses (getMe, getUpdates, deleteWebhook, sendMessage, editMessageText,
+answerCallbackQuery) with configurable latency, Telegram-style rate limits (429 with retry_after)
+and error injection. Point the bot at it with BOT_API_BASE_URL.
+
+Usage:
+    python -m benchmarks.fake_api --port 8081 --latency-ms 50 --global-rate 30 --chat-rate 1
+    BOT_API_BASE_URL=http://127.0.0.1:8081 BOT_TOKEN=123456:fake python main.py
+    curl -d '{"message": {...}}' http://127.0.0.1:8081/_updates     # deliver an update to getUpdates
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter, deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from itertools import count
+from typing import Any
+
+from aiohttp import web
+
+from src import strings
+from src.rate_limit import TokenBucket
+
+HOST_DEFAULT = "127.0.0.1"
+PORT_DEFAULT = 8081
+GET_UPDATES_LIMIT_MAX = 100
+FAKE_BOT_USER = {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"}
+
+# Ответы, по которым видно, что обновление отклонено до обработчика
+REJECTION_TEXTS = {
+    strings.ERROR_OVERLOADED: "overloaded",
+    strings.ERROR_RATE_LIMITED: "rate_limited",
+    strings.ERROR_ACCESS_DENIED: "access_denied",
+}
+
+Params = dict[str, Any]
+MethodHandler = Callable[[Params], Awaitable[Any]]
+
+
+class ApiError(Exception):
+    """Ответ Bot API с ok=false."""
+
+    def __init__(self, status: int, description: str, retry_after: int | None = None) -> None:
+        super().__init__(description)
+        self.status = status
+        self.description = description
+        self.retry_after = retry_after
+
+    def to_response(self) -> web.Response:
+        body: dict[str, Any] = {"ok": False, "error_code": self.status, "description": self.description}
+        if self.retry_after is not None:
+            body["parameters"] = {"retry_after": self.retry_after}
+        return web.json_response(body, status=self.status)
+
+
+@dataclass
+class FakeApiConfig:
+    """
+    Поведение имитации: задержка ответа (latency ± jitter·latency секунд),
+    лимиты Telegram в запросах в секунду (0 — без лимита) и доля ответов с ошибкой 500.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    global_rate: float = 0.0
+    chat_rate: float = 0.0
+    chat_burst: float = 1.0
+    retry_after: int = 1
+    error_rate: float = 0.0
+
+
+class FakeBotApi:
+    """
+    HTTP-сервер с подмножеством Bot API. Отправленные ботом сообщения и число вызовов каждого метода
+    сохраняются для проверок; обновления для getUpdates добавляются через push_update или POST /_updates.
+    """
+
+    def __init__(self, config: FakeApiConfig | None = None, rng: random.Random | None = None) -> None:
+        self.config = config or FakeApiConfig()
+        self.calls: Counter[str] = Counter()
+        self.rejections: Counter[str] = Counter()
+        self.messages: list[dict[str, Any]] = []
+        self._rng = rng or random.Random()
+        self._updates: deque[dict[str, Any]] = deque()
+        self._update_ids = count(1)
+        self._message_ids = count(1)
+        self._new_update = asyncio.Event()
+        self._global_bucket: TokenBucket | None = None
+        self._chat_buckets: dict[Any, TokenBucket] = {}
+        self._injected: dict[str, deque[ApiError]] = {}
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+        self._methods: dict[str, MethodHandler] = {
+            "getMe": self._get_me,
+            "getUpdates": self._get_updates,
+            "deleteWebhook": self._return_true,
+            "sendMessage": self._send_message,
+            "editMessageText": self._edit_message_text,
+            "answerCallbackQuery": self._return_true,
+        }
+
+    def create_app(self) -> web.Application:
+        """Создаёт приложение aiohttp с маршрутами Bot API и служебными /_updates и /_stats."""
+        app = web.Application()
+        app.router.add_route("*", "/bot{token}/{method}", self._handle_method)
+        app.router.add_post("/_updates", self._handle_push_update)
+        app.router.add_get("/_stats", self._handle_stats)
+        return app
+
+    async def start(self, host: str = HOST_DEFAULT, port: int = 0) -> str:
+        """Запускает сервер и возвращает его адрес для BOT_API_BASE_URL; port=0 — любой свободный порт."""
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{bound_port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        """Останавливает сервер."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def push_update(self, update: dict[str, Any]) -> int:
+        """Добавляет обновление в очередь getUpdates и возвращает его update_id."""
+        update = {**update, "update_id": update.get("update_id") or next(self._update_ids)}
+        self._updates.append(update)
+        self._new_update.set()
+        return update["update_id"]
+
+    def push_message(self, user_id: int, text: str) -> int:
+        """Добавляет обновление с текстовым сообщением пользователя user_id."""
+        message_id = next(self._message_ids)
+        return self.push_update(
+            {
+                "message": {
+                    "message_id": message_id,
+                    "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private"},
+                    "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+                    "text": text,
+                }
+            }
+        )
+
+    def inject_error(self, method: str, status: int, description: str, retry_after: int | None = None) -> None:
+        """Следующий вызов method получит ответ с ошибкой status (например, 429 с retry_after или 400)."""
+        self._injected.setdefault(method, deque()).append(ApiError(status, description, retry_after))
+
+    async def _handle_method(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        handler = self._methods.get(method)
+        if handler is None:
+            return ApiError(404, "Not Found: method not found").to_response()
+
+        params = await self._read_params(request)
+        try:
+            if method != "getUpdates":
+                await self._simulate_network()
+                self._check_errors(method, params)
+            result = await handler(params)
+        except ApiError as err:
+            return err.to_response()
+        return web.json_response({"ok": True, "result": result})
+
+    async def _read_params(self, request: web.Request) -> Params:
+        # aiogram отправляет multipart/form-data; сложные значения (reply_markup) закодированы в JSON
+        if request.content_type == "application/json":
+            return await request.json()
+        params: Params = dict(request.query)
+        if request.can_read_body:
+            params.update((key, value) for key, value in (await request.post()).items() if isinstance(value, str))
+        return params
+
+    async def _simulate_network(self) -> None:
+        config = self.config
+        if config.latency > 0:
+            await asyncio.sleep(config.latency * (1 + config.jitter * (2 * self._rng.random() - 1)))
+
+    def _check_errors(self, method: str, params: Params) -> None:
+        injected = self._injected.get(method)
+        if injected:
+            raise injected.popleft()
+
+        config = self.config
+        if config.error_rate > 0 and self._rng.random() < config.error_rate:
+            raise ApiError(500, "Internal Server Error")
+
+        now = time.monotonic()
+        if config.global_rate > 0:
+            if self._global_bucket is None:
+                self._global_bucket = TokenBucket(config.global_rate, config.global_rate, now)
+            if not self._global_bucket.consume(now):
+                raise self._too_many_requests()
+        chat_id = params.get("chat_id")
+        if config.chat_rate > 0 and chat_id is not None:
+            bucket = self._chat_buckets.get(chat_id)
+            if bucket is None:
+                bucket = self._chat_buckets[chat_id] = TokenBucket(config.chat_burst, config.chat_rate, now)
+            if not bucket.consume(now):
+                raise self._too_many_requests()
+
+    def _too_many_requests(self) -> ApiError:
+        retry_after = self.config.retry_after
+        return ApiError(429, f"Too Many Requests: retry after {retry_after}", retry_after)
+
+    async def _get_me(self, params: Params) -> dict[str, Any]:
+        return FAKE_BOT_USER
+
+    async def _return_true(self, params: Params) -> bool:
+        return True
+
+    async def _get_updates(self, params: Params) -> list[dict[str, Any]]:
+        offset = int(params.get("offset") or 0)
+        limit = min(int(params.get("limit") or GET_UPDATES_LIMIT_MAX), GET_UPDATES_LIMIT_MAX)
+        timeout = float(params.get("timeout") or 0)
+
+        # offset подтверждает обновления до него: как и Telegram, больше их не отдаём
+        while self._updates and self._updates[0]["update_id"] < offset:
+            self._updates.popleft()
+        if not self._updates and timeout > 0:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), timeout)
+            except TimeoutError:
+                pass
+        return list(self._updates)[:limit]
+
+    async def _send_message(self, params: Params) -> dict[str, Any]:
+        return self._record_message("sendMessage", int(params["chat_id"]), next(self._message_ids), params)
+
+    async def _edit_message_text(self, params: Params) -> dict[str, Any]:
+        if "chat_id" not in params or "message_id" not in params:
+            raise ApiError(400, "Bad Request: message to edit not found")
+        return self._record_message("editMessageText", int(params["chat_id"]), int(params["message_id"]), params)
+
+    def _record_message(self, method: str, chat_id: int, message_id: int, params: Params) -> dict[str, Any]:
+        text = params.get("text", "")
+        if (reason := REJECTION_TEXTS.get(text)) is not None:
+            self.rejections[reason] += 1
+        self.messages.append({"method": method, "chat_id": chat_id, "message_id": message_id, "text": text})
+        message: dict[str, Any] = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": FAKE_BOT_USER,
+            "text": text,
+        }
+        if "reply_markup" in params:
+            markup = params["reply_markup"]
+            message["reply_markup"] = json.loads(markup) if isinstance(markup, str) else markup
+        return message
+
+    async def _handle_push_update(self, request: web.Request) -> web.Response:
+        update_id = self.push_update(await request.json())
+        return web.json_response({"ok": True, "result": {"update_id": update_id}})
+
+    async def _handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"calls": dict(self.calls), "rejections": dict(self.rejections), "messages": len(self.messages)}
+        )
+
+
+async def serve(host: str, port: int, config: FakeApiConfig) -> None:
+    """Запускает имитацию и работает до отмены."""
+    api = FakeBotApi(config)
+    base_url = await api.start(host, port)
+    sys.stdout.write(f"Fake Bot API at {base_url} (BOT_API_BASE_URL={base_url})\n")
+    sys.stdout.flush()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await api.stop()
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Точка входа CLI."""
+    parser = argparse.ArgumentParser(description="Локальная имитация Telegram Bot API.")
+    parser.add_argument("--host", default=HOST_DEFAULT)
+    parser.add_argument("--port", type=int, default=PORT_DEFAULT)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="задержка ответа")
+    parser.add_argument("--jitter", type=float, default=0.0, help="разброс задержки, доля от неё")
+    parser.add_argument("--global-rate", type=float, default=0.0, help="запросов в секунду на бота (0 — без лимита)")
+    parser.add_argument("--chat-rate", type=float, default=0.0, help="запросов в секунду в один чат (0 — без лимита)")
+    parser.add_argument("--chat-burst", type=float, default=1.0, help="запросов подряд в один чат")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after в ответах 429, секунд")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов с ошибкой 500")
+    args = parser.parse_args(argv)
+
+    config = FakeApiConfig(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter,
+        global_rate=args.global_rate,
+        chat_rate=args.chat_rate,
+        chat_burst=args.chat_burst,
+        retry_after=args.retry_after,
+        error_rate=args.error_rate,
+    )
+    try:
+        asyncio.run(serve(args.host, args.port, config))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
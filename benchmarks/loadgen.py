@@ -0,0 +1,399 @@
+"""
+End-to-end load generator: feeds synthetic updates into the bot's real Dispatcher.
+
+Bot API calls go to an in-process FakeSession that records them and simulates network latency,
+so the run measures middleware, parsing, SQLite writes, report rendering and the outbound
+scheduler without talking to Telegram. With --http they go over real HTTP to the local
+FakeBotApi server instead, adding request serialisation and connection handling.
+
+Usage:
+    python -m benchmarks.loadgen --rate 50,100,200 --duration 10 --users 50 --mix single=70,multi=20,report=10
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from collections.abc import AsyncGenerator, Callable
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.base import BaseSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.methods import EditMessageText, SendMessage, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from benchmarks.fake_api import REJECTION_TEXTS, FakeApiConfig, FakeBotApi
+from benchmarks.suite import DESCRIPTIONS
+from src import strings
+from src.callback_data import pack_month
+
+LOADGEN_TOKEN = "123456:loadgen"
+RATES_DEFAULT = "50"
+DURATION_DEFAULT = 10.0
+USERS_DEFAULT = 50
+MIX_DEFAULT = "single=70,multi=20,report=10"
+LATENCY_MS_DEFAULT = 50.0
+JITTER_DEFAULT = 0.5
+MULTI_LINES = (2, 10)
+SEED = 20240501
+
+logger = logging.getLogger(__name__)
+
+
+class FakeSession(BaseSession):
+    """
+    Сессия Bot API без сети: ждёт latency ± jitter секунд, записывает вызов и возвращает правдоподобный ответ.
+    Ответ проходит ту же проверку и десериализацию, что и ответ настоящего сервера.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, rng: random.Random | None = None) -> None:
+        super().__init__()
+        self.latency = latency
+        self.jitter = jitter
+        self.calls: Counter[str] = Counter()
+        self.rejections: Counter[str] = Counter()
+        self._rng = rng or random.Random()
+        self._message_ids = 0
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod[TelegramType], timeout: int | None = None
+    ) -> TelegramType:
+        self.calls[method.__api_method__] += 1
+        if self.latency > 0:
+            await asyncio.sleep(self.latency * (1 + self.jitter * (2 * self._rng.random() - 1)))
+
+        result = self._result(method)
+        return self.check_response(bot, method, 200, json.dumps({"ok": True, "result": result}))
+
+    def _result(self, method: TelegramMethod[Any]) -> Any:
+        if isinstance(method, SendMessage | EditMessageText):
+            if (reason := REJECTION_TEXTS.get(method.text)) is not None:
+                self.rejections[reason] += 1
+            self._message_ids += 1
+            return {
+                "message_id": getattr(method, "message_id", None) or self._message_ids,
+                "date": int(time.time()),
+                "chat": {"id": method.chat_id, "type": "private"},
+                "text": method.text,
+            }
+        # answerCallbackQuery и остальные методы, которые бот вызывает, возвращают True
+        return True
+
+    async def close(self) -> None:
+        pass
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: dict[str, Any] | None = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+
+def parse_mix(raw: str) -> dict[str, float]:
+    """Разбирает смесь вида "single=70,multi=20,report=10" в доли по видам обновлений."""
+    weights: dict[str, float] = {}
+    for item in raw.split(","):
+        kind, _, weight = item.partition("=")
+        kind = kind.strip()
+        if kind not in UPDATE_FACTORIES:
+            raise ValueError(f"unknown update kind {kind!r}; expected one of {', '.join(UPDATE_FACTORIES)}")
+        weights[kind] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("message mix weights must be positive")
+    return {kind: weight / total for kind, weight in weights.items()}
+
+
+def _user(user_id: int) -> User:
+    return User(id=user_id, is_bot=False, first_name=f"user{user_id}")
+
+
+def _message(update_id: int, user_id: int, text: str) -> Message:
+    return Message(
+        message_id=update_id,
+        date=datetime.now(),
+        chat=Chat(id=user_id, type="private"),
+        from_user=_user(user_id),
+        text=text,
+    )
+
+
+def _expense_line(rng: random.Random) -> str:
+    return f"{rng.choice(DESCRIPTIONS)} {rng.randint(10, 99_999) / 10:g}"
+
+
+def make_single_expense(update_id: int, user_id: int, rng: random.Random) -> Update:
+    return Update(update_id=update_id, message=_message(update_id, user_id, _expense_line(rng)))
+
+
+def make_multi_expense(update_id: int, user_id: int, rng: random.Random) -> Update:
+    text = "\n".join(_expense_line(rng) for _ in range(rng.randint(*MULTI_LINES)))
+    return Update(update_id=update_id, message=_message(update_id, user_id, text))
+
+
+def make_month_report(update_id: int, user_id: int, rng: random.Random) -> Update:
+    now = datetime.now()
+    callback = CallbackQuery(
+        id=str(update_id),
+        from_user=_user(user_id),
+        chat_instance=str(user_id),
+        message=_message(update_id, user_id, strings.HELP_TEXT),
+        data=pack_month(now.year, now.month),
+    )
+    return Update(update_id=update_id, callback_query=callback)
+
+
+def make_start(update_id: int, user_id: int, rng: random.Random) -> Update:
+    return Update(update_id=update_id, message=_message(update_id, user_id, "/start"))
+
+
+UPDATE_FACTORIES: dict[str, Callable[[int, int, random.Random], Update]] = {
+    "single": make_single_expense,
+    "multi": make_multi_expense,
+    "report": make_month_report,
+    "start": make_start,
+}
+
+
+@dataclass
+class StepResult:
+    """Итоги одной ступени нагрузки; задержка — от запланированного прихода обновления до конца его обработки."""
+
+    rate: float
+    sent: int
+    completed: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    expenses: int = 0
+    latencies: list[float] = field(default_factory=list, repr=False)
+    api_calls: dict[str, int] = field(default_factory=dict)
+    rejections: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        return self.completed / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def expenses_per_sec(self) -> float:
+        return self.expenses / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, percent: int) -> float:
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else 0.0
+        return statistics.quantiles(self.latencies, n=100, method="inclusive")[percent - 1]
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        del data["latencies"]
+        data.update(
+            throughput=round(self.throughput, 1),
+            expenses_per_sec=round(self.expenses_per_sec, 1),
+            p50_ms=round(self.percentile(50) * 1000, 2),
+            p95_ms=round(self.percentile(95) * 1000, 2),
+            p99_ms=round(self.percentile(99) * 1000, 2),
+            max_ms=round(max(self.latencies, default=0.0) * 1000, 2),
+        )
+        return data
+
+
+def count_expenses(db_path: str = strings.DB_PATH_DEFAULT) -> int:
+    """Возвращает число расходов в БД."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM expenses").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class LoadGenerator:
+    """
+    Подаёт обновления в диспетчер по пуассоновскому потоку с заданной интенсивностью (открытая модель нагрузки):
+    обновления приходят по расписанию, даже если бот не успевает, и ожидание в очереди входит в задержку.
+    """
+
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        recorder: FakeSession | FakeBotApi,
+        users: int,
+        mix: dict[str, float],
+        rng: random.Random,
+    ) -> None:
+        self.dp = dp
+        self.bot = bot
+        # Имитация Bot API, которая считает вызовы и отклонённые обновления
+        self.recorder = recorder
+        self.users = users
+        self._kinds = list(mix)
+        self._weights = list(mix.values())
+        self._rng = rng
+        self._update_id = 0
+        # Каждый вид ошибки логируется с трассировкой один раз, остальные только считаются
+        self._logged_errors: set[str] = set()
+
+    def next_update(self) -> Update:
+        """Возвращает следующее обновление случайного вида от случайного пользователя."""
+        self._update_id += 1
+        kind = self._rng.choices(self._kinds, self._weights)[0]
+        user_id = self._rng.randint(1, self.users)
+        return UPDATE_FACTORIES[kind](self._update_id, user_id, self._rng)
+
+    async def run_step(self, rate: float, duration: float) -> StepResult:
+        """Подаёт обновления с интенсивностью rate в секунду в течение duration секунд и ждёт их обработки."""
+        loop = asyncio.get_running_loop()
+        expenses_before = count_expenses()
+        calls_before = self.recorder.calls.copy()
+        rejections_before = self.recorder.rejections.copy()
+        result = StepResult(rate=rate, sent=0)
+        tasks: list[asyncio.Task] = []
+
+        started_at = arrival = loop.time()
+        while (arrival := arrival + self._rng.expovariate(rate)) - started_at < duration:
+            if (delay := arrival - loop.time()) > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(self._feed(self.next_update(), arrival, result)))
+            result.sent += 1
+
+        await asyncio.gather(*tasks)
+        result.elapsed = loop.time() - started_at
+        result.expenses = count_expenses() - expenses_before
+        result.api_calls = dict(self.recorder.calls - calls_before)
+        result.rejections = dict(self.recorder.rejections - rejections_before)
+        return result
+
+    async def _feed(self, update: Update, arrival: float, result: StepResult) -> None:
+        try:
+            await self.dp.feed_update(self.bot, update)
+        except Exception as err:
+            result.errors += 1
+            if type(err).__name__ not in self._logged_errors:
+                self._logged_errors.add(type(err).__name__)
+                logger.exception("Update %s failed", update.update_id)
+        else:
+            result.completed += 1
+        result.latencies.append(asyncio.get_running_loop().time() - arrival)
+
+
+def format_results(results: list[StepResult]) -> str:
+    """Возвращает таблицу результатов по ступеням нагрузки."""
+    header = (
+        f"{'rate/s':>8} {'sent':>7} {'done':>7} {'errors':>6} {'upd/s':>8} {'exp/s':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'api':>7}  rejected"
+    )
+    lines = [header]
+    for result in results:
+        row = result.to_dict()
+        rejected = ", ".join(f"{reason}={count}" for reason, count in sorted(result.rejections.items())) or "-"
+        lines.append(
+            f"{result.rate:>8g} {result.sent:>7} {result.completed:>7} {result.errors:>6} "
+            f"{row['throughput']:>8.1f} {row['expenses_per_sec']:>8.1f} {row['p50_ms']:>8.1f} "
+            f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f} "
+            f"{sum(result.api_calls.values()):>7}  {rejected}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+async def run(
+    rates: list[float],
+    duration: float,
+    users: int,
+    mix: dict[str, float],
+    latency: float,
+    jitter: float,
+    seed: int = SEED,
+    http: bool = False,
+) -> list[StepResult]:
+    """
+    Создаёт бота и диспетчер так же, как bot.main, и прогоняет ступени нагрузки по очереди.
+    При http=True запросы к Bot API идут по HTTP на локальный FakeBotApi.
+    """
+    from src import bot as bot_module, db
+
+    rng = random.Random(seed)
+    db.init_db()
+    api = None
+    if http:
+        api = FakeBotApi(FakeApiConfig(latency=latency, jitter=jitter), random.Random(seed))
+        recorder: FakeSession | FakeBotApi = api
+        session: BaseSession = AiohttpSession(api=TelegramAPIServer.from_base(await api.start()))
+    else:
+        recorder = session = FakeSession(latency, jitter, random.Random(seed))
+    bot = bot_module.create_bot(session=session)
+    dp = bot_module.create_dispatcher()
+    generator = LoadGenerator(dp, bot, recorder, users, mix, rng)
+
+    results = []
+    try:
+        for rate in rates:
+            result = await generator.run_step(rate, duration)
+            results.append(result)
+            sys.stdout.write(format_results([result]).splitlines()[-1] + "\n")
+            sys.stdout.flush()
+    finally:
+        await bot.session.close()
+        if api is not None:
+            await api.stop()
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Точка входа CLI."""
+    parser = argparse.ArgumentParser(description="Нагрузочный тест диспетчера бота с имитацией Bot API.")
+    parser.add_argument("--rate", default=RATES_DEFAULT, help="обновлений в секунду; через запятую — ступени")
+    parser.add_argument("--duration", type=float, default=DURATION_DEFAULT, help="длительность ступени, секунд")
+    parser.add_argument("--users", type=int, default=USERS_DEFAULT, help="число пользователей")
+    parser.add_argument("--mix", default=MIX_DEFAULT, help="доли видов обновлений: single, multi, report, start")
+    parser.add_argument("--latency-ms", type=float, default=LATENCY_MS_DEFAULT, help="задержка ответа Bot API")
+    parser.add_argument("--jitter", type=float, default=JITTER_DEFAULT, help="разброс задержки, доля от неё")
+    parser.add_argument("--http", action="store_true", help="отправлять запросы по HTTP на локальный FakeBotApi")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--workdir", help="каталог для expenses.db (по умолчанию временный)")
+    parser.add_argument("--output", help="записать результаты в JSON")
+    parser.add_argument("--log-level", default="ERROR", help="уровень логов бота во время теста")
+    args = parser.parse_args(argv)
+
+    rates = [float(rate) for rate in args.rate.split(",")]
+    mix = parse_mix(args.mix)
+    logging.basicConfig(level=args.log_level.upper())
+    os.environ.setdefault("BOT_TOKEN", LOADGEN_TOKEN)
+
+    output = os.path.abspath(args.output) if args.output else None
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="loadgen-") as tmpdir:
+        # БД бота лежит в текущем каталоге (expenses.db)
+        os.chdir(args.workdir or tmpdir)
+        try:
+            sys.stdout.write(format_results([]))
+            results = asyncio.run(
+                run(rates, args.duration, args.users, mix, args.latency_ms / 1000, args.jitter, args.seed, args.http)
+            )
+        finally:
+            os.chdir(cwd)
+
+    if output:
+        with open(output, "w", encoding="utf-8") as file:
+            json.dump([result.to_dict() for result in results], file, indent=2)
+            file.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+"""
+Benchmark suite for the parsing, storage and rendering hot paths.
+
+Usage:
+    python -m benchmarks.suite                      # run and compare with benchmarks/baseline.json
+    python -m benchmarks.suite --save-baseline      # run and store the results as the new baseline
+    python -m benchmarks.suite --quick -k parse     # smaller datasets, only benchmarks containing "parse"
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, date, datetime
+from itertools import islice
+from typing import Any
+
+from benchmarks import dataset
+from benchmarks.dataset import DatasetSpec
+from src import db, strings
+from src.expense_display import format_expenses_for_display
+from src.parsing import iter_expenses, parse_multiple_expenses
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+RESULTS_PATH = "bench_results.json"
+# Замер считается регрессией, если стал медленнее базового больше чем на эту долю
+TOLERANCE_DEFAULT = 0.3
+REPEAT_DEFAULT = 5
+# Минимальная длительность одного повтора: быстрые функции вызываются в цикле, чтобы таймер не шумел
+MIN_REPEAT_SECONDS = 0.05
+
+MESSAGE_SIZES = (1, 64, 512, strings.TELEGRAM_MESSAGE_MAX_LENGTH)
+MIXED_SEPARATORS = ("\n", ";", "; ")
+BULK_INSERT_ROWS = strings.EXPENSE_BATCH_MAX_ROWS
+QUERY_TABLE_SIZES = (10_000, 100_000, 1_000_000)
+QUERY_TABLE_SIZES_QUICK = (10_000,)
+# Таблицы для запросов заполняет генератор benchmarks.dataset: сезонность, неравномерная активность пользователей
+DATASET_YEARS = 2
+DATASET_END = date(2024, 12, 31)
+DATASET_USERS = 4
+RENDER_SIZES = (100, 1_000, 10_000)
+SEED = 20240501
+
+DESCRIPTIONS = (
+    "продукты",
+    "кофе",
+    "такси",
+    "обед в столовой",
+    "аптека",
+    "бензин",
+    "коммуналка",
+    "подарок маме",
+    "кино",
+    "интернет",
+    "детский сад",
+    "запчасти для велосипеда",
+)
+
+
+@dataclass
+class BenchResult:
+    """Результат замера: время одной операции по повторам, в секундах."""
+
+    name: str
+    number: int
+    timings: list[float]
+
+    @property
+    def best(self) -> float:
+        return min(self.timings)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.timings)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "number": self.number,
+            "repeat": len(self.timings),
+            "best_us": round(self.best * 1e6, 3),
+            "median_us": round(self.median * 1e6, 3),
+            "ops_per_sec": round(1 / self.best, 1) if self.best else None,
+        }
+
+
+def measure(name: str, func: Callable[[], Any], repeat: int = REPEAT_DEFAULT) -> BenchResult:
+    """
+    Замеряет func: подбирает число вызовов в повторе так, чтобы повтор длился не меньше MIN_REPEAT_SECONDS,
+    и возвращает время одного вызова в каждом из repeat повторов.
+    """
+    number = 1
+    while True:
+        started_at = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started_at
+        if elapsed >= MIN_REPEAT_SECONDS:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(MIN_REPEAT_SECONDS / elapsed) + 1)
+
+    timings = [elapsed / number]
+    for _ in range(repeat - 1):
+        started_at = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - started_at) / number)
+    return BenchResult(name, number, timings)
+
+
+def make_message(size: int, rng: random.Random, separators: tuple[str, ...] = ("\n",)) -> str:
+    """
+    Возвращает сообщение длиной ровно size символов из записей «описание сумма»;
+    между записями — случайный из separators (по умолчанию перевод строки).
+    """
+    parts: list[str] = []
+    length = 0
+    while length < size:
+        if parts:
+            parts.append(rng.choice(separators))
+            length += len(parts[-1])
+        parts.append(f"{rng.choice(DESCRIPTIONS)} {rng.randint(10, 99_999) / 10:g}")
+        length += len(parts[-1])
+    return "".join(parts)[:size]
+
+
+def dataset_spec(count: int) -> DatasetSpec:
+    """Возвращает параметры набора данных примерно из count расходов за DATASET_YEARS лет до конца 2024 года."""
+    days = round(365.25 * DATASET_YEARS)
+    return DatasetSpec(
+        end=DATASET_END, years=DATASET_YEARS, users=DATASET_USERS, per_day=count / (days * DATASET_USERS), seed=SEED
+    )
+
+
+def make_expenses(count: int, rng: random.Random, year: int = 2024, month: int = 5) -> list[db.Expense]:
+    """Возвращает count расходов за один месяц для построения отчёта."""
+    return [
+        db.Expense(
+            id=index,
+            description=rng.choice(DESCRIPTIONS),
+            amount=round(rng.lognormvariate(6, 1), 2),
+            created_at=f"{year:04d}-{month:02d}-{rng.randint(1, 28):02d}T{rng.randrange(24):02d}:00:00+00:00",
+            user_id=rng.randrange(1, DATASET_USERS + 1),
+        )
+        for index in range(count)
+    ]
+
+
+def bench_parsing(rng: random.Random, repeat: int) -> Iterator[BenchResult]:
+    for size in MESSAGE_SIZES:
+        message = make_message(size, rng)
+        yield measure(f"parse_multiple_expenses[{size}]", lambda: parse_multiple_expenses(message), repeat)
+    # Вставка максимальной длины с ';' и переводами строк вперемешку
+    mixed = make_message(MESSAGE_SIZES[-1], rng, MIXED_SEPARATORS)
+    yield measure(f"parse_multiple_expenses_mixed[{len(mixed)}]", lambda: parse_multiple_expenses(mixed), repeat)
+    yield measure(f"iter_expenses_mixed[{len(mixed)}]", lambda: deque(iter_expenses(mixed), maxlen=0), repeat)
+
+
+def bench_inserts(repeat: int, workdir: str) -> Iterator[BenchResult]:
+    db_path = os.path.join(workdir, "inserts.db")
+    db.init_db(db_path)
+    generated = islice(dataset.generate_rows(dataset_spec(100_000)), 1_000)
+    rows = [(description, amount, user_id) for description, amount, _, user_id in generated]
+    single = iter(rows * 1_000)
+
+    def insert_one() -> None:
+        description, amount, user_id = next(single)
+        db.insert_expense(description, amount, user_id, db_path)
+
+    yield measure("insert_expense", insert_one, repeat)
+
+    batch = rows[:BULK_INSERT_ROWS]
+    yield measure(f"insert_expenses[{BULK_INSERT_ROWS}]", lambda: db.insert_expenses(batch, db_path), repeat)
+
+
+def bench_month_queries(repeat: int, workdir: str, sizes: tuple[int, ...]) -> Iterator[BenchResult]:
+    for size in sizes:
+        db_path = os.path.join(workdir, f"expenses-{size}.db")
+        dataset.fill_database(db_path, dataset_spec(size))
+        yield measure(f"get_expenses_by_month[{size}]", lambda: db.get_expenses_by_month(2024, 6, db_path), repeat)
+        yield measure(f"get_month_summary[{size}]", lambda: db.get_month_summary(2024, 6, db_path), repeat)
+        yield measure(
+            f"get_expenses_page[{size}]",
+            lambda: db.get_expenses_page(2024, 6, strings.REPORT_PAGE_SIZE, ("2024-06-15", 0), db_path=db_path),
+            repeat,
+        )
+
+
+def bench_rendering(rng: random.Random, repeat: int) -> Iterator[BenchResult]:
+    for size in RENDER_SIZES:
+        expenses = make_expenses(size, rng)
+        yield measure(
+            f"format_expenses_for_display[{size}]", lambda: format_expenses_for_display(expenses, 2024, 5), repeat
+        )
+        yield measure(
+            f"format_expenses_for_display_flat[{size}]",
+            lambda: format_expenses_for_display(expenses, 2024, 5, show_by_user=False),
+            repeat,
+        )
+
+
+def run(quick: bool = False, pattern: str = "", repeat: int = REPEAT_DEFAULT) -> list[BenchResult]:
+    """Запускает замеры, имя которых содержит pattern; quick — запросы к БД только на самой маленькой таблице."""
+    rng = random.Random(SEED)
+    sizes = QUERY_TABLE_SIZES_QUICK if quick else QUERY_TABLE_SIZES
+    results: list[BenchResult] = []
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        groups: tuple[tuple[tuple[str, ...], Callable[[], Iterator[BenchResult]]], ...] = (
+            (("parse_multiple_expenses", "iter_expenses"), lambda: bench_parsing(rng, repeat)),
+            (("insert_expense", "insert_expenses"), lambda: bench_inserts(repeat, workdir)),
+            (
+                ("get_expenses_by_month", "get_month_summary", "get_expenses_page"),
+                lambda: bench_month_queries(repeat, workdir, sizes),
+            ),
+            (("format_expenses_for_display",), lambda: bench_rendering(rng, repeat)),
+        )
+        for names, group in groups:
+            # Группа целиком пропускается, чтобы не заполнять БД на миллион строк ради отфильтрованных замеров
+            if pattern and not any(pattern in name or pattern.startswith(name) for name in names):
+                continue
+            for result in group():
+                if pattern in result.name:
+                    _print_result(result)
+                    results.append(result)
+    return results
+
+
+def _print_result(result: BenchResult) -> None:
+    sys.stdout.write(
+        f"{result.name:<45} {result.best * 1e6:>12.1f} us  (median {result.median * 1e6:.1f} us, "
+        f"{result.number} x {len(result.timings)})\n"
+    )
+    sys.stdout.flush()
+
+
+def to_report(results: list[BenchResult]) -> dict[str, Any]:
+    """Возвращает результаты в виде, который пишется в JSON."""
+    return {
+        "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "benchmarks": {result.name: result.to_dict() for result in results},
+    }
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any], tolerance: float = TOLERANCE_DEFAULT) -> list[str]:
+    """
+    Сравнивает лучшее время замеров с базовым и возвращает описания регрессий:
+    замеров, ставших медленнее больше чем на долю tolerance. Замеры без базового значения не сравниваются.
+    """
+    regressions = []
+    for name, current in report["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if previous is None:
+            continue
+        ratio = current["best_us"] / previous["best_us"]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{name}: {previous['best_us']:.1f} us -> {current['best_us']:.1f} us ({(ratio - 1) * 100:+.0f}%)"
+            )
+    return regressions
+
+
+def _write_json(path: str, data: dict[str, Any]) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Точка входа CLI: 0 — регрессий нет, 1 — есть замеры медленнее базовых."""
+    parser = argparse.ArgumentParser(description="Замеры производительности горячих путей бота.")
+    parser.add_argument("-k", dest="pattern", default="", help="запускать только замеры, имя которых содержит строку")
+    parser.add_argument("--quick", action="store_true", help="запросы к БД только на таблице из 10 000 строк")
+    parser.add_argument("--repeat", type=int, default=REPEAT_DEFAULT, help="число повторов каждого замера")
+    parser.add_argument("--output", default=RESULTS_PATH, help="куда записать результаты в JSON")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="файл базовых результатов")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE_DEFAULT, help="допустимое замедление, доля")
+    parser.add_argument("--save-baseline", action="store_true", help="записать результаты как новые базовые")
+    args = parser.parse_args(argv)
+
+    # Замеряем сам код, а не вывод логов (и не засоряем вывод предупреждениями о некорректных строках)
+    logging.disable(logging.CRITICAL)
+    try:
+        report = to_report(run(args.quick, args.pattern, args.repeat))
+    finally:
+        logging.disable(logging.NOTSET)
+    _write_json(args.output, report)
+
+    if args.save_baseline:
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as file:
+                baseline = json.load(file)
+            baseline["benchmarks"].update(report["benchmarks"])
+            report = {**baseline, **{key: value for key, value in report.items() if key != "benchmarks"}}
+        _write_json(args.baseline, report)
+        sys.stdout.write(f"Baseline saved to {args.baseline}\n")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        sys.stdout.write(f"No baseline at {args.baseline}; run with --save-baseline to create one.\n")
+        return 0
+    with open(args.baseline, encoding="utf-8") as file:
+        regressions = compare(report, json.load(file), args.tolerance)
+    if regressions:
+        sys.stdout.write(f"\nREGRESSIONS (slower than baseline by more than {args.tolerance:.0%}):\n")
+        sys.stdout.write("".join(f"  {line}\n" for line in regressions))
+        return 1
+    sys.stdout.write(f"\nNo regressions against {args.baseline}.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
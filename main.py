@@ -3,7 +3,14 @@
 
 import asyncio
 
-from src.bot import main
+from src import startup
+
+# Импорт aiogram занимает большую часть запуска, поэтому он замеряется отдельной фазой
+with startup.phase("import aiogram"):
+    import aiogram  # noqa: F401, E402
+
+with startup.phase("import src.bot"):
+    from src.bot import main  # noqa: E402
 
 if __name__ == "__main__":
     try:
@@ -1,30 +1,139 @@
 """User authorization for the Family Costs Bot."""
 
 import logging
+import os
+import time
+from collections.abc import Iterable
 
 from . import strings
-from .config import get_allowed_user_ids
+from .config import (
+    get_admin_user_ids,
+    get_allowed_user_ids,
+    get_allowed_user_ids_file,
+    get_allowed_user_ids_reload_interval,
+    parse_allowed_user_ids,
+)
 
 logger = logging.getLogger(__name__)
 
 
+class AllowList:
+    """
+    Список разрешённых пользователей, разобранный один раз в frozenset.
+    Если задан файл, список перечитывается при изменении его mtime
+    (не чаще, чем раз в check_interval секунд). Файл без ID (пустой или недописанный) не заменяет
+    текущий список, а пустой список при заданном файле закрывает доступ всем.
+    """
+
+    def __init__(
+        self,
+        user_ids: Iterable[int] = (),
+        file_path: str | None = None,
+        check_interval: float = 0.0,
+    ) -> None:
+        self._user_ids: frozenset[int] = frozenset(user_ids)
+        self._file_path = file_path or None
+        self._check_interval = check_interval
+        self._mtime: float | None = None
+        self._next_check = 0.0
+
+        if self._file_path:
+            self._next_check = time.monotonic() + check_interval
+            self._reload_if_changed()
+
+    @classmethod
+    def from_env(cls) -> "AllowList":
+        """Создаёт список из переменных окружения."""
+        return cls(
+            user_ids=get_allowed_user_ids(),
+            file_path=get_allowed_user_ids_file(),
+            check_interval=get_allowed_user_ids_reload_interval(),
+        )
+
+    @property
+    def user_ids(self) -> frozenset[int]:
+        """Возвращает текущее множество разрешённых ID."""
+        if self._file_path:
+            self._maybe_reload()
+        return self._user_ids
+
+    def is_allowed(self, user_id: int | None) -> bool:
+        """Проверяет, имеет ли пользователь доступ к боту."""
+        user_ids = self.user_ids
+
+        if not user_ids:
+            # Пустой список открывает доступ всем только без файла: иначе это ошибка чтения файла
+            return not self._file_path
+        if user_id is None:
+            return False
+
+        return user_id in user_ids
+
+    def _maybe_reload(self) -> None:
+        """Проверяет mtime файла, если истёк интервал проверки."""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self._check_interval
+        self._reload_if_changed()
+
+    def _reload_if_changed(self) -> None:
+        """Перечитывает файл, если его mtime изменился."""
+        try:
+            mtime = os.stat(self._file_path).st_mtime
+            if mtime == self._mtime:
+                return
+            with open(self._file_path, encoding="utf-8") as file:
+                raw = file.read().replace("\n", ",")
+        except OSError as err:
+            logger.error(strings.LOG_ALLOW_LIST_READ_FAILED, self._file_path, err)
+            return
+
+        user_ids = frozenset(parse_allowed_user_ids(raw))
+        if not user_ids:
+            # mtime не запоминается: файл перечитается при следующей проверке, когда его допишут
+            logger.error(strings.LOG_ALLOW_LIST_EMPTY, self._file_path, len(self._user_ids))
+            return
+
+        self._user_ids = user_ids
+        self._mtime = mtime
+        logger.info(strings.LOG_ALLOW_LIST_RELOADED, self._file_path, len(self._user_ids))
+
+
+_allow_list: AllowList | None = None
+
+
+def get_allow_list() -> AllowList:
+    """Возвращает общий список разрешённых пользователей, создавая его при первом обращении."""
+    global _allow_list
+    if _allow_list is None:
+        _allow_list = AllowList.from_env()
+    return _allow_list
+
+
+def reload_allow_list() -> AllowList:
+    """Пересоздаёт общий список разрешённых пользователей из переменных окружения."""
+    global _allow_list
+    _allow_list = AllowList.from_env()
+    return _allow_list
+
+
 def is_user_allowed(user_id: int | None) -> bool:
     """Проверяет, имеет ли пользователь с указанным id доступ к боту."""
-    allowed_user_ids = get_allowed_user_ids()
+    return get_allow_list().is_allowed(user_id)
 
-    if not allowed_user_ids:
-        return True
-    if user_id is None:
-        return False
 
-    return user_id in allowed_user_ids
+def is_admin(user_id: int | None) -> bool:
+    """Проверяет, входит ли пользователь в ADMIN_USER_IDS."""
+    return user_id is not None and user_id in get_admin_user_ids()
 
 
 def log_access_control() -> None:
     """Логирует настройки контроля доступа."""
-    allowed_user_ids = get_allowed_user_ids()
+    allow_list = reload_allow_list()
+    allowed_user_ids = allow_list.user_ids
 
-    if allowed_user_ids:
-        logger.debug(strings.LOG_ACCESS_RESTRICTED.format(count=len(allowed_user_ids)))
+    if allowed_user_ids or not allow_list.is_allowed(None):
+        logger.debug(strings.LOG_ACCESS_RESTRICTED, len(allowed_user_ids))
     else:
         logger.debug(strings.LOG_ACCESS_OPEN)
@@ -0,0 +1,120 @@
+"""Group commit of expenses from concurrently handled messages."""
+
+import asyncio
+from dataclasses import dataclass
+
+from . import db, metrics, strings
+from .exceptions import BatchWriteInterrupted
+
+WriteResult = int | ValueError
+
+
+@dataclass
+class BatchWriterStats:
+    """Счётчики пакетной записи."""
+
+    batches: int = 0
+    rows: int = 0
+    max_batch_rows: int = 0
+
+
+@dataclass
+class _PendingWrite:
+    user_id: int
+    costs: list[tuple[str, float]]
+    future: "asyncio.Future[list[WriteResult]]"
+
+
+class ExpenseBatchWriter:
+    """
+    Собирает расходы из сообщений, обрабатываемых одновременно (например, из одного
+    ответа getUpdates после простоя), и записывает их одной транзакцией.
+    Пока идёт запись, новые сообщения копятся и попадают в следующую транзакцию.
+    """
+
+    def __init__(
+        self,
+        db_path: str = strings.DB_PATH_DEFAULT,
+        max_batch_rows: int = strings.EXPENSE_BATCH_MAX_ROWS,
+    ) -> None:
+        self._db_path = db_path
+        self._max_batch_rows = max_batch_rows
+        self._pending: list[_PendingWrite] = []
+        self._flusher: asyncio.Task[None] | None = None
+        self._stats = BatchWriterStats()
+
+    @property
+    def stats(self) -> BatchWriterStats:
+        """Возвращает снимок счётчиков."""
+        return BatchWriterStats(
+            batches=self._stats.batches, rows=self._stats.rows, max_batch_rows=self._stats.max_batch_rows
+        )
+
+    async def write(self, user_id: int, costs: list[tuple[str, float]]) -> list[WriteResult]:
+        """
+        Ставит расходы пользователя в очередь на запись и ждёт транзакцию.
+        Возвращает id или ValueError для каждого расхода; ошибка БД пробрасывается.
+        """
+        future: asyncio.Future[list[WriteResult]] = asyncio.get_running_loop().create_future()
+        self._pending.append(_PendingWrite(user_id, costs, future))
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._run())
+        return await future
+
+    async def _run(self) -> None:
+        batch: list[_PendingWrite] = []
+        try:
+            # Одна итерация цикла, чтобы остальные обновления того же опроса успели встать в очередь
+            await asyncio.sleep(0)
+            while self._pending:
+                batch = self._take_batch()
+                await self._flush(batch)
+        finally:
+            self._flusher = None
+            # Если запись отменили посреди транзакции, сообщения пакета не должны ждать ответа вечно
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(BatchWriteInterrupted(strings.ERROR_BATCH_WRITE_INTERRUPTED))
+
+    def _take_batch(self) -> list[_PendingWrite]:
+        """Забирает из очереди сообщения, пока их расходы помещаются в max_batch_rows (минимум одно)."""
+        rows = 0
+        for count, pending in enumerate(self._pending):
+            rows += len(pending.costs)
+            if count and rows > self._max_batch_rows:
+                break
+        else:
+            count = len(self._pending)
+
+        batch, self._pending = self._pending[:count], self._pending[count:]
+        return batch
+
+    async def _flush(self, batch: list[_PendingWrite]) -> None:
+        rows = [(description, amount, pending.user_id) for pending in batch for description, amount in pending.costs]
+        try:
+            results = await asyncio.to_thread(db.insert_expenses, rows, self._db_path)
+        except Exception as err:
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(err)
+            return
+
+        self._stats.batches += 1
+        self._stats.rows += len(rows)
+        self._stats.max_batch_rows = max(self._stats.max_batch_rows, len(rows))
+
+        start = 0
+        for pending in batch:
+            end = start + len(pending.costs)
+            if not pending.future.done():
+                pending.future.set_result(results[start:end])
+            start = end
+
+
+_writer = ExpenseBatchWriter()
+metrics.REGISTRY.register_stats("bot_expense_batch", lambda: _writer.stats)
+
+
+def get_expense_writer() -> ExpenseBatchWriter:
+    """Возвращает общий для процесса пакетный писатель расходов."""
+    return _writer
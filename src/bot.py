@@ -1,32 +1,160 @@
 """Bot initialization and main entry point."""
 
+import asyncio
 import logging
+import os
+import signal
+from typing import TYPE_CHECKING
 
 from aiogram import Bot, Dispatcher, F
-from aiogram.filters import CommandStart
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.base import BaseSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.filters import Command, CommandStart
 
-from . import auth, config, db, handlers
+from . import auth, config, db, handlers, loop_watchdog, metrics, middlewares, profiling, startup, strings, tracing
+from .callback_data import MONTH_PICKER, MONTH_PICKER_PREFIX, MONTH_PREFIX, REPORT_PAGE_PREFIX
+from .concurrency import UpdateLimiter
+from .rate_limit import RateLimiter
+from .send_scheduler import SendScheduler, SendSchedulerMiddleware
+
+if TYPE_CHECKING:
+    from .metrics_server import MetricsServer
 
 logger = logging.getLogger(__name__)
 
 
-async def main() -> None:
-    """Главная функция приложения. Инициализирует БД и запускает бота."""
-    config.setup_logging()
-    config.log_configuration()
-    auth.log_access_control()
+def create_dispatcher() -> Dispatcher:
+    """Создаёт диспетчер с middleware и зарегистрированными обработчиками."""
+    dp = Dispatcher()
 
-    db.init_db()
+    # Чужие обновления отклоняются первыми: они не трассируются и не профилируются, а только считаются в метрике
+    dp.update.outer_middleware(middlewares.AuthMiddleware())
+    # Трасса начинается до остальных middleware, чтобы их время тоже попадало в неё
+    dp.update.outer_middleware(middlewares.TracingMiddleware(tracing.get_tracer()))
+    dp.update.outer_middleware(middlewares.ProfilingMiddleware(profiling.get_profiler()))
+    # Ограничение частоты и очередь обработки до выбора обработчика, затем контекст запроса для прошедших обновлений
+    if (burst := config.get_rate_limit_burst()) > 0:
+        rate_limiter = RateLimiter(burst, config.get_rate_limit_rate())
+        metrics.REGISTRY.register_stats("bot_rate_limit", lambda: rate_limiter.stats)
+        dp.update.outer_middleware(middlewares.RateLimitMiddleware(rate_limiter))
+    # Ограничитель ставится и без общего лимита: только он держит обновления одного пользователя по порядку
+    limiter = UpdateLimiter(config.get_max_concurrent_updates(), config.get_max_queued_updates())
+    metrics.REGISTRY.register_stats("bot_updates", lambda: limiter.stats)
+    dp.update.outer_middleware(middlewares.ConcurrencyLimitMiddleware(limiter))
+    dp.update.outer_middleware(middlewares.RequestContextMiddleware())
 
-    bot = Bot(token=config.get_telegram_token(), parse_mode=None)
-    dp = Dispatcher()
+    # Время выполнения и ошибки каждого обработчика
+    dp.message.middleware(middlewares.HandlerMetricsMiddleware())
+    dp.callback_query.middleware(middlewares.HandlerMetricsMiddleware())
 
     dp.message.register(handlers.handle_start, CommandStart())
+    dp.message.register(handlers.handle_profile, Command(strings.PROFILE_COMMAND))
     dp.message.register(handlers.handle_text, F.text)
 
     # Обработчики для кнопок
     dp.callback_query.register(handlers.handle_view_expenses_callback, F.data == "view_expenses")
     dp.callback_query.register(handlers.handle_month_selection_callback, F.data.startswith("month_"))
+    dp.callback_query.register(handlers.handle_month_selection_callback, F.data.startswith(f"{MONTH_PREFIX}:"))
+    dp.callback_query.register(handlers.handle_month_picker_callback, F.data == MONTH_PICKER)
+    dp.callback_query.register(handlers.handle_month_picker_callback, F.data.startswith(f"{MONTH_PICKER_PREFIX}:"))
+    dp.callback_query.register(handlers.handle_report_page_callback, F.data.startswith(f"{REPORT_PAGE_PREFIX}:"))
     dp.callback_query.register(handlers.handle_back_to_menu_callback, F.data == "back_to_menu")
 
-    await dp.start_polling(bot)
+    return dp
+
+
+def create_bot(global_rate: float | None = None, session: BaseSession | None = None) -> Bot:
+    """
+    Создаёт бота с планировщиком исходящих запросов.
+    global_rate позволяет рабочему процессу взять свою долю общего лимита;
+    session заменяет HTTP-сессию Bot API (например, имитацией для нагрузочного теста).
+    Если задан BOT_API_BASE_URL, запросы идут на этот сервер вместо api.telegram.org.
+    """
+    if session is None and (base_url := config.get_bot_api_base_url()):
+        session = AiohttpSession(api=TelegramAPIServer.from_base(base_url))
+    bot = Bot(token=config.get_telegram_token(), session=session, parse_mode=None)
+    scheduler = SendScheduler(
+        global_rate=config.get_outbound_global_rate() if global_rate is None else global_rate,
+        chat_rate=config.get_outbound_chat_rate(),
+        chat_burst=config.get_outbound_chat_burst(),
+    )
+    metrics.REGISTRY.register_stats("bot_outbound", lambda: scheduler.stats)
+    bot.session.middleware(SendSchedulerMiddleware(scheduler))
+    # После планировщика: замеряется сам запрос к Bot API, без ожидания в очереди отправки
+    bot.session.middleware(middlewares.ApiMetricsMiddleware())
+    return bot
+
+
+def install_profiling_signal() -> None:
+    """Включает/выключает профилирование по SIGUSR1 (где сигналы поддерживаются циклом событий)."""
+    if not hasattr(signal, "SIGUSR1"):
+        return
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, profiling.toggle_from_signal)
+    except NotImplementedError:
+        return
+    logger.info(strings.LOG_PROFILING_SIGNAL, os.getpid())
+
+
+async def start_metrics_server(port: int) -> "MetricsServer | None":
+    """Запускает сервер метрик на METRICS_HOST:port. Возвращает None, если port не больше 0."""
+    if port <= 0:
+        return None
+    # aiohttp.web нужен только при включённых метриках
+    with startup.phase("start metrics server"):
+        from .metrics_server import MetricsServer
+
+        server = MetricsServer(config.get_metrics_host(), port)
+        await server.start()
+    return server
+
+
+async def main() -> None:
+    """Главная функция приложения. Инициализирует БД и запускает бота."""
+    with startup.phase("configure"):
+        config.setup_logging()
+        config.log_configuration()
+        auth.log_access_control()
+
+    with startup.phase("init_db"):
+        db.init_db()
+
+    with startup.phase("create_bot"):
+        bot = create_bot()
+
+    if (num_workers := config.get_workers()) > 1:
+        # Режим нескольких процессов нужен редко: multiprocessing загружается только в нём
+        with startup.phase("import workers"):
+            from .workers import run_supervisor
+
+        # Главный процесс отдаёт свои метрики на METRICS_PORT, рабочие — на METRICS_PORT + 1 + номер
+        metrics_server = await start_metrics_server(config.get_metrics_port())
+        startup.report()
+        try:
+            await run_supervisor(bot, num_workers)
+        finally:
+            if metrics_server is not None:
+                await metrics_server.stop()
+        return
+
+    with startup.phase("create_dispatcher"):
+        dp = create_dispatcher()
+
+    if (sample_rate := config.get_trace_sample_rate()) > 0:
+        tracing.configure(sample_rate, config.get_trace_file())
+        logger.info(strings.LOG_TRACING_ENABLED, sample_rate * 100, config.get_trace_file())
+
+    metrics_server = await start_metrics_server(config.get_metrics_port())
+    install_profiling_signal()
+    watchdog = loop_watchdog.start_from_config()
+
+    startup.report()
+    try:
+        await dp.start_polling(bot)
+    finally:
+        if watchdog is not None:
+            await watchdog.stop()
+        if metrics_server is not None:
+            await metrics_server.stop()
+        tracing.shutdown()
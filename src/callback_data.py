@@ -0,0 +1,94 @@
+"""Compact callback_data encoding for inline keyboard buttons."""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+MONTH_PREFIX = "m"
+MONTH_PICKER_PREFIX = "mp"
+MONTH_PICKER = "months"
+REPORT_PAGE_PREFIX = "pg"
+SEPARATOR = ":"
+DIRECTION_OLDER = "o"
+DIRECTION_NEWER = "n"
+
+
+def pack_month(year: int, month: int) -> str:
+    """Кодирует месяц в callback_data вида "m:YYYYMM"."""
+    return f"{MONTH_PREFIX}{SEPARATOR}{year:04d}{month:02d}"
+
+
+def unpack_month(data: str) -> tuple[int, int]:
+    """Декодирует callback_data вида "m:YYYYMM" за O(1). Бросает ValueError для некорректных данных."""
+    if len(data) != 8 or not data.startswith(f"{MONTH_PREFIX}{SEPARATOR}"):
+        raise ValueError(data)
+    year, month = divmod(int(data[2:]), 100)
+    if not 1 <= month <= 12:
+        raise ValueError(data)
+    return year, month
+
+
+def pack_month_picker(year: int) -> str:
+    """Кодирует год выбора месяца в callback_data вида "mp:YYYY"."""
+    return f"{MONTH_PICKER_PREFIX}{SEPARATOR}{year:04d}"
+
+
+def unpack_month_picker(data: str) -> int:
+    """Декодирует callback_data вида "mp:YYYY". Бросает ValueError для некорректных данных."""
+    if len(data) != 7 or not data.startswith(f"{MONTH_PICKER_PREFIX}{SEPARATOR}"):
+        raise ValueError(data)
+    return int(data[3:])
+
+
+@dataclass(frozen=True)
+class PageCursor:
+    """Ключ (created_at, id) расхода, от которого отсчитывается страница."""
+
+    created_at: str
+    expense_id: int
+
+
+@dataclass(frozen=True)
+class ReportPageRequest:
+    """Запрос страницы отчёта за месяц."""
+
+    year: int
+    month: int
+    page: int = 1
+    cursor: PageCursor | None = None
+    older: bool = True
+
+
+def pack_report_page(request: ReportPageRequest) -> str:
+    """
+    Кодирует запрос страницы в callback_data (не длиннее 64 байт), например:
+    "pg:202410:1" или "pg:202410:3:o:1234:2024-10-15T13:46:40+00:00".
+    created_at курсора кодируется как есть, последним полем: БД сравнивает его как строку,
+    поэтому перевод во время эпохи сдвигал бы значения без часового пояса и терял доли секунды.
+    """
+    parts = [REPORT_PAGE_PREFIX, f"{request.year:04d}{request.month:02d}", str(request.page)]
+    if request.cursor is not None:
+        cursor = request.cursor
+        parts += [DIRECTION_OLDER if request.older else DIRECTION_NEWER, str(cursor.expense_id), cursor.created_at]
+    return SEPARATOR.join(parts)
+
+
+def unpack_report_page(data: str) -> ReportPageRequest:
+    """Декодирует callback_data страницы отчёта. Бросает ValueError для некорректных данных."""
+    parts = data.split(SEPARATOR, 5)
+    if parts[0] != REPORT_PAGE_PREFIX or len(parts) not in (3, 6):
+        raise ValueError(data)
+
+    year, month = divmod(int(parts[1]), 100)
+    if not 1 <= month <= 12:
+        raise ValueError(data)
+
+    cursor = None
+    older = True
+    if len(parts) == 6:
+        if parts[3] not in (DIRECTION_OLDER, DIRECTION_NEWER):
+            raise ValueError(data)
+        older = parts[3] == DIRECTION_OLDER
+        datetime.fromisoformat(parts[5])
+        cursor = PageCursor(created_at=parts[5], expense_id=int(parts[4]))
+
+    return ReportPageRequest(year=year, month=month, page=max(int(parts[2]), 1), cursor=cursor, older=older)
@@ -0,0 +1,212 @@
+"""Bounded-concurrency update processing with per-user ordering."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TypeVar
+
+from .exceptions import UpdateQueueFull
+
+T = TypeVar("T")
+
+
+@dataclass
+class UpdateLimiterStats:
+    """Счётчики ограничителя параллельной обработки обновлений."""
+
+    in_flight: int = 0
+    queued: int = 0
+    max_queued: int = 0
+    processed: int = 0
+    shed: int = 0
+
+
+class _UserSlot:
+    """
+    Очередь обновлений пользователя и записи, которые отпустили её раньше времени (run_outside_turn):
+    сколько их ещё не закончилось и будущее окончания последней, за которым ждёт следующая.
+    """
+
+    __slots__ = ("lock", "users", "writing", "writes_done", "last_write")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.users = 0
+        self.writing = 0
+        self.writes_done = asyncio.Event()
+        self.writes_done.set()
+        self.last_write: asyncio.Future[None] | None = None
+
+
+class _Turn:
+    """Очередь пользователя и слот общего лимита, которые занимает обрабатываемое обновление."""
+
+    __slots__ = ("slot", "semaphore", "may_write", "locked", "running", "write_done")
+
+    def __init__(self, slot: _UserSlot, semaphore: asyncio.Semaphore | None, may_write: bool) -> None:
+        self.slot = slot
+        self.semaphore = semaphore
+        self.may_write = may_write
+        self.locked = False
+        self.running = False
+        self.write_done: asyncio.Future[None] | None = None
+
+    async def acquire(self) -> None:
+        await self.slot.lock.acquire()
+        try:
+            # Обновление, которое не пишет расходы, не обгоняет записи, отпустившие очередь до него
+            if not self.may_write:
+                await self.slot.writes_done.wait()
+            await self._acquire_semaphore()
+        except BaseException:
+            self.slot.lock.release()
+            raise
+        self.locked = True
+
+    async def _acquire_semaphore(self) -> None:
+        if self.semaphore is not None:
+            await self.semaphore.acquire()
+        self.running = True
+
+    def _release_semaphore(self) -> None:
+        if self.running:
+            self.running = False
+            if self.semaphore is not None:
+                self.semaphore.release()
+
+    async def run_outside(self, awaitable: Awaitable[T]) -> T:
+        slot = self.slot
+        previous = slot.last_write
+        self.write_done = slot.last_write = asyncio.get_running_loop().create_future()
+        slot.writing += 1
+        slot.writes_done.clear()
+
+        self._release_semaphore()
+        self.locked = False
+        slot.lock.release()
+        try:
+            return await awaitable
+        finally:
+            # Запись, отпустившая очередь раньше, заканчивает обработку первой
+            if previous is not None:
+                await asyncio.shield(previous)
+            await self._acquire_semaphore()
+
+    async def wait_for_writes(self) -> None:
+        if self.write_done is not None or self.slot.writes_done.is_set():
+            return
+        # Слот общего лимита отпускается на время ожидания: он может понадобиться этим записям
+        self._release_semaphore()
+        try:
+            await self.slot.writes_done.wait()
+        finally:
+            await self._acquire_semaphore()
+
+    def release(self) -> None:
+        self._release_semaphore()
+        if self.locked:
+            self.locked = False
+            self.slot.lock.release()
+        if self.write_done is not None and not self.write_done.done():
+            slot = self.slot
+            self.write_done.set_result(None)
+            if slot.last_write is self.write_done:
+                slot.last_write = None
+            slot.writing -= 1
+            if not slot.writing:
+                slot.writes_done.set()
+
+
+_current_turn: ContextVar[_Turn | None] = ContextVar("update_turn", default=None)
+
+
+async def run_outside_turn(awaitable: Awaitable[T]) -> T:
+    """
+    Ждёт awaitable, отпустив очередь пользователя и слот общего лимита, и затем снова занимает слот.
+    Очередь отпускается, когда awaitable впервые уступает управление, поэтому работа, которую он
+    успел поставить в FIFO-очередь (например, в пакетную запись расходов), сохраняет порядок.
+    Вперёд проходят только следующие обновления, запущенные с may_write; остальные ждут, пока такие записи
+    не закончат обработку. Записи заканчивают обработку в порядке, в котором отпустили очередь.
+    Вне UpdateLimiter просто ждёт awaitable.
+    """
+    turn = _current_turn.get()
+    if turn is None or turn.write_done is not None:
+        return await awaitable
+    return await turn.run_outside(awaitable)
+
+
+async def wait_for_writes() -> None:
+    """
+    Ждёт, пока закончат обработку записи того же пользователя, отпустившие очередь раньше текущего обновления.
+    Нужна обновлению с may_write, которое в итоге ничего не пишет: его ответ не должен обогнать их ответы.
+    """
+    turn = _current_turn.get()
+    if turn is not None:
+        await turn.wait_for_writes()
+
+
+class UpdateLimiter:
+    """
+    Ограничивает число одновременно обрабатываемых обновлений (max_in_flight; 0 — без общего ограничения)
+    и длину очереди ожидающих. Обновления одного пользователя обрабатываются строго по очереди в порядке поступления
+    (asyncio.Lock пропускает ожидающих в порядке FIFO), если обработчик сам не отпустит очередь
+    через run_outside_turn: тогда вперёд проходят только обновления с may_write.
+    При переполненной очереди новое обновление отклоняется с UpdateQueueFull.
+    """
+
+    def __init__(self, max_in_flight: int, max_queued: int) -> None:
+        self._semaphore = asyncio.Semaphore(max_in_flight) if max_in_flight > 0 else None
+        self._max_queued = max_queued
+        self._users: dict[Hashable, _UserSlot] = {}
+        self._stats = UpdateLimiterStats()
+
+    @property
+    def stats(self) -> UpdateLimiterStats:
+        """Возвращает снимок счётчиков."""
+        return UpdateLimiterStats(
+            in_flight=self._stats.in_flight,
+            queued=self._stats.queued,
+            max_queued=self._stats.max_queued,
+            processed=self._stats.processed,
+            shed=self._stats.shed,
+        )
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[T]], may_write: bool = False) -> T:
+        """
+        Выполняет func() в очереди пользователя key с учётом общего лимита.
+        may_write — обновление может записать расходы и начаться, пока пишутся расходы предыдущих обновлений.
+        """
+        stats = self._stats
+        if stats.queued >= self._max_queued:
+            stats.shed += 1
+            raise UpdateQueueFull(key)
+
+        slot = self._users.get(key)
+        if slot is None:
+            slot = self._users[key] = _UserSlot()
+        slot.users += 1
+
+        stats.queued += 1
+        stats.max_queued = max(stats.max_queued, stats.queued)
+        waiting = True
+        turn = _Turn(slot, self._semaphore, may_write)
+        try:
+            await turn.acquire()
+            stats.queued -= 1
+            waiting = False
+            stats.in_flight += 1
+            token = _current_turn.set(turn)
+            try:
+                return await func()
+            finally:
+                _current_turn.reset(token)
+                stats.in_flight -= 1
+                stats.processed += 1
+        finally:
+            turn.release()
+            if waiting:
+                stats.queued -= 1
+            slot.users -= 1
+            if not slot.users:
+                del self._users[key]
@@ -3,25 +3,38 @@
 import logging
 import os
 
-from . import strings
+from . import logging_setup, strings
 
 logger = logging.getLogger(__name__)
 
 
 def setup_logging() -> None:
-    """Настраивает логирование на основе переменных окружения."""
+    """
+    Настраивает логирование на основе переменных окружения.
+    Записи форматируются и пишутся в отдельном потоке, чтобы не блокировать цикл событий.
+    """
     log_level = os.getenv("LOG_LEVEL", "INFO").upper().strip()
-    logging.basicConfig(
+    logging_setup.configure(
         level=getattr(logging, log_level, logging.INFO),
-        format=strings.LOG_FORMAT,
+        json_output=get_log_format() == strings.LOG_FORMAT_JSON,
     )
 
 
+def get_log_format() -> str:
+    """Возвращает формат вывода логов: text (по умолчанию) или json."""
+    return os.getenv("LOG_FORMAT", "").strip().lower() or strings.LOG_FORMAT_TEXT
+
+
 def get_telegram_token() -> str:
     """Возвращает токен Telegram бота из переменных окружения."""
     return os.getenv("BOT_TOKEN", "").strip()
 
 
+def get_bot_api_base_url() -> str:
+    """Возвращает адрес сервера Bot API вместо api.telegram.org (пустая строка — официальный сервер)."""
+    return os.getenv("BOT_API_BASE_URL", "").strip().rstrip("/")
+
+
 def get_allowed_user_ids_raw() -> str:
     """Возвращает строку с разрешенными ID пользователей из переменных окружения."""
     return os.getenv("ALLOWED_USER_IDS", "").strip()
@@ -39,7 +52,7 @@ def parse_allowed_user_ids(raw: str) -> set[int]:
             try:
                 result.add(int(item))
             except ValueError as err:
-                logger.error(strings.LOG_SKIPPING_USER_ID.format(user_id=item, error=err))
+                logger.error(strings.LOG_SKIPPING_USER_ID, item, err)
 
     return result
 
@@ -49,6 +62,162 @@ def get_allowed_user_ids() -> set[int]:
     return parse_allowed_user_ids(get_allowed_user_ids_raw())
 
 
+def get_admin_user_ids() -> set[int]:
+    """Возвращает множество ID администраторов (им доступна команда /profile)."""
+    return parse_allowed_user_ids(os.getenv("ADMIN_USER_IDS", "").strip())
+
+
+def get_profile_dir() -> str:
+    """Возвращает каталог для результатов профилирования."""
+    return os.getenv("PROFILE_DIR", "").strip() or strings.PROFILE_DIR_DEFAULT
+
+
+def get_allowed_user_ids_file() -> str:
+    """Возвращает путь к файлу со списком разрешенных ID пользователей (если задан)."""
+    return os.getenv("ALLOWED_USER_IDS_FILE", "").strip()
+
+
+def get_allowed_user_ids_reload_interval() -> float:
+    """Возвращает интервал (в секундах) между проверками изменения файла со списком ID."""
+    return _get_float_env("ALLOWED_USER_IDS_RELOAD_INTERVAL", strings.ALLOWED_USER_IDS_RELOAD_INTERVAL_DEFAULT)
+
+
+def get_rate_limit_burst() -> float:
+    """
+    Возвращает размер корзины токенов на пользователя (0 — ограничение отключено).
+    Корзина меньше одного токена никогда не пропустила бы сообщение, поэтому такие значения поднимаются до 1,
+    а отрицательные отключают ограничение.
+    """
+    burst = _get_float_env("RATE_LIMIT_BURST", strings.RATE_LIMIT_BURST_DEFAULT)
+    if burst < 0:
+        logger.warning(strings.LOG_ENV_VALUE_CLAMPED, burst, "RATE_LIMIT_BURST", 0)
+        return 0.0
+    if 0 < burst < 1:
+        logger.warning(strings.LOG_ENV_VALUE_CLAMPED, burst, "RATE_LIMIT_BURST", 1)
+        return 1.0
+    return burst
+
+
+def get_rate_limit_rate() -> float:
+    """
+    Возвращает скорость пополнения корзины токенов (токенов в секунду).
+    При нуле или отрицательном значении корзины не пополнялись бы, поэтому берётся значение по умолчанию.
+    """
+    rate = _get_float_env("RATE_LIMIT_RATE", strings.RATE_LIMIT_RATE_DEFAULT)
+    if rate <= 0:
+        logger.warning(strings.LOG_ENV_VALUE_CLAMPED, rate, "RATE_LIMIT_RATE", strings.RATE_LIMIT_RATE_DEFAULT)
+        return strings.RATE_LIMIT_RATE_DEFAULT
+    return rate
+
+
+def get_max_concurrent_updates() -> int:
+    """Возвращает максимальное число одновременно обрабатываемых обновлений (0 — без ограничения)."""
+    return _get_int_env("MAX_CONCURRENT_UPDATES", strings.MAX_CONCURRENT_UPDATES_DEFAULT)
+
+
+def get_max_queued_updates() -> int:
+    """Возвращает максимальное число обновлений, ожидающих обработки."""
+    return _get_int_env("MAX_QUEUED_UPDATES", strings.MAX_QUEUED_UPDATES_DEFAULT)
+
+
+def get_workers() -> int:
+    """Возвращает число рабочих процессов (1 — обработка в одном процессе)."""
+    return _get_int_env("WORKERS", strings.WORKERS_DEFAULT)
+
+
+def is_startup_profile_enabled() -> bool:
+    """Возвращает True, если нужно логировать длительность фаз запуска."""
+    return os.getenv("STARTUP_PROFILE", "").strip().lower() in strings.TRUE_ENV_VALUES
+
+
+def get_metrics_host() -> str:
+    """Возвращает адрес HTTP-сервера метрик."""
+    return os.getenv("METRICS_HOST", "").strip() or strings.METRICS_HOST_DEFAULT
+
+
+def get_metrics_port() -> int:
+    """Возвращает порт HTTP-сервера метрик (0 — сервер выключен)."""
+    return _get_int_env("METRICS_PORT", strings.METRICS_PORT_DEFAULT)
+
+
+def get_loop_block_threshold_ms() -> float:
+    """Возвращает порог остановки цикла событий в миллисекундах, после которого снимается стек (0 — выключено)."""
+    return max(_get_float_env("LOOP_BLOCK_THRESHOLD_MS", strings.LOOP_BLOCK_THRESHOLD_MS_DEFAULT), 0.0)
+
+
+def get_trace_sample_rate() -> float:
+    """Возвращает долю обновлений (от 0 до 1), для которых записывается трасса."""
+    return min(max(_get_float_env("TRACE_SAMPLE_RATE", strings.TRACE_SAMPLE_RATE_DEFAULT), 0.0), 1.0)
+
+
+def get_trace_file() -> str:
+    """Возвращает путь к JSONL-файлу трасс."""
+    return os.getenv("TRACE_FILE", "").strip() or strings.TRACE_FILE_DEFAULT
+
+
+def _get_positive_rate_env(name: str, default: float) -> float:
+    """Возвращает скорость из переменной окружения; при нуле или отрицательном значении — значение по умолчанию."""
+    rate = _get_float_env(name, default)
+    if rate <= 0:
+        logger.warning(strings.LOG_ENV_VALUE_CLAMPED, rate, name, default)
+        return default
+    return rate
+
+
+def get_outbound_global_rate() -> float:
+    """
+    Возвращает общий лимит исходящих запросов к Bot API (запросов в секунду).
+    При нуле или отрицательном значении отправка встала бы навсегда, поэтому берётся значение по умолчанию.
+    """
+    return _get_positive_rate_env("OUTBOUND_GLOBAL_RATE", strings.OUTBOUND_GLOBAL_RATE_DEFAULT)
+
+
+def get_outbound_chat_rate() -> float:
+    """
+    Возвращает лимит исходящих запросов в один чат (запросов в секунду).
+    При нуле или отрицательном значении берётся значение по умолчанию.
+    """
+    return _get_positive_rate_env("OUTBOUND_CHAT_RATE", strings.OUTBOUND_CHAT_RATE_DEFAULT)
+
+
+def get_outbound_chat_burst() -> float:
+    """
+    Возвращает, сколько запросов подряд можно отправить в один чат.
+    Меньше одного запроса в чат не ушло бы ни одного сообщения, поэтому такие значения поднимаются до 1.
+    """
+    burst = _get_float_env("OUTBOUND_CHAT_BURST", strings.OUTBOUND_CHAT_BURST_DEFAULT)
+    if burst < 1:
+        logger.warning(strings.LOG_ENV_VALUE_CLAMPED, burst, "OUTBOUND_CHAT_BURST", 1)
+        return 1.0
+    return burst
+
+
+def _get_int_env(name: str, default: int) -> int:
+    """Возвращает целое число из переменной окружения или значение по умолчанию."""
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+
+    try:
+        return int(raw)
+    except ValueError as err:
+        logger.error(strings.LOG_INVALID_ENV_VALUE, raw, name, err)
+        return default
+
+
+def _get_float_env(name: str, default: float) -> float:
+    """Возвращает число из переменной окружения или значение по умолчанию."""
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+
+    try:
+        return float(raw)
+    except ValueError as err:
+        logger.error(strings.LOG_INVALID_ENV_VALUE, raw, name, err)
+        return default
+
+
 def log_configuration() -> None:
     """Логирует конфигурацию приложения."""
     token = get_telegram_token()
@@ -56,6 +225,19 @@ def log_configuration() -> None:
     log_level = os.getenv("LOG_LEVEL", "INFO").upper().strip()
     user_ids_raw = get_allowed_user_ids_raw()
 
-    logger.debug(strings.LOG_ENV_TOKEN.format(token=masked_token))
-    logger.debug(strings.LOG_ENV_LOG_LEVEL.format(level=log_level))
-    logger.debug(strings.LOG_ENV_USER_IDS.format(user_ids=user_ids_raw))
+    logger.debug(strings.LOG_ENV_TOKEN, masked_token)
+    logger.debug(strings.LOG_ENV_BOT_API_BASE_URL, get_bot_api_base_url() or strings.BOT_API_DEFAULT_NAME)
+    logger.debug(strings.LOG_ENV_LOG_LEVEL, log_level)
+    logger.debug(strings.LOG_ENV_LOG_FORMAT, get_log_format())
+    logger.debug(strings.LOG_ENV_USER_IDS, user_ids_raw)
+    logger.debug(strings.LOG_ENV_USER_IDS_FILE, get_allowed_user_ids_file())
+    logger.debug(strings.LOG_ENV_RATE_LIMIT, get_rate_limit_burst(), get_rate_limit_rate())
+    logger.debug(strings.LOG_ENV_CONCURRENCY, get_max_concurrent_updates(), get_max_queued_updates())
+    logger.debug(strings.LOG_ENV_WORKERS, get_workers())
+    logger.debug(strings.LOG_ENV_TRACING, get_trace_sample_rate(), get_trace_file())
+    logger.debug(strings.LOG_ENV_METRICS, get_metrics_host(), get_metrics_port())
+    logger.debug(strings.LOG_ENV_LOOP_WATCHDOG, get_loop_block_threshold_ms())
+    logger.debug(strings.LOG_ENV_PROFILING, sorted(get_admin_user_ids()), get_profile_dir())
+    logger.debug(
+        strings.LOG_ENV_OUTBOUND, get_outbound_global_rate(), get_outbound_chat_rate(), get_outbound_chat_burst()
+    )
@@ -1,12 +1,16 @@
 import logging
 import sqlite3
+from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import UTC, datetime
+from typing import Any, TypeVar
 
-from . import strings
+from . import metrics, report_cache, strings, tracing
 
 logger = logging.getLogger(__name__)
 
+F = TypeVar("F", bound=Callable[..., Any])
+
 
 @dataclass
 class Expense:
@@ -19,25 +23,61 @@ class Expense:
     user_id: int
 
 
+@dataclass
+class MonthSummary:
+    """Количество и сумма расходов за месяц."""
+
+    count: int
+    total: float
+
+
+def _instrumented(query: str) -> Callable[[F], F]:
+    """Замеряет вызов функции БД: метрика длительности и span трассировки db.<query>."""
+
+    def decorator(func: F) -> F:
+        return metrics.DB_QUERY_DURATION.time(query=query)(tracing.traced(f"db.{query}")(func))
+
+    return decorator
+
+
 def _get_connection(db_path: str) -> sqlite3.Connection:
-    """Создаёт соединение с БД и возвращает его."""
-    conn = sqlite3.connect(db_path)
+    """
+    Создаёт соединение с БД и возвращает его.
+    Запись из нескольких процессов ждёт освобождения блокировки до DB_BUSY_TIMEOUT секунд.
+    """
+    conn = sqlite3.connect(db_path, timeout=strings.DB_BUSY_TIMEOUT)
     conn.row_factory = sqlite3.Row
     return conn
 
 
+@_instrumented("init_db")
 def init_db(db_path: str = strings.DB_PATH_DEFAULT) -> None:
-    """Создаёт таблицу расходов, если она не существует."""
-    logger.debug(strings.LOG_DB_INITIALIZING.format(path=db_path))
+    """
+    Создаёт таблицу расходов, если она не существует, и включает журнал WAL:
+    читатели не блокируют запись, и рабочие процессы могут обращаться к одной БД.
+    """
+    logger.debug(strings.LOG_DB_INITIALIZING, db_path)
     conn = _get_connection(db_path)
     try:
+        conn.execute(strings.DB_ENABLE_WAL_SQL)
         conn.execute(strings.DB_CREATE_TABLE_SQL)
+        conn.execute(strings.DB_CREATE_CREATED_AT_INDEX_SQL)
         conn.commit()
         logger.info(strings.LOG_DB_INITIALIZED)
     finally:
         conn.close()
 
 
+def check_connection(db_path: str = strings.DB_PATH_DEFAULT) -> None:
+    """Проверяет, что БД доступна и таблица расходов существует; иначе выбрасывает sqlite3.Error."""
+    conn = _get_connection(db_path)
+    try:
+        conn.execute(strings.DB_HEALTHCHECK_SQL).fetchall()
+    finally:
+        conn.close()
+
+
+@_instrumented("insert_expense")
 def insert_expense(
     description: str,
     amount: float,
@@ -45,23 +85,67 @@ def insert_expense(
     db_path: str = strings.DB_PATH_DEFAULT,
 ) -> int:
     """Вставляет расход в БД и возвращает его id."""
-    if not description or not amount:
-        raise ValueError(strings.ERROR_EMPTY_DESCRIPTION_OR_AMOUNT)
+    _validate_expense(description, amount)
 
     conn = _get_connection(db_path)
     try:
         created_at = datetime.now(UTC).isoformat(timespec="seconds")
         sql_params = (description, float(amount), created_at, user_id)
-        logger.debug(strings.LOG_DB_EXECUTING_SQL.format(sql=strings.DB_INSERT_SQL, params=sql_params))
+        logger.debug(strings.LOG_DB_EXECUTING_SQL, strings.DB_INSERT_SQL, sql_params)
         cur = conn.execute(strings.DB_INSERT_SQL, sql_params)
         conn.commit()
         new_id = int(cur.lastrowid)
-        logger.info(strings.LOG_DB_INSERTED.format(expense_id=new_id))
+        report_cache.bump_month_version(int(created_at[:4]), int(created_at[5:7]))
+        logger.info(strings.LOG_DB_INSERTED, new_id)
         return new_id
     finally:
         conn.close()
 
 
+@_instrumented("insert_expenses")
+def insert_expenses(
+    rows: list[tuple[str, float, int]],
+    db_path: str = strings.DB_PATH_DEFAULT,
+) -> list[int | ValueError]:
+    """
+    Вставляет расходы (описание, сумма, id пользователя) одной транзакцией.
+    Для каждой строки возвращает id расхода или ValueError, если строка не прошла проверку;
+    ошибка БД отменяет всю транзакцию и пробрасывается.
+    """
+    results: list[int | ValueError] = []
+    months: set[tuple[int, int]] = set()
+    conn = _get_connection(db_path)
+    try:
+        created_at = datetime.now(UTC).isoformat(timespec="seconds")
+        for description, amount, user_id in rows:
+            try:
+                _validate_expense(description, amount)
+            except ValueError as err:
+                results.append(err)
+                continue
+
+            sql_params = (description, float(amount), created_at, user_id)
+            logger.debug(strings.LOG_DB_EXECUTING_SQL, strings.DB_INSERT_SQL, sql_params)
+            cur = conn.execute(strings.DB_INSERT_SQL, sql_params)
+            results.append(int(cur.lastrowid))
+            months.add((int(created_at[:4]), int(created_at[5:7])))
+        conn.commit()
+    finally:
+        conn.close()
+
+    for year, month in months:
+        report_cache.bump_month_version(year, month)
+    logger.info(strings.LOG_DB_INSERTED_BATCH, len(rows) - sum(isinstance(r, ValueError) for r in results))
+    return results
+
+
+def _validate_expense(description: str, amount: float) -> None:
+    """Проверяет, что у расхода есть описание и ненулевая сумма."""
+    if not description or not amount:
+        raise ValueError(strings.ERROR_EMPTY_DESCRIPTION_OR_AMOUNT)
+
+
+@_instrumented("get_expenses_by_month")
 def get_expenses_by_month(
     year: int,
     month: int,
@@ -71,7 +155,7 @@ def get_expenses_by_month(
     conn = _get_connection(db_path)
     try:
         month_str = f"{year:04d}-{month:02d}"
-        logger.debug(f"Getting expenses for month: {month_str}")
+        logger.debug("Getting expenses for month: %s", month_str)
 
         cur = conn.execute(strings.DB_GET_EXPENSES_BY_MONTH_SQL, (month_str,))
         rows = cur.fetchall()
@@ -87,12 +171,13 @@ def get_expenses_by_month(
             )
             expenses.append(expense)
 
-        logger.info(f"Found {len(expenses)} expenses for {month_str}")
+        logger.info("Found %s expenses for %s", len(expenses), month_str)
         return expenses
     finally:
         conn.close()
 
 
+@_instrumented("get_expenses_by_user_and_month")
 def get_expenses_by_user_and_month(
     user_id: int,
     year: int,
@@ -103,7 +188,7 @@ def get_expenses_by_user_and_month(
     conn = _get_connection(db_path)
     try:
         month_str = f"{year:04d}-{month:02d}"
-        logger.debug(f"Getting expenses for user {user_id} for month: {month_str}")
+        logger.debug("Getting expenses for user %s for month: %s", user_id, month_str)
 
         cur = conn.execute(strings.DB_GET_EXPENSES_BY_USER_AND_MONTH_SQL, (user_id, month_str))
         rows = cur.fetchall()
@@ -119,7 +204,85 @@ def get_expenses_by_user_and_month(
             )
             expenses.append(expense)
 
-        logger.info(f"Found {len(expenses)} expenses for user {user_id} for {month_str}")
+        logger.info("Found %s expenses for user %s for %s", len(expenses), user_id, month_str)
         return expenses
     finally:
         conn.close()
+
+
+def _get_month_bounds(year: int, month: int) -> tuple[str, str]:
+    """Возвращает границы месяца [начало, начало следующего) для сравнения с created_at."""
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return f"{year:04d}-{month:02d}-01", f"{next_year:04d}-{next_month:02d}-01"
+
+
+@_instrumented("get_month_summary")
+def get_month_summary(
+    year: int,
+    month: int,
+    db_path: str = strings.DB_PATH_DEFAULT,
+) -> MonthSummary:
+    """Возвращает количество и сумму расходов за месяц."""
+    conn = _get_connection(db_path)
+    try:
+        row = conn.execute(strings.DB_GET_MONTH_SUMMARY_SQL, _get_month_bounds(year, month)).fetchone()
+        return MonthSummary(count=row["count"], total=row["total"])
+    finally:
+        conn.close()
+
+
+@_instrumented("get_months_with_expenses")
+def get_months_with_expenses(db_path: str = strings.DB_PATH_DEFAULT) -> list[tuple[int, int]]:
+    """
+    Возвращает месяцы, за которые есть расходы, от новых к старым.
+    Запрос прыгает по индексу created_at от месяца к месяцу, не читая сами расходы.
+    """
+    conn = _get_connection(db_path)
+    try:
+        rows = conn.execute(strings.DB_GET_EXPENSE_MONTHS_SQL).fetchall()
+        return [(int(row["month"][:4]), int(row["month"][5:7])) for row in rows]
+    finally:
+        conn.close()
+
+
+@_instrumented("get_expenses_page")
+def get_expenses_page(
+    year: int,
+    month: int,
+    limit: int,
+    cursor: tuple[str, int] | None = None,
+    older: bool = True,
+    db_path: str = strings.DB_PATH_DEFAULT,
+) -> list[Expense]:
+    """
+    Получает страницу расходов за месяц, от новых к старым, по ключу (created_at, id).
+    Без cursor возвращает самые новые расходы. С cursor возвращает limit расходов,
+    ближайших к нему: старше него при older=True и новее при older=False.
+    """
+    start, end = _get_month_bounds(year, month)
+    if cursor is None:
+        sql, params = strings.DB_GET_EXPENSES_PAGE_FIRST_SQL, (start, end, limit)
+    elif older:
+        sql, params = strings.DB_GET_EXPENSES_PAGE_OLDER_SQL, (start, end, *cursor, limit)
+    else:
+        sql, params = strings.DB_GET_EXPENSES_PAGE_NEWER_SQL, (start, end, *cursor, limit)
+
+    conn = _get_connection(db_path)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+    expenses = [
+        Expense(
+            id=row["id"],
+            description=row["description"],
+            amount=row["amount"],
+            created_at=row["created_at"],
+            user_id=row["user_id"],
+        )
+        for row in rows
+    ]
+    if cursor is not None and not older:
+        expenses.reverse()
+    return expenses
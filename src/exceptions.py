@@ -5,3 +5,15 @@ class ParsingError(Exception):
     """Ошибка при парсинге расходов."""
 
     pass
+
+
+class BatchWriteInterrupted(Exception):
+    """Пакетная запись расходов прервана до того, как стал известен результат транзакции."""
+
+    pass
+
+
+class UpdateQueueFull(Exception):
+    """Очередь обновлений переполнена, обновление отброшено."""
+
+    pass
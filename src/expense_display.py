@@ -5,7 +5,8 @@ from datetime import datetime
 from typing import Dict, List
 
 from . import strings
-from .db import Expense
+from .callback_data import MONTH_PREFIX, SEPARATOR, unpack_month
+from .db import Expense, MonthSummary
 
 
 def format_amount(amount: float) -> str:
@@ -38,50 +39,101 @@ def group_expenses_by_user(expenses: List[Expense]) -> Dict[int, List[Expense]]:
 
 
 def format_expenses_for_display(expenses: List[Expense], year: int, month: int, show_by_user: bool = True) -> str:
-    """Форматирует расходы для отображения."""
+    """
+    Форматирует расходы для отображения.
+    Строки собираются в список за один проход по расходам и склеиваются одним join,
+    поэтому время работы линейно по числу расходов.
+    """
+    month_name = get_month_name(month)
     if not expenses:
-        month_name = get_month_name(month)
         return strings.EXPENSES_EMPTY_TEMPLATE.format(month_name=month_name, year=year)
 
-    month_name = get_month_name(month)
-    result = strings.EXPENSES_HEADER_TEMPLATE.format(month_name=month_name, year=year)
+    format_item = strings.EXPENSES_ITEM_TEMPLATE.format
+    dates: dict[str, str] = {}
+    parts = [strings.EXPENSES_HEADER_TEMPLATE.format(month_name=month_name, year=year)]
+    total_amount = 0.0
 
     if show_by_user:
-        # Группируем по пользователям
-        grouped_expenses = group_expenses_by_user(expenses)
-        total_amount = 0.0
-
-        for user_id, user_expenses in grouped_expenses.items():
-            user_name = f"Пользователь {user_id}"
-            result += strings.EXPENSES_USER_HEADER_TEMPLATE.format(user_name=user_name)
-
-            user_total = 0.0
-            for expense in user_expenses:
-                amount_str = format_amount(expense.amount)
-                date_str = format_date(expense.created_at)
-                result += strings.EXPENSES_ITEM_TEMPLATE.format(
-                    description=expense.description, amount_str=amount_str, date=date_str
+        # Секции пользователей в порядке первого появления; сумма каждой считается на лету
+        sections: dict[int, list[str]] = {}
+        user_totals: dict[int, float] = {}
+        for expense in expenses:
+            user_id = expense.user_id
+            section = sections.get(user_id)
+            if section is None:
+                section = sections[user_id] = [
+                    strings.EXPENSES_USER_HEADER_TEMPLATE.format(user_name=f"Пользователь {user_id}")
+                ]
+                user_totals[user_id] = 0.0
+            section.append(
+                format_item(
+                    description=expense.description,
+                    amount_str=format_amount(expense.amount),
+                    date=_format_date_cached(expense.created_at, dates),
                 )
-                user_total += expense.amount
-                total_amount += expense.amount
-
-            result += f"  💰 Итого: {format_amount(user_total)}\n\n"
+            )
+            user_totals[user_id] += expense.amount
+            total_amount += expense.amount
 
-        result += strings.EXPENSES_TOTAL_TEMPLATE.format(total_amount_str=format_amount(total_amount))
+        for user_id, section in sections.items():
+            parts.extend(section)
+            parts.append(
+                strings.EXPENSES_USER_TOTAL_TEMPLATE.format(total_amount_str=format_amount(user_totals[user_id]))
+            )
     else:
         # Показываем все расходы в одном списке
-        total_amount = 0.0
         for expense in expenses:
-            amount_str = format_amount(expense.amount)
-            date_str = format_date(expense.created_at)
-            result += strings.EXPENSES_ITEM_TEMPLATE.format(
-                description=expense.description, amount_str=amount_str, date=date_str
+            parts.append(
+                format_item(
+                    description=expense.description,
+                    amount_str=format_amount(expense.amount),
+                    date=_format_date_cached(expense.created_at, dates),
+                )
             )
             total_amount += expense.amount
 
-        result += strings.EXPENSES_TOTAL_TEMPLATE.format(total_amount_str=format_amount(total_amount))
+    parts.append(strings.EXPENSES_TOTAL_TEMPLATE.format(total_amount_str=format_amount(total_amount)))
+    return "".join(parts)
+
+
+def _format_date_cached(date_str: str, cache: dict[str, str]) -> str:
+    """Форматирует дату, разбирая каждый день месяца только один раз."""
+    day = date_str[:10]
+    formatted = cache.get(day)
+    if formatted is None:
+        formatted = format_date(date_str)
+        if formatted != date_str:  # нераспознанные даты не кэшируем
+            cache[day] = formatted
+    return formatted
 
-    return result
+
+def truncate_description(description: str, max_length: int = strings.REPORT_DESCRIPTION_MAX_LENGTH) -> str:
+    """Обрезает слишком длинное описание, чтобы страница отчёта не превысила лимит Telegram."""
+    if len(description) <= max_length:
+        return description
+    return description[: max_length - 1] + "…"
+
+
+def format_expenses_page(expenses: List[Expense], year: int, month: int, page: int, summary: MonthSummary) -> str:
+    """Форматирует одну страницу отчёта за месяц с итогом за весь месяц."""
+    month_name = get_month_name(month)
+    if not expenses:
+        return strings.EXPENSES_EMPTY_TEMPLATE.format(month_name=month_name, year=year)
+
+    lines = [strings.EXPENSES_PAGE_HEADER_TEMPLATE.format(month_name=month_name, year=year, page=page)]
+    for expense in expenses:
+        lines.append(
+            strings.EXPENSES_PAGE_ITEM_TEMPLATE.format(
+                description=truncate_description(expense.description),
+                amount_str=format_amount(expense.amount),
+                date=format_date(expense.created_at),
+                user_name=f"Пользователь {expense.user_id}",
+            )
+        )
+    lines.append(
+        strings.EXPENSES_PAGE_TOTAL_TEMPLATE.format(total_amount_str=format_amount(summary.total), count=summary.count)
+    )
+    return "".join(lines)
 
 
 def get_current_month() -> tuple[int, int]:
@@ -99,7 +151,10 @@ def get_previous_month(year: int, month: int) -> tuple[int, int]:
 
 
 def get_month_from_callback(callback_data: str) -> tuple[int, int]:
-    """Определяет месяц из callback_data."""
+    """
+    Определяет месяц из callback_data: "month_current"/"month_last"/"month_previous" или "m:YYYYMM".
+    Бросает ValueError для повреждённых данных вида "m:...", чтобы обработчик показал ошибку, а не чужой месяц.
+    """
     current_year, current_month = get_current_month()
 
     if callback_data == "month_current":
@@ -109,5 +164,7 @@ def get_month_from_callback(callback_data: str) -> tuple[int, int]:
     elif callback_data == "month_previous":
         last_year, last_month = get_previous_month(current_year, current_month)
         return get_previous_month(last_year, last_month)
+    elif callback_data.startswith(f"{MONTH_PREFIX}{SEPARATOR}"):
+        return unpack_month(callback_data)
     else:
         return current_year, current_month
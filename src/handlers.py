@@ -2,9 +2,24 @@
 
 import logging
 
+from aiogram import Bot
+from aiogram.filters import CommandObject
 from aiogram.types import CallbackQuery, Message
 
-from . import auth, db, expense_display, keyboards, parsing, strings, utils
+from . import (
+    auth,
+    batch_writer,
+    concurrency,
+    expense_display,
+    keyboards,
+    metrics,
+    parsing,
+    profiling,
+    reports,
+    strings,
+    utils,
+)
+from .callback_data import MONTH_PICKER, ReportPageRequest, unpack_month_picker, unpack_report_page
 
 logger = logging.getLogger(__name__)
 
@@ -12,72 +27,103 @@ logger = logging.getLogger(__name__)
 async def handle_start(message: Message) -> None:
     """Обработчик команды /start."""
     user_id = utils.get_user_id(message)
-    logger.debug(strings.LOG_BOT_STARTING.format(user_id=user_id))
+    logger.debug(strings.LOG_BOT_STARTING, user_id)
 
-    if not auth.is_user_allowed(user_id):
-        logger.warning(strings.LOG_ACCESS_DENIED_START.format(user_id=user_id))
-        await utils.send_access_denied(message)
-        return
-
-    logger.info(strings.LOG_BOT_START_SUCCESS.format(user_id=user_id))
+    logger.info(strings.LOG_BOT_START_SUCCESS, user_id)
     keyboard = keyboards.get_main_keyboard()
     await message.answer(strings.HELP_TEXT, reply_markup=keyboard)
 
 
-async def handle_text(message: Message) -> None:
-    """Обработчик текстовых сообщений."""
+async def handle_profile(message: Message, bot: Bot, command: CommandObject) -> None:
+    """Обработчик команды /profile [N | Ns | stop] (только для администраторов)."""
     user_id = utils.get_user_id(message)
-    logger.debug(f"Incoming message from user_id=[{user_id}]: [{message.text}].")
+    if not auth.is_admin(user_id):
+        await message.answer(strings.ERROR_ADMIN_ONLY)
+        return
 
-    if not auth.is_user_allowed(user_id):
-        logger.warning(strings.LOG_ACCESS_DENIED_MESSAGE.format(user_id=user_id))
-        await utils.send_access_denied(message)
+    profiler = profiling.get_profiler()
+    if (command.args or "").strip().lower() == strings.PROFILE_STOP_ARG:
+        await message.answer(strings.PROFILE_STOPPED if profiler.stop() else strings.PROFILE_NOT_RUNNING)
         return
 
+    limits = profiling.parse_profile_args(command.args)
+    if limits is None:
+        await message.answer(strings.PROFILE_USAGE)
+        return
+    updates, seconds = limits
+    if not profiler.start(updates=updates, seconds=seconds, bot=bot, chat_id=message.chat.id):
+        await message.answer(strings.PROFILE_ALREADY_RUNNING)
+        return
+
+    if updates is not None:
+        await message.answer(strings.PROFILE_STARTED_UPDATES_TEMPLATE.format(count=updates))
+    else:
+        await message.answer(strings.PROFILE_STARTED_SECONDS_TEMPLATE.format(seconds=seconds))
+
+
+async def handle_text(message: Message) -> None:
+    """Обработчик текстовых сообщений."""
+    user_id = utils.get_user_id(message)
+    logger.debug("Incoming message from user_id=[%s]: [%s].", user_id, message.text)
+
     costs, failed_costs = parsing.parse_multiple_expenses(message.text or "")
+    if failed_costs:
+        metrics.PARSE_FAILURES.inc(len(failed_costs))
+    if not costs:
+        # Сообщение без расходов не пишет в БД, поэтому его ответ идёт после ответов на предыдущие записи
+        await concurrency.wait_for_writes()
 
     if not costs and not failed_costs:
-        logger.warning(strings.LOG_PARSING_FAILED.format(message=message.text, user_id=user_id))
+        metrics.PARSE_FAILURES.inc()
+        logger.warning(strings.LOG_PARSING_FAILED, message.text, user_id)
         await message.answer(strings.ERROR_INVALID_FORMAT)
         return
 
-    # Обрабатываем каждую запись и генерируем сообщения об успешных и неудачных записях в БД
-    success_db_inserts_messages = []
-    failed_db_inserts_insertions = []
-
+    # Расходы сообщения записываются одной транзакцией вместе с расходами других сообщений,
+    # обрабатываемых одновременно; для каждого расхода возвращается id или ошибка.
+    # На время записи очередь пользователя отпускается, чтобы его следующие сообщения попали в ту же транзакцию;
+    # остальные его обновления (отчёты, кнопки) ждут окончания записи
     for description, amount in costs:
+        logger.debug(strings.LOG_ADDING_EXPENSE, description, amount, user_id)
+    results: list[int | Exception] = []
+    if costs:
         try:
-            logger.debug(strings.LOG_ADDING_EXPENSE.format(description=description, amount=amount, user_id=user_id))
-            db.insert_expense(description=description, amount=amount, user_id=user_id)
-
-            amount_str = f"{amount:.2f}".rstrip("0").rstrip(".")
-            success_db_inserts_messages.append(
-                strings.SUCCESS_SAVED_TEMPLATE.format(description=description, amount_str=amount_str)
-            )
+            results = list(await concurrency.run_outside_turn(batch_writer.get_expense_writer().write(user_id, costs)))
+        except Exception as err:
+            logger.exception(strings.LOG_FAILED_INSERT, user_id, err)
+            results = [err] * len(costs)
 
-            logger.info(
-                strings.LOG_EXPENSE_SAVED.format(description=description, amount_str=amount_str, user_id=user_id)
-            )
+    # Генерируем сообщения об успешных и неудачных записях в БД
+    success_db_inserts_messages = []
+    failed_db_inserts_insertions = []
 
-        except Exception as err:
-            logger.exception(strings.LOG_FAILED_INSERT.format(user_id=user_id, error=err))
-            failed_db_inserts_insertions.append(strings.ERROR_PROCESSING_TEMPLATE.format(err=err))
+    for (description, amount), result in zip(costs, results):
+        if isinstance(result, Exception):
+            # Ошибка всей транзакции уже залогирована выше, здесь — только отклонённые строки
+            if isinstance(result, ValueError):
+                logger.error(strings.LOG_FAILED_INSERT, user_id, result)
+            failed_db_inserts_insertions.append(strings.ERROR_PROCESSING_TEMPLATE.format(err=result))
+            continue
+
+        amount_str = f"{amount:.2f}".rstrip("0").rstrip(".")
+        success_db_inserts_messages.append(
+            strings.SUCCESS_SAVED_TEMPLATE.format(description=description, amount_str=amount_str)
+        )
+        logger.info(strings.LOG_EXPENSE_SAVED, description, amount_str, user_id)
 
-    # Отправляем результат
-    await utils.send_success_messages(message, success_db_inserts_messages)
-    await utils.send_db_insert_error_messages(message, failed_db_inserts_insertions)
-    await utils.send_parsing_errors(message, failed_costs)
+    # Отправляем результат одним сообщением
+    reply = utils.build_expenses_reply(success_db_inserts_messages, failed_db_inserts_insertions, failed_costs)
+    await utils.send_long_message(message, reply)
 
 
 async def handle_view_expenses_callback(callback: CallbackQuery) -> None:
     """Обработчик кнопки 'Показать расходы'."""
     user_id = callback.from_user.id
-    logger.debug(f"View expenses callback from user_id=[{user_id}]")
+    logger.debug("View expenses callback from user_id=[%s]", user_id)
 
-    if not auth.is_user_allowed(user_id):
-        logger.warning(strings.LOG_ACCESS_DENIED_MESSAGE.format(user_id=user_id))
-        await callback.answer("⛔ У вас нет доступа к этому боту.")
-        return
+    # Пока пользователь выбирает месяц, прогреваем самые частые отчёты
+    current = expense_display.get_current_month()
+    reports.start_prefetch(user_id, [current, expense_display.get_previous_month(*current)])
 
     keyboard = keyboards.get_month_selection_keyboard()
     await callback.message.edit_text("📊 Выберите месяц для просмотра расходов:", reply_markup=keyboard)
@@ -87,42 +133,95 @@ async def handle_view_expenses_callback(callback: CallbackQuery) -> None:
 async def handle_month_selection_callback(callback: CallbackQuery) -> None:
     """Обработчик выбора месяца."""
     user_id = callback.from_user.id
-    logger.debug(f"Month selection callback from user_id=[{user_id}]: {callback.data}")
-
-    if not auth.is_user_allowed(user_id):
-        logger.warning(strings.LOG_ACCESS_DENIED_MESSAGE.format(user_id=user_id))
-        await callback.answer("⛔ У вас нет доступа к этому боту.")
-        return
+    logger.debug("Month selection callback from user_id=[%s]: %s", user_id, callback.data)
 
     try:
         year, month = expense_display.get_month_from_callback(callback.data)
-        expenses = db.get_expenses_by_month(year, month)
 
-        formatted_expenses = expense_display.format_expenses_for_display(expenses, year, month)
-        keyboard = keyboards.get_back_to_menu_keyboard()
+        # Небольшой месяц показываем целиком, большой — постранично
+        summary = await reports.get_month_summary(year, month)
+        if summary.count <= strings.REPORT_PAGE_SIZE:
+            formatted_expenses = await reports.get_month_report(year, month)
+            if len(formatted_expenses) <= strings.TELEGRAM_MESSAGE_MAX_LENGTH:
+                keyboard = keyboards.get_back_to_menu_keyboard()
+                await callback.message.edit_text(formatted_expenses, reply_markup=keyboard)
+                await callback.answer()
+                return
+
+        await _show_report_page(callback, ReportPageRequest(year=year, month=month))
+
+    except Exception as err:
+        logger.exception("Error handling month selection: %s", err)
+        await _show_report_error(callback)
+
 
-        await callback.message.edit_text(formatted_expenses, reply_markup=keyboard)
+async def handle_month_picker_callback(callback: CallbackQuery) -> None:
+    """Обработчик выбора произвольного месяца: показывает месяцы года, за которые есть расходы."""
+    user_id = callback.from_user.id
+    logger.debug("Month picker callback from user_id=[%s]: %s", user_id, callback.data)
+
+    try:
+        months = await reports.get_months_with_expenses()
+        if not months:
+            await callback.message.edit_text(
+                strings.MONTH_PICKER_EMPTY_TEXT, reply_markup=keyboards.get_back_to_menu_keyboard()
+            )
+            await callback.answer()
+            return
+
+        years = sorted({year for year, _ in months}, reverse=True)
+        year = years[0] if callback.data == MONTH_PICKER else unpack_month_picker(callback.data)
+        if year not in years:
+            year = years[0]
+        index = years.index(year)
+        older_year = years[index + 1] if index + 1 < len(years) else None
+        newer_year = years[index - 1] if index > 0 else None
+
+        year_months = sorted(month for month_year, month in months if month_year == year)
+        keyboard = keyboards.get_month_picker_keyboard(year, year_months, older_year, newer_year)
+        await callback.message.edit_text(strings.MONTH_PICKER_TEXT.format(year=year), reply_markup=keyboard)
         await callback.answer()
 
     except Exception as err:
-        logger.exception(f"Error handling month selection: {err}")
-        await callback.answer("❌ Ошибка при получении расходов.")
-        await callback.message.edit_text(
-            "❌ Произошла ошибка при получении расходов. Попробуйте позже.",
-            reply_markup=keyboards.get_back_to_menu_keyboard(),
-        )
+        logger.exception("Error handling month picker: %s", err)
+        await _show_report_error(callback)
+
+
+async def handle_report_page_callback(callback: CallbackQuery) -> None:
+    """Обработчик кнопок листания страниц отчёта."""
+    user_id = callback.from_user.id
+    logger.debug("Report page callback from user_id=[%s]: %s", user_id, callback.data)
+
+    try:
+        await _show_report_page(callback, unpack_report_page(callback.data))
+    except Exception as err:
+        logger.exception("Error handling report page: %s", err)
+        await _show_report_error(callback)
+
+
+async def _show_report_page(callback: CallbackQuery, request: ReportPageRequest) -> None:
+    """Показывает страницу отчёта с кнопками листания."""
+    page = await reports.get_month_report_page(request)
+    keyboard = keyboards.get_report_page_keyboard(page.prev_request, page.next_request)
+    await callback.message.edit_text(page.text, reply_markup=keyboard)
+    await callback.answer()
+
+
+async def _show_report_error(callback: CallbackQuery) -> None:
+    """Сообщает пользователю об ошибке получения расходов."""
+    await callback.answer("❌ Ошибка при получении расходов.")
+    await callback.message.edit_text(
+        "❌ Произошла ошибка при получении расходов. Попробуйте позже.",
+        reply_markup=keyboards.get_back_to_menu_keyboard(),
+    )
 
 
 async def handle_back_to_menu_callback(callback: CallbackQuery) -> None:
     """Обработчик кнопки 'Назад в меню'."""
     user_id = callback.from_user.id
-    logger.debug(f"Back to menu callback from user_id=[{user_id}]")
-
-    if not auth.is_user_allowed(user_id):
-        logger.warning(strings.LOG_ACCESS_DENIED_MESSAGE.format(user_id=user_id))
-        await callback.answer("⛔ У вас нет доступа к этому боту.")
-        return
+    logger.debug("Back to menu callback from user_id=[%s]", user_id)
 
+    reports.cancel_prefetch(user_id)
     keyboard = keyboards.get_main_keyboard()
     await callback.message.edit_text(strings.HELP_TEXT, reply_markup=keyboard)
     await callback.answer()
@@ -3,6 +3,7 @@
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
 from . import strings
+from .callback_data import MONTH_PICKER, ReportPageRequest, pack_month, pack_month_picker, pack_report_page
 
 
 def get_main_keyboard() -> InlineKeyboardMarkup:
@@ -20,6 +21,7 @@ def get_month_selection_keyboard() -> InlineKeyboardMarkup:
             [InlineKeyboardButton(text=strings.BUTTON_THIS_MONTH, callback_data="month_current")],
             [InlineKeyboardButton(text=strings.BUTTON_LAST_MONTH, callback_data="month_last")],
             [InlineKeyboardButton(text=strings.BUTTON_PREVIOUS_MONTH, callback_data="month_previous")],
+            [InlineKeyboardButton(text=strings.BUTTON_OTHER_MONTH, callback_data=MONTH_PICKER)],
             [InlineKeyboardButton(text=strings.BUTTON_BACK_TO_MENU, callback_data="back_to_menu")],
         ]
     )
@@ -32,3 +34,56 @@ def get_back_to_menu_keyboard() -> InlineKeyboardMarkup:
         inline_keyboard=[[InlineKeyboardButton(text=strings.BUTTON_BACK_TO_MENU, callback_data="back_to_menu")]]
     )
     return keyboard
+
+
+def get_report_page_keyboard(
+    prev_request: ReportPageRequest | None, next_request: ReportPageRequest | None
+) -> InlineKeyboardMarkup:
+    """Создает клавиатуру листания страниц отчёта с кнопкой возврата в меню."""
+    navigation = []
+    if prev_request is not None:
+        navigation.append(
+            InlineKeyboardButton(text=strings.BUTTON_PREV_PAGE, callback_data=pack_report_page(prev_request))
+        )
+    if next_request is not None:
+        navigation.append(
+            InlineKeyboardButton(text=strings.BUTTON_NEXT_PAGE, callback_data=pack_report_page(next_request))
+        )
+
+    rows = [navigation] if navigation else []
+    rows.append([InlineKeyboardButton(text=strings.BUTTON_BACK_TO_MENU, callback_data="back_to_menu")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def get_month_picker_keyboard(
+    year: int, months: list[int], older_year: int | None, newer_year: int | None
+) -> InlineKeyboardMarkup:
+    """Создает клавиатуру выбора месяца за год с переходом к соседним годам, за которые есть расходы."""
+    buttons = [
+        InlineKeyboardButton(text=strings.MONTH_NAMES[month - 1].capitalize(), callback_data=pack_month(year, month))
+        for month in months
+    ]
+    columns = strings.MONTH_PICKER_COLUMNS
+    rows = []
+    for start in range(0, len(buttons), columns):
+        end = start + columns
+        rows.append(buttons[start:end])
+
+    navigation = []
+    if older_year is not None:
+        navigation.append(
+            InlineKeyboardButton(
+                text=f"{strings.BUTTON_PREV_PAGE} {older_year}", callback_data=pack_month_picker(older_year)
+            )
+        )
+    if newer_year is not None:
+        navigation.append(
+            InlineKeyboardButton(
+                text=f"{newer_year} {strings.BUTTON_NEXT_PAGE}", callback_data=pack_month_picker(newer_year)
+            )
+        )
+    if navigation:
+        rows.append(navigation)
+
+    rows.append([InlineKeyboardButton(text=strings.BUTTON_BACK, callback_data="view_expenses")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
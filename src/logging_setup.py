@@ -0,0 +1,97 @@
+"""Non-blocking logging: records are queued and formatted and written by a listener thread."""
+
+import atexit
+import json
+import logging
+import queue
+from collections.abc import Mapping
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+from . import strings
+
+# Атрибуты, которые есть у любой LogRecord; остальные считаются полями из extra=...
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+# Аргументы этих типов неизменяемы, их можно отдавать в поток QueueListener как есть
+_PRIMITIVE_TYPES = (str, int, float, bool, bytes, type(None))
+
+
+def _freeze_arg(value: Any) -> Any:
+    return value if isinstance(value, _PRIMITIVE_TYPES) else str(value)
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует запись как одну строку JSON: время, уровень, логгер, сообщение, исключение и поля extra."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, UTC).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        payload.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            payload["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class RecordQueueHandler(QueueHandler):
+    """
+    Кладёт запись в очередь почти как есть. Стандартный QueueHandler форматирует сообщение
+    в вызывающем потоке; здесь подстановка аргументов и запись в поток вывода
+    выполняются в потоке QueueListener, а не в цикле событий.
+    Исключение намеренное: аргументы не простых типов (списки, модели aiogram, исключения)
+    переводятся в строки в вызывающем потоке. Иначе поток QueueListener читал бы объект
+    без синхронизации и, возможно, уже изменённым. Поэтому такие аргументы подставляются через %s.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if isinstance(args, tuple):
+            if not all(isinstance(arg, _PRIMITIVE_TYPES) for arg in args):
+                record.args = tuple(_freeze_arg(arg) for arg in args)
+        elif isinstance(args, Mapping):
+            record.args = {key: _freeze_arg(value) for key, value in args.items()}
+        return record
+
+
+_listener: QueueListener | None = None
+_handler: RecordQueueHandler | None = None
+
+
+def configure(level: int, json_output: bool = False) -> None:
+    """
+    Подключает к корневому логгеру очередь и запускает поток, который пишет записи в stderr.
+    Повторный вызов заменяет предыдущую настройку.
+    """
+    global _listener, _handler
+    stop()
+
+    output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter() if json_output else logging.Formatter(strings.LOG_FORMAT))
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    _handler = RecordQueueHandler(records)
+    _listener = QueueListener(records, output, respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_handler)
+    _listener.start()
+
+
+def stop() -> None:
+    """Дописывает оставшиеся в очереди записи и отключает очередь от корневого логгера."""
+    global _listener, _handler
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop)
@@ -0,0 +1,174 @@
+"""Event loop watchdog: detects stalls and attributes them to the blocking file and line."""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from dataclasses import dataclass, replace
+from types import FrameType
+
+from . import config, metrics, strings
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass(frozen=True)
+class LoopBlock:
+    """Завершившаяся остановка цикла событий: длительность, место в коде и стек первого снимка."""
+
+    duration: float
+    location: str
+    stack: str
+    samples: int
+
+
+@dataclass
+class LoopWatchdogStats:
+    """Счётчики сторожа: число остановок, их суммарная и максимальная длительность, число снимков стека."""
+
+    blocks: int = 0
+    blocked_seconds: float = 0.0
+    max_block_seconds: float = 0.0
+    samples: int = 0
+
+
+def frame_location(frame: FrameType) -> str:
+    """
+    Возвращает место, где стоит цикл событий, в виде «файл:строка (функция)».
+    Берётся самый глубокий кадр из кода проекта (вызов блокирующей библиотеки виден по строке вызова),
+    а если его нет — самый глубокий кадр вообще.
+    """
+    current: FrameType | None = frame
+    while current is not None:
+        filename = os.path.abspath(current.f_code.co_filename)
+        if filename.startswith(_PROJECT_ROOT + os.sep) and "site-packages" not in filename:
+            return f"{os.path.relpath(filename, _PROJECT_ROOT)}:{current.f_lineno} ({current.f_code.co_name})"
+        current = current.f_back
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} ({frame.f_code.co_name})"
+
+
+class LoopWatchdog:
+    """
+    Задача в цикле событий отмечает пульс каждые interval секунд, а отдельный поток каждые
+    sample_interval секунд проверяет, не опаздывает ли пульс больше чем на threshold.
+    Пока цикл стоит, поток снимает стек его потока через sys._current_frames(), поэтому видно,
+    какой код держит цикл. По окончании остановки она логируется и попадает в метрики
+    bot_event_loop_blocks_total и bot_event_loop_blocked_seconds_total с меткой location.
+    Остановка дольше LOOP_WATCHDOG_ONGOING_FACTOR порогов логируется ещё до окончания (иначе вечное
+    зависание не попало бы в лог), а остановка, которая идёт в момент stop(), записывается при остановке.
+    """
+
+    def __init__(
+        self,
+        threshold: float = strings.LOOP_BLOCK_THRESHOLD_MS_DEFAULT / 1000,
+        sample_interval: float | None = None,
+    ) -> None:
+        self.threshold = threshold
+        self.interval = threshold / 2
+        self.sample_interval = sample_interval or max(threshold / 4, strings.LOOP_WATCHDOG_MIN_SAMPLE_INTERVAL)
+        self.recent: deque[LoopBlock] = deque(maxlen=strings.LOOP_WATCHDOG_RECENT_BLOCKS)
+        self._stats = LoopWatchdogStats()
+        self._beat = 0.0
+        self._loop_thread_id: int | None = None
+        self._heartbeat_task: asyncio.Task[None] | None = None
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+
+    @property
+    def stats(self) -> LoopWatchdogStats:
+        """Возвращает снимок счётчиков."""
+        return replace(self._stats)
+
+    def start(self) -> None:
+        """Запускает пульс в текущем цикле событий и поток наблюдения."""
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._stopping.clear()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(strings.LOG_LOOP_WATCHDOG_STARTED, self.threshold * 1000)
+
+    async def stop(self) -> None:
+        """Останавливает поток наблюдения и пульс."""
+        self._stopping.set()
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+            self._heartbeat_task = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._beat = time.perf_counter()
+            await asyncio.sleep(self.interval)
+
+    def _watch(self) -> None:
+        # Пока пульс не сменился, снимки относятся к той же остановке цикла
+        locations: Counter[str] = Counter()
+        stack = ""
+        blocked_beat = 0.0
+        reported = False
+        while not self._stopping.wait(self.sample_interval):
+            beat = self._beat
+            if locations and beat != blocked_beat:
+                self._record(beat - blocked_beat - self.interval, locations, stack)
+                locations = Counter()
+            blocked = time.perf_counter() - beat - self.interval
+            if blocked <= self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id or 0)
+            if frame is None:
+                continue
+            if not locations:
+                blocked_beat = beat
+                stack = "".join(traceback.format_stack(frame))
+                reported = False
+            location = frame_location(frame)
+            locations[location] += 1
+            if not reported and blocked > self.threshold * strings.LOOP_WATCHDOG_ONGOING_FACTOR:
+                reported = True
+                logger.warning(
+                    strings.LOG_LOOP_STILL_BLOCKED, blocked * 1000, location, "".join(traceback.format_stack(frame))
+                )
+            del frame
+
+        # Остановка, которая ещё идёт (или пульс не успел отметить её конец), записывается при выходе
+        if locations:
+            self._record(time.perf_counter() - blocked_beat - self.interval, locations, stack)
+
+    def _record(self, duration: float, locations: "Counter[str]", stack: str) -> None:
+        location, _ = locations.most_common(1)[0]
+        samples = sum(locations.values())
+        block = LoopBlock(duration, location, stack, samples)
+        self.recent.append(block)
+
+        stats = self._stats
+        stats.blocks += 1
+        stats.blocked_seconds += duration
+        stats.max_block_seconds = max(stats.max_block_seconds, duration)
+        stats.samples += samples
+        metrics.EVENT_LOOP_BLOCKS.inc(location=location)
+        metrics.EVENT_LOOP_BLOCKED_SECONDS.inc(duration, location=location)
+        logger.warning(strings.LOG_LOOP_BLOCKED, duration * 1000, location, samples, stack)
+
+
+def start_from_config() -> LoopWatchdog | None:
+    """
+    Запускает сторожа в текущем цикле событий с порогом LOOP_BLOCK_THRESHOLD_MS и регистрирует его счётчики
+    в метриках. Возвращает None, если сторож выключен.
+    """
+    if (threshold_ms := config.get_loop_block_threshold_ms()) <= 0:
+        return None
+    watchdog = LoopWatchdog(threshold_ms / 1000)
+    metrics.REGISTRY.register_stats("bot_event_loop_watchdog", lambda: watchdog.stats)
+    watchdog.start()
+    return watchdog
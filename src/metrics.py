@@ -0,0 +1,233 @@
+"""In-process metrics rendered in the Prometheus text exposition format."""
+
+import abc
+import bisect
+import dataclasses
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import ContextDecorator
+from typing import Any
+
+from . import strings
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(abc.ABC):
+    """Общая часть метрик: имя, описание и имена меток. Наследники задают type_name и _samples."""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        # Значения обновляются и из потоков asyncio.to_thread (например, замеры запросов к БД)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: dict[str, str]) -> LabelValues:
+        if labels.keys() != set(self.labelnames):
+            raise ValueError(strings.ERROR_METRIC_LABELS.format(name=self.name, expected=self.labelnames))
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> Iterator[str]:
+        """Возвращает строки метрики в текстовом формате Prometheus."""
+        yield f"# HELP {self.name} {_escape(self.documentation)}"
+        yield f"# TYPE {self.name} {self.type_name}"
+        yield from self._samples()
+
+    @abc.abstractmethod
+    def _samples(self) -> Iterator[str]:
+        """Возвращает строки значений метрики (без HELP и TYPE)."""
+
+
+class Counter(_Metric):
+    """Монотонно растущий счётчик."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Увеличивает счётчик с метками labels на amount."""
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        """Возвращает текущее значение счётчика с метками labels."""
+        return self._values.get(self._label_values(labels), 0)
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class _Timer(ContextDecorator):
+    """Замеряет длительность блока или вызова функции и записывает её в гистограмму."""
+
+    def __init__(self, histogram: "Histogram", labels: dict[str, str]) -> None:
+        self._histogram = histogram
+        self._labels = labels
+        self._started_at = 0.0
+
+    def _recreate_cm(self) -> "_Timer":
+        # Декоратор создаёт новый таймер на каждый вызов: вызовы могут идти параллельно в разных потоках
+        return _Timer(self._histogram, self._labels)
+
+    def __enter__(self) -> "_Timer":
+        self._started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._histogram.observe(time.perf_counter() - self._started_at, **self._labels)
+
+
+class Histogram(_Metric):
+    """Распределение значений по корзинам (le) с суммой и количеством наблюдений."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = strings.METRICS_DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Для каждого набора меток: количества по корзинам (последняя — +Inf) и сумма
+        self._values: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Записывает наблюдение value."""
+        key = self._label_values(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def time(self, **labels: str) -> _Timer:
+        """Возвращает контекстный менеджер/декоратор, замеряющий длительность в секундах."""
+        self._label_values(labels)
+        return _Timer(self, labels)
+
+    def get_count(self, **labels: str) -> int:
+        """Возвращает количество наблюдений с метками labels."""
+        entry = self._values.get(self._label_values(labels))
+        return sum(entry[0]) if entry else 0
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            items = [(key, list(counts), total[0]) for key, (counts, total) in sorted(self._values.items())]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+class StatsGauges:
+    """
+    Набор gauge-метрик из dataclass-снимка счётчиков (RateLimitStats, ReportCacheStats и т. п.):
+    каждое числовое поле снимка становится метрикой {prefix}_{поле}.
+    """
+
+    def __init__(self, prefix: str, source: Callable[[], Any]) -> None:
+        self.name = prefix
+        self._source = source
+
+    def render(self) -> Iterator[str]:
+        """Возвращает строки метрик текущего снимка в текстовом формате Prometheus."""
+        snapshot = self._source()
+        for field in dataclasses.fields(snapshot):
+            value = getattr(snapshot, field.name)
+            if isinstance(value, bool) or not isinstance(value, int | float):
+                continue
+            name = f"{self.name}_{field.name}"
+            yield f"# TYPE {name} gauge"
+            yield f"{name} {_format_value(value)}"
+
+
+class Registry:
+    """Набор метрик процесса; повторная регистрация под тем же именем заменяет метрику."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric | StatsGauges] = {}
+
+    def register(self, metric: "_Metric | StatsGauges") -> Any:
+        """Регистрирует метрику и возвращает её."""
+        self._metrics[metric.name] = metric
+        return metric
+
+    def register_stats(self, prefix: str, source: Callable[[], Any]) -> None:
+        """Регистрирует снимок счётчиков source() как набор gauge-метрик с префиксом prefix."""
+        self.register(StatsGauges(prefix, source))
+
+    def render(self) -> str:
+        """Возвращает все метрики в текстовом формате Prometheus."""
+        lines = [line for metric in self._metrics.values() for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+ACCESS_DENIED: Counter = REGISTRY.register(
+    Counter("bot_access_denied_total", "Updates rejected because the user is not allowed.")
+)
+HANDLER_DURATION: Histogram = REGISTRY.register(
+    Histogram("bot_handler_duration_seconds", "Handler execution time.", ("handler",))
+)
+HANDLER_ERRORS: Counter = REGISTRY.register(
+    Counter("bot_handler_errors_total", "Handler calls that raised an exception.", ("handler",))
+)
+DB_QUERY_DURATION: Histogram = REGISTRY.register(
+    Histogram("bot_db_query_duration_seconds", "Database call time.", ("query",))
+)
+PARSE_FAILURES: Counter = REGISTRY.register(
+    Counter("bot_parse_failures_total", "Expense entries that could not be parsed.")
+)
+API_REQUEST_DURATION: Histogram = REGISTRY.register(
+    Histogram("bot_api_request_duration_seconds", "Bot API request time.", ("method",))
+)
+API_REQUEST_ERRORS: Counter = REGISTRY.register(
+    Counter("bot_api_request_errors_total", "Bot API requests that failed.", ("method",))
+)
+EVENT_LOOP_LAG: Histogram = REGISTRY.register(
+    Histogram("bot_event_loop_lag_seconds", "Delay of event loop wake-ups.", buckets=strings.METRICS_LAG_BUCKETS)
+)
+EVENT_LOOP_BLOCKS: Counter = REGISTRY.register(
+    Counter("bot_event_loop_blocks_total", "Event loop stalls over the watchdog threshold.", ("location",))
+)
+EVENT_LOOP_BLOCKED_SECONDS: Counter = REGISTRY.register(
+    Counter("bot_event_loop_blocked_seconds_total", "Time the event loop spent stalled.", ("location",))
+)
@@ -0,0 +1,67 @@
+"""Embedded HTTP server with /metrics and /healthz, run in the bot's event loop."""
+
+import asyncio
+import logging
+import time
+
+from aiohttp import web
+
+from . import db, metrics, strings
+
+logger = logging.getLogger(__name__)
+
+
+async def handle_metrics(_request: web.Request) -> web.Response:
+    """Отдаёт метрики процесса в текстовом формате Prometheus."""
+    body = metrics.REGISTRY.render().encode()
+    return web.Response(body=body, headers={"Content-Type": strings.METRICS_CONTENT_TYPE})
+
+
+async def handle_healthz(_request: web.Request) -> web.Response:
+    """Проверяет, что БД доступна: 200 — доступна, 503 — нет."""
+    try:
+        await asyncio.to_thread(db.check_connection)
+    except Exception as err:
+        logger.error(strings.LOG_HEALTHCHECK_FAILED, err)
+        return web.Response(status=503, text=str(err))
+    return web.Response(text=strings.HEALTHZ_OK)
+
+
+def create_app() -> web.Application:
+    """Создаёт aiohttp-приложение с /metrics и /healthz."""
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    app.router.add_get("/healthz", handle_healthz)
+    return app
+
+
+async def monitor_event_loop_lag(interval: float = strings.EVENT_LOOP_LAG_INTERVAL) -> None:
+    """Раз в interval секунд замеряет, насколько позже запланированного проснулся цикл событий."""
+    while True:
+        started_at = time.perf_counter()
+        await asyncio.sleep(interval)
+        metrics.EVENT_LOOP_LAG.observe(max(time.perf_counter() - started_at - interval, 0.0))
+
+
+class MetricsServer:
+    """HTTP-сервер метрик и замер задержки цикла событий; работают в том же цикле, что и polling."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self._host = host
+        self._port = port
+        self._runner = web.AppRunner(create_app(), access_log=None)
+        self._lag_task: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        """Запускает HTTP-сервер и замер задержки цикла событий."""
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self._host, self._port).start()
+        self._lag_task = asyncio.create_task(monitor_event_loop_lag())
+        logger.info(strings.LOG_METRICS_SERVER_STARTED, self._host, self._port)
+
+    async def stop(self) -> None:
+        """Останавливает сервер и замер задержки."""
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            await asyncio.gather(self._lag_task, return_exceptions=True)
+        await self._runner.cleanup()
@@ -0,0 +1,238 @@
+"""Dispatcher and bot session middlewares for the Family Costs Bot."""
+
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.methods import Response, TelegramMethod
+from aiogram.types import TelegramObject, Update, User
+
+from . import auth, metrics, profiling, strings, tracing
+from .concurrency import UpdateLimiter
+from .exceptions import UpdateQueueFull
+from .rate_limit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class RequestContext:
+    """Контекст обработки одного обновления."""
+
+    user_id: int | None
+    started_at: float
+    trace_id: str
+
+    @property
+    def elapsed(self) -> float:
+        """Возвращает время (в секундах), прошедшее с начала обработки."""
+        return time.perf_counter() - self.started_at
+
+
+def get_event_user_id(data: dict[str, Any]) -> int | None:
+    """Извлекает ID пользователя, которого aiogram определил для обновления."""
+    user: User | None = data.get("event_from_user")
+    return user.id if user else None
+
+
+def may_write_expenses(event: TelegramObject) -> bool:
+    """Проверяет, может ли обновление записать расходы: это текстовое сообщение, а не команда."""
+    if not isinstance(event, Update) or event.message is None:
+        return False
+    text = event.message.text
+    return bool(text) and not text.startswith("/")
+
+
+async def answer_callback_silently(event: TelegramObject) -> None:
+    """Отвечает без текста на нажатие кнопки, чтобы у пользователя не крутился индикатор загрузки."""
+    if isinstance(event, Update) and event.callback_query is not None:
+        await event.callback_query.answer()
+
+
+async def answer_update(update: Update, text: str) -> None:
+    """Отвечает на сообщение или нажатие кнопки, из которых пришло обновление."""
+    if update.message is not None:
+        await update.message.answer(text)
+    elif update.callback_query is not None:
+        await update.callback_query.answer(text)
+
+
+class AuthMiddleware(BaseMiddleware):
+    """
+    Отклоняет обновления от пользователей вне списка разрешённых до выбора обработчика.
+    Отказ отправляется пользователю не чаще одного раза за reply_cooldown секунд;
+    на остальные сообщения бот не отвечает, а нажатия кнопок подтверждаются без текста.
+    """
+
+    def __init__(self, reply_cooldown: float = strings.ACCESS_DENIED_REPLY_COOLDOWN) -> None:
+        self._reply_cooldown = reply_cooldown
+        self._last_replies: dict[int | None, float] = {}
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        user_id = get_event_user_id(data)
+        if auth.is_user_allowed(user_id):
+            return await handler(event, data)
+
+        metrics.ACCESS_DENIED.inc()
+        now = time.monotonic()
+        if now - self._last_replies.get(user_id, float("-inf")) < self._reply_cooldown:
+            logger.debug(strings.LOG_ACCESS_DENIED_DROPPED, user_id)
+            await answer_callback_silently(event)
+            return None
+
+        if len(self._last_replies) >= strings.ACCESS_DENIED_TRACKED_USERS_MAX:
+            self._last_replies.clear()
+        self._last_replies[user_id] = now
+
+        logger.warning(strings.LOG_ACCESS_DENIED_UPDATE, user_id)
+        if isinstance(event, Update):
+            await answer_update(event, strings.ERROR_ACCESS_DENIED)
+        return None
+
+
+class RateLimitMiddleware(BaseMiddleware):
+    """
+    Ограничивает частоту обновлений от каждого пользователя.
+    Лишние обновления отбрасываются до выбора обработчика; предупреждение
+    отправляется один раз на серию отклонённых обновлений, остальные нажатия кнопок подтверждаются без текста.
+    """
+
+    def __init__(self, limiter: RateLimiter) -> None:
+        self.limiter = limiter
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        user_id = get_event_user_id(data)
+        if self.limiter.allow(user_id):
+            return await handler(event, data)
+
+        logger.debug(strings.LOG_RATE_LIMITED, user_id)
+        if self.limiter.should_warn(user_id) and isinstance(event, Update):
+            logger.warning(strings.LOG_RATE_LIMIT_WARNING, user_id)
+            await answer_update(event, strings.ERROR_RATE_LIMITED)
+        else:
+            await answer_callback_silently(event)
+        return None
+
+
+class ConcurrencyLimitMiddleware(BaseMiddleware):
+    """
+    Пропускает обновления через UpdateLimiter: ограничивает параллельную обработку,
+    сохраняет порядок обновлений каждого пользователя и отклоняет обновления
+    с вежливым ответом, когда очередь переполнена. Пока пишутся расходы пользователя,
+    вперёд проходят только его следующие текстовые сообщения.
+    """
+
+    def __init__(self, limiter: UpdateLimiter) -> None:
+        self.limiter = limiter
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        user_id = get_event_user_id(data)
+        try:
+            # Span включает ожидание в очереди: разница с вложенным span'ом обработчика — время ожидания
+            with tracing.span("middleware.concurrency"):
+                return await self.limiter.run(user_id, lambda: handler(event, data), may_write_expenses(event))
+        except UpdateQueueFull:
+            logger.warning(strings.LOG_UPDATE_SHED, user_id)
+            if isinstance(event, Update):
+                await answer_update(event, strings.ERROR_OVERLOADED)
+            return None
+
+
+class TracingMiddleware(BaseMiddleware):
+    """
+    Начинает трассу обновления, если оно попало в выборку. Регистрируется первым,
+    чтобы трасса включала все остальные middleware.
+    """
+
+    def __init__(self, tracer: tracing.Tracer) -> None:
+        self.tracer = tracer
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        event_type = event.event_type if isinstance(event, Update) else type(event).__name__
+        with self.tracer.start_trace("update", update_type=event_type, user_id=get_event_user_id(data)):
+            return await handler(event, data)
+
+
+class ProfilingMiddleware(BaseMiddleware):
+    """
+    Считает обновления, обработанные во время сеанса профилирования, чтобы завершить его после заданного числа.
+    Пока профилирование выключено, только вызывает обработчик.
+    """
+
+    def __init__(self, profiler: profiling.UpdateProfiler) -> None:
+        self.profiler = profiler
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        if not self.profiler.active:
+            # Сама команда /profile, запустившая сеанс, в счёт не идёт
+            return await handler(event, data)
+        try:
+            return await handler(event, data)
+        finally:
+            self.profiler.count_update()
+
+
+class RequestContextMiddleware(BaseMiddleware):
+    """Создаёт RequestContext для обновления и логирует время его обработки."""
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        context = RequestContext(
+            user_id=get_event_user_id(data),
+            started_at=time.perf_counter(),
+            trace_id=tracing.current_trace_id() or os.urandom(8).hex(),
+        )
+        data["request_context"] = context
+
+        try:
+            return await handler(event, data)
+        finally:
+            logger.debug(strings.LOG_UPDATE_HANDLED, context.trace_id, context.user_id, context.elapsed * 1000)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Внутренний middleware: замеряет время выполнения обработчика, считает ошибки
+    и записывает span handler.<имя> в трассу обновления.
+    Регистрируется на наблюдателях message и callback_query, где уже известен выбранный обработчик.
+    """
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        handler_object: HandlerObject | None = data.get("handler")
+        name = getattr(handler_object.callback, "__name__", "unknown") if handler_object else "unknown"
+        started_at = time.perf_counter()
+        try:
+            with tracing.span(f"handler.{name}"):
+                return await handler(event, data)
+        except Exception:
+            metrics.HANDLER_ERRORS.inc(handler=name)
+            raise
+        finally:
+            metrics.HANDLER_DURATION.observe(time.perf_counter() - started_at, handler=name)
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """
+    Middleware сессии бота: замеряет время запросов к Bot API, считает неудачные
+    и записывает span api.<метод> в трассу обновления.
+    Регистрируется после SendSchedulerMiddleware, чтобы не учитывать ожидание в очереди отправки.
+    """
+
+    async def __call__(self, make_request: NextRequestMiddlewareType, bot: Bot, method: TelegramMethod) -> Response:
+        name = type(method).__name__
+        started_at = time.perf_counter()
+        try:
+            with tracing.span(f"api.{name}"):
+                return await make_request(bot, method)
+        except Exception:
+            metrics.API_REQUEST_ERRORS.inc(method=name)
+            raise
+        finally:
+            metrics.API_REQUEST_DURATION.observe(time.perf_counter() - started_at, method=name)
@@ -1,8 +1,10 @@
 """Expense parsing logic for the Family Costs Bot."""
 
 import logging
+from collections.abc import Iterator
+from dataclasses import dataclass
 
-from . import strings
+from . import strings, tracing
 from .exceptions import ParsingError
 
 logger = logging.getLogger(__name__)
@@ -15,67 +17,97 @@ def parse_expense(message_text: str) -> tuple[str, float] | None:
     """
     text = message_text.strip()
     if not text:
-        logger.warning(strings.LOG_SKIPPING_EMPTY_PART.format(text=text))
+        logger.warning(strings.LOG_SKIPPING_EMPTY_PART, text)
         return None
 
     parts = text.rsplit(maxsplit=1)
     if len(parts) != 2:
-        logger.warning(strings.LOG_SKIPPING_INVALID_PART.format(text=text))
+        logger.warning(strings.LOG_SKIPPING_INVALID_PART, text)
         raise ParsingError(strings.PARSING_ERROR_INVALID_FORMAT.format(text=text))
 
-    description_raw, amount_raw = parts[0].strip(), parts[1].strip()
-    if not description_raw or not amount_raw:
-        logger.warning(strings.LOG_SKIPPING_INVALID_PART.format(text=text))
-        raise ParsingError(strings.PARSING_ERROR_INVALID_FORMAT.format(text=text))
+    # rsplit по пробельным символам обрезанного текста даёт непустые части без пробелов по краям
+    description_raw, amount_raw = parts
 
     normalized = amount_raw.replace(",", ".")
     try:
         amount = float(normalized)
     except Exception as err:
-        logger.error(strings.LOG_SKIPPING_INVALID_PART.format(text=text))
+        logger.error(strings.LOG_SKIPPING_INVALID_PART, text)
         err_msg = strings.PARSING_ERROR_INVALID_AMOUNT.format(amount=amount_raw, error=err)
         raise ParsingError(strings.ERROR_PROCESSING_TEMPLATE.format(err=err_msg))
 
     return description_raw, amount
 
 
-def parse_multiple_expenses(message_text: str) -> tuple[list[tuple[str, float]], list[str]]:
+@dataclass(slots=True)
+class ParsedEntry:
     """
-    Парсит сообщение с несколькими сообщениями, разделёнными ';' или новой строкой.
-    Возвращает список кортежей (описание, сумма) или пустой список, если ничего не найдено.
+    Запись из сообщения: номер строки (с 1), смещение начала записи в тексте, текст без пробелов по краям
+    и результат — расход (описание, сумма) или текст ошибки.
     """
-    costs = []  # Успешно распарсенные расходы
-    failed_costs = []  # Неудачно распарсенные расходы
 
-    # Если нет разделителей, парсим как один расход
-    if not any(separator in message_text for separator in strings.COSTS_SEPARATORS):
+    line: int
+    offset: int
+    text: str
+    cost: tuple[str, float] | None = None
+    error: str | None = None
+
+
+def _split_entries(message_text: str) -> list[str]:
+    """
+    Делит сообщение на записи, разделённые ';' и/или переводом строки, в том числе вперемешку.
+    Записи возвращаются как есть, с пробелами по краям и пустыми.
+    """
+    # Разделители равноправны и оба длиной в один символ: ';' заменяется переводом строки,
+    # текст делится одним split без цикла по записям, а смещения записей при замене не меняются
+    line_separator = strings.COSTS_LINE_SEPARATOR
+    return message_text.replace(strings.COSTS_SEPARATOR, line_separator).split(line_separator)
+
+
+def iter_expenses(message_text: str) -> Iterator[ParsedEntry]:
+    """
+    Разбирает записи сообщения по мере чтения и возвращает их вместе с номером строки и смещением в тексте;
+    пустые записи пропускаются.
+    """
+    line_separator = strings.COSTS_LINE_SEPARATOR
+    line, offset = 0, 0
+    for part in _split_entries(message_text):
+        part_offset = offset
+        offset += len(part) + 1
+        # Перед каждой записью, кроме первой, стоит её разделитель: перевод строки начинает новую строку
+        if not part_offset or message_text[part_offset - 1] == line_separator:
+            line += 1
+        text = part.strip()
+        if not text:
+            logger.warning(strings.LOG_SKIPPING_EMPTY_PART, text)
+            continue
         try:
-            cost = parse_expense(message_text)
-            return ([cost], []) if cost else ([], [])
+            yield ParsedEntry(line, part_offset, text, cost=parse_expense(text))
         except ParsingError as err:
-            return ([], [str(err)])
+            logger.error(strings.LOG_SKIPPING_INVALID_LINE_ERROR, line, text, err)
+            yield ParsedEntry(line, part_offset, text, error=str(err))
 
-    # Разделяем по ; или \n
-    parts = []
-    for separator in strings.COSTS_SEPARATORS:
-        if separator in message_text:
-            parts = [part.strip() for part in message_text.split(separator)]
-            continue
 
-    # Парсим каждую часть
-    for part in parts:
-        if not part:
-            logger.warning(strings.LOG_SKIPPING_EMPTY_PART.format(text=part))
-            continue
+@tracing.traced("parse_multiple_expenses")
+def parse_multiple_expenses(message_text: str) -> tuple[list[tuple[str, float]], list[str]]:
+    """
+    Парсит сообщение с несколькими расходами, разделёнными ';' и/или новой строкой.
+    Возвращает распарсенные расходы (описание, сумма) и тексты ошибок для нераспознанных записей.
+    Делит текст так же, как iter_expenses, но без номеров строк и объекта на запись: это горячий путь обработки
+    сообщений.
+    """
+    costs = []  # Успешно распарсенные расходы
+    failed_costs = []  # Неудачно распарсенные расходы
 
+    for part in _split_entries(message_text):
+        text = part.strip()
+        if not text:
+            logger.warning(strings.LOG_SKIPPING_EMPTY_PART, text)
+            continue
         try:
-            parsed = parse_expense(part)
-            if parsed:
-                costs.append(parsed)
-            else:
-                failed_costs.append(part)
+            costs.append(parse_expense(text))
         except ParsingError as err:
-            logger.error(strings.LOG_SKIPPING_INVALID_PART_ERROR.format(part=part, error=err))
+            logger.error(strings.LOG_SKIPPING_INVALID_PART_ERROR, text, err)
             failed_costs.append(str(err))
 
     return costs, failed_costs
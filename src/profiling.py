@@ -0,0 +1,181 @@
+"""On-demand cProfile sessions over live update handling."""
+
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from aiogram import Bot
+from aiogram.types import FSInputFile
+
+from . import config, strings
+from .send_scheduler import background_priority
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProfileResult:
+    """Итог сеанса профилирования: файлы статистики, число обновлений и длительность."""
+
+    stats_path: str
+    text_path: str
+    updates: int
+    duration: float
+
+
+@dataclass
+class _Session:
+    profile: cProfile.Profile
+    started_at: float
+    remaining: int | None
+    deadline: asyncio.TimerHandle | None
+    bot: Bot | None
+    chat_id: int | None
+    updates: int = 0
+
+
+class UpdateProfiler:
+    """
+    Профилирует поток цикла событий, пока не будет обработано заданное число обновлений или не истечёт время.
+    cProfile видит только поток, в котором включён, поэтому работа в asyncio.to_thread (запросы к БД)
+    попадает в профиль как ожидание. Пока профилирование выключено, middleware проверяет один атрибут.
+    """
+
+    def __init__(self, output_dir: str | None = None) -> None:
+        self._output_dir = output_dir
+        self._session: _Session | None = None
+        # Цикл событий держит задачи только по слабой ссылке: без этого множества запись могла бы не завершиться
+        self._finishing: set[asyncio.Task[ProfileResult | None]] = set()
+
+    @property
+    def active(self) -> bool:
+        """Идёт ли сеанс профилирования."""
+        return self._session is not None
+
+    def start(
+        self,
+        updates: int | None = None,
+        seconds: float | None = None,
+        bot: Bot | None = None,
+        chat_id: int | None = None,
+    ) -> bool:
+        """
+        Включает профилирование на updates обновлений и/или seconds секунд (что наступит раньше).
+        Если заданы bot и chat_id, результат отправляется в этот чат документом.
+        Возвращает False, если сеанс уже идёт. Вызывается из потока цикла событий.
+        """
+        if self._session is not None:
+            return False
+
+        deadline = asyncio.get_running_loop().call_later(seconds, self.stop) if seconds else None
+        profile = cProfile.Profile()
+        self._session = _Session(profile, time.perf_counter(), updates, deadline, bot, chat_id)
+        profile.enable()
+        logger.info(strings.LOG_PROFILING_STARTED, chat_id, updates, seconds)
+        return True
+
+    def count_update(self) -> None:
+        """Отмечает обработанное обновление и завершает сеанс, когда их набралось заданное число."""
+        session = self._session
+        if session is None:
+            return
+        session.updates += 1
+        if session.remaining is not None:
+            session.remaining -= 1
+            if session.remaining <= 0:
+                self.stop()
+
+    def stop(self) -> "asyncio.Task[ProfileResult | None] | None":
+        """
+        Завершает сеанс: запись статистики и отправка идут в фоновой задаче, которая возвращается.
+        Задача возвращает None, если статистику не удалось записать (ошибка логируется).
+        """
+        session = self._session
+        if session is None:
+            return None
+        session.profile.disable()
+        self._session = None
+        if session.deadline is not None:
+            session.deadline.cancel()
+        task = asyncio.get_running_loop().create_task(self._finish(session, time.perf_counter() - session.started_at))
+        self._finishing.add(task)
+        task.add_done_callback(self._finishing.discard)
+        return task
+
+    async def _finish(self, session: _Session, duration: float) -> ProfileResult | None:
+        output_dir = self._output_dir or config.get_profile_dir()
+        try:
+            result = await asyncio.to_thread(write_profile, session.profile, output_dir, session.updates, duration)
+        except Exception as err:
+            logger.exception(strings.LOG_PROFILING_SAVE_FAILED, output_dir, err)
+            return None
+        logger.info(strings.LOG_PROFILING_SAVED, result.updates, result.duration, result.stats_path)
+
+        if session.bot is not None and session.chat_id is not None:
+            caption = strings.PROFILE_DONE_CAPTION_TEMPLATE.format(
+                updates=result.updates, seconds=result.duration, path=result.stats_path
+            )
+            try:
+                # Сводка не ответ на сообщение: она не должна задерживать ответы пользователям
+                with background_priority():
+                    await session.bot.send_document(session.chat_id, FSInputFile(result.text_path), caption=caption)
+            except Exception as err:
+                logger.error(strings.LOG_PROFILING_SEND_FAILED, session.chat_id, err)
+        return result
+
+
+def write_profile(profile: cProfile.Profile, output_dir: str, updates: int, duration: float) -> ProfileResult:
+    """Сохраняет статистику в .prof (для pstats/snakeviz) и текстовую сводку в .txt рядом."""
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, f"profile-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}")
+    stats_path, text_path = f"{base}.prof", f"{base}.txt"
+
+    stream = io.StringIO()
+    stream.write(strings.PROFILE_SUMMARY_HEADER_TEMPLATE.format(updates=updates, seconds=duration))
+    stats = pstats.Stats(profile, stream=stream)
+    stats.dump_stats(stats_path)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(strings.PROFILE_TOP_FUNCTIONS)
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(strings.PROFILE_TOP_FUNCTIONS)
+    with open(text_path, "w", encoding="utf-8") as file:
+        file.write(stream.getvalue())
+    return ProfileResult(stats_path, text_path, updates, duration)
+
+
+def parse_profile_args(args: str | None) -> tuple[int | None, float | None] | None:
+    """
+    Разбирает аргумент /profile: пусто — PROFILE_DEFAULT_UPDATES обновлений, "N" — N обновлений,
+    "Ns" — N секунд. Возвращает (обновления, секунды) или None, если аргумент некорректен.
+    """
+    raw = (args or "").strip().lower()
+    if not raw:
+        return strings.PROFILE_DEFAULT_UPDATES, None
+    try:
+        if raw.endswith("s"):
+            seconds = float(raw[:-1])
+            return (None, seconds) if 0 < seconds <= strings.PROFILE_MAX_SECONDS else None
+        updates = int(raw)
+    except ValueError:
+        return None
+    return (updates, None) if 0 < updates <= strings.PROFILE_MAX_UPDATES else None
+
+
+_profiler = UpdateProfiler()
+
+
+def get_profiler() -> UpdateProfiler:
+    """Возвращает профилировщик процесса."""
+    return _profiler
+
+
+def toggle_from_signal() -> None:
+    """Обработчик SIGUSR1: запускает профилирование на PROFILE_SIGNAL_SECONDS секунд или завершает идущее."""
+    if _profiler.active:
+        _profiler.stop()
+    else:
+        _profiler.start(seconds=strings.PROFILE_SIGNAL_SECONDS)
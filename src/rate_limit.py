@@ -0,0 +1,121 @@
+"""Per-user token-bucket rate limiting for the Family Costs Bot."""
+
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+
+class TokenBucket:
+    """Корзина токенов: до capacity токенов, пополняется со скоростью rate токенов в секунду."""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated_at")
+
+    def __init__(self, capacity: float, rate: float, now: float) -> None:
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated_at = now
+
+    def refill(self, now: float) -> None:
+        """Пополняет корзину за время, прошедшее с последнего обращения."""
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def consume(self, now: float, amount: float = 1.0) -> bool:
+        """Забирает amount токенов, если они есть. Возвращает True при успехе."""
+        self.refill(now)
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+    def time_until(self, now: float, amount: float = 1.0) -> float:
+        """Возвращает, через сколько секунд в корзине будет amount токенов."""
+        self.refill(now)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def is_full(self, now: float) -> bool:
+        """Проверяет, пополнилась ли корзина полностью."""
+        self.refill(now)
+        return self.tokens >= self.capacity
+
+
+@dataclass
+class RateLimitStats:
+    """Счётчики ограничителя частоты запросов."""
+
+    allowed: int = 0
+    throttled: int = 0
+    warnings_sent: int = 0
+    tracked_users: int = 0
+
+
+class RateLimiter:
+    """
+    Ограничитель частоты запросов с отдельной корзиной токенов на каждого пользователя.
+    Корзины хранятся в памяти; полностью пополненные корзины удаляются,
+    когда их число превышает max_tracked_users.
+    """
+
+    def __init__(
+        self,
+        burst: float,
+        rate: float,
+        max_tracked_users: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.burst = burst
+        self.rate = rate
+        self._max_tracked_users = max_tracked_users
+        self._clock = clock
+        self._buckets: dict[int | None, TokenBucket] = {}
+        self._warned: set[int | None] = set()
+        self._stats = RateLimitStats()
+
+    @property
+    def stats(self) -> RateLimitStats:
+        """Возвращает снимок счётчиков."""
+        return RateLimitStats(
+            allowed=self._stats.allowed,
+            throttled=self._stats.throttled,
+            warnings_sent=self._stats.warnings_sent,
+            tracked_users=len(self._buckets),
+        )
+
+    def allow(self, user_id: int | None) -> bool:
+        """Списывает токен пользователя. Возвращает False, если лимит исчерпан."""
+        now = self._clock()
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            if len(self._buckets) >= self._max_tracked_users:
+                self._prune(now)
+            bucket = self._buckets[user_id] = TokenBucket(self.burst, self.rate, now)
+
+        if bucket.consume(now):
+            self._stats.allowed += 1
+            self._warned.discard(user_id)
+            return True
+
+        self._stats.throttled += 1
+        return False
+
+    def should_warn(self, user_id: int | None) -> bool:
+        """
+        Возвращает True только для первого отклонённого запроса в серии,
+        чтобы предупреждение отправлялось один раз, а не на каждое сообщение.
+        """
+        if user_id in self._warned:
+            return False
+        self._warned.add(user_id)
+        self._stats.warnings_sent += 1
+        return True
+
+    def _prune(self, now: float) -> None:
+        """Удаляет полностью пополненные корзины: они ничем не отличаются от новых."""
+        for user_id in [user_id for user_id, bucket in self._buckets.items() if bucket.is_full(now)]:
+            del self._buckets[user_id]
+            self._warned.discard(user_id)
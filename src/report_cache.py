@@ -0,0 +1,113 @@
+"""In-process cache of rendered month reports with per-month data versions."""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from . import metrics, strings
+
+ReportKey = tuple[int, int, str]
+
+# Псевдомесяц для значений, зависящих от всех месяцев (например, списка месяцев с расходами)
+ALL_MONTHS = (0, 0)
+
+
+@dataclass
+class ReportCacheStats:
+    """Счётчики кэша отчётов."""
+
+    hits: int = 0
+    misses: int = 0
+    entries: int = 0
+
+
+class ReportCache:
+    """
+    LRU-кэш отчётов (текста или сводок) по ключу (год, месяц, вид).
+    Для каждого месяца хранится версия данных, которая увеличивается при каждом
+    изменении расходов за этот месяц; запись с устаревшей версией не возвращается.
+    Версия ALL_MONTHS увеличивается при изменении любого месяца.
+
+    В режиме нескольких процессов к кэшу подключается общий счётчик поколений:
+    изменение в любом процессе увеличивает его и делает устаревшими все записи
+    в кэшах остальных процессов.
+    """
+
+    def __init__(self, max_entries: int = strings.REPORT_CACHE_MAX_ENTRIES) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[ReportKey, tuple[int, Any]] = OrderedDict()
+        self._versions: dict[tuple[int, int], int] = {}
+        self._stats = ReportCacheStats()
+        self._shared_generation: Any | None = None
+
+    @property
+    def stats(self) -> ReportCacheStats:
+        """Возвращает снимок счётчиков."""
+        return ReportCacheStats(hits=self._stats.hits, misses=self._stats.misses, entries=len(self._entries))
+
+    def attach_shared_generation(self, generation: Any | None) -> None:
+        """Подключает общий для процессов счётчик поколений (multiprocessing.Value)."""
+        self._shared_generation = generation
+
+    def get_version(self, year: int, month: int) -> int:
+        """
+        Возвращает текущую версию данных за месяц.
+        Оба слагаемых только растут, поэтому изменение любого из них меняет версию.
+        """
+        version = self._versions.get((year, month), 0)
+        if self._shared_generation is not None:
+            version += self._shared_generation.value
+        return version
+
+    def bump_version(self, year: int, month: int) -> None:
+        """Увеличивает версию данных за месяц, делая закэшированные отчёты за него устаревшими."""
+        self._versions[(year, month)] = self._versions.get((year, month), 0) + 1
+        self._versions[ALL_MONTHS] = self._versions.get(ALL_MONTHS, 0) + 1
+        if self._shared_generation is not None:
+            with self._shared_generation.get_lock():
+                self._shared_generation.value += 1
+
+    def get(self, key: ReportKey) -> Any | None:
+        """Возвращает закэшированный отчёт, если он есть и построен по актуальной версии данных."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != self.get_version(key[0], key[1]):
+            self._stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._stats.hits += 1
+        return entry[1]
+
+    def put(self, key: ReportKey, value: Any, version: int) -> None:
+        """
+        Сохраняет отчёт, построенный по версии данных version.
+        Версию нужно получить до чтения из БД: если данные изменились во время
+        построения, запись сразу окажется устаревшей. Запись по более новой версии,
+        положенную построением, которое закончилось раньше, такой отчёт не вытесняет.
+        """
+        if (entry := self._entries.get(key)) is not None and entry[0] > version:
+            return
+        self._entries[key] = (version, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Очищает кэш и счётчики."""
+        self._entries.clear()
+        self._versions.clear()
+        self._stats = ReportCacheStats()
+
+
+_cache = ReportCache()
+metrics.REGISTRY.register_stats("bot_report_cache", lambda: _cache.stats)
+
+
+def get_report_cache() -> ReportCache:
+    """Возвращает общий кэш отчётов процесса."""
+    return _cache
+
+
+def bump_month_version(year: int, month: int) -> None:
+    """Помечает отчёты за месяц как устаревшие после изменения расходов."""
+    _cache.bump_version(year, month)
@@ -0,0 +1,163 @@
+"""Month report building on top of the database and the report cache."""
+
+import asyncio
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from . import db, expense_display, metrics, strings, tracing
+from .callback_data import PageCursor, ReportPageRequest
+from .report_cache import ALL_MONTHS, ReportKey, get_report_cache
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+VIEW_BY_USER = "by_user"
+VIEW_FLAT = "flat"
+VIEW_SUMMARY = "summary"
+VIEW_MONTHS = "months"
+
+_in_flight: SingleFlight[Any] = SingleFlight()
+metrics.REGISTRY.register_stats("bot_report_single_flight", lambda: _in_flight.stats)
+_prefetch_tasks: dict[int | None, asyncio.Task] = {}
+
+
+@dataclass
+class ReportPage:
+    """Страница отчёта и запросы соседних страниц (None, если страницы нет)."""
+
+    text: str
+    prev_request: ReportPageRequest | None
+    next_request: ReportPageRequest | None
+
+
+def get_in_flight() -> SingleFlight[Any]:
+    """Возвращает общий объект дедупликации построения отчётов."""
+    return _in_flight
+
+
+@tracing.traced("render.month_report")
+def render_month_report(year: int, month: int, view: str = VIEW_BY_USER) -> str:
+    """Читает расходы за месяц из БД и строит текст отчёта без кэша."""
+    expenses = db.get_expenses_by_month(year, month)
+    return expense_display.format_expenses_for_display(expenses, year, month, show_by_user=view == VIEW_BY_USER)
+
+
+async def get_month_report(year: int, month: int, view: str = VIEW_BY_USER) -> str:
+    """
+    Возвращает текст отчёта за месяц, используя кэш, если данные не менялись.
+    Одновременные запросы одного отчёта ждут одно общее обращение к БД.
+    """
+    return await _get_cached((year, month, view), lambda: render_month_report(year, month, view))
+
+
+async def get_month_summary(year: int, month: int) -> db.MonthSummary:
+    """Возвращает количество и сумму расходов за месяц, используя кэш."""
+    return await _get_cached((year, month, VIEW_SUMMARY), lambda: db.get_month_summary(year, month))
+
+
+async def get_months_with_expenses() -> list[tuple[int, int]]:
+    """Возвращает месяцы, за которые есть расходы (от новых к старым), используя кэш."""
+    return await _get_cached((*ALL_MONTHS, VIEW_MONTHS), db.get_months_with_expenses)
+
+
+async def get_month_report_page(request: ReportPageRequest) -> ReportPage:
+    """Строит одну страницу отчёта за месяц, читая из БД только её строки."""
+    size = strings.REPORT_PAGE_SIZE
+    summary = await get_month_summary(request.year, request.month)
+    cursor = (request.cursor.created_at, request.cursor.expense_id) if request.cursor else None
+    expenses = await asyncio.to_thread(
+        db.get_expenses_page, request.year, request.month, size + 1, cursor, request.older
+    )
+
+    # Лишняя строка показывает, есть ли ещё страница в направлении листания
+    has_more = len(expenses) > size
+    if request.older:
+        expenses = expenses[:size]
+        has_prev, has_next = request.cursor is not None, has_more
+    else:
+        expenses = expenses[-size:]
+        has_prev, has_next = has_more, True
+
+    with tracing.span("render.report_page"):
+        text = expense_display.format_expenses_page(expenses, request.year, request.month, request.page, summary)
+    if not expenses:
+        return ReportPage(text=text, prev_request=None, next_request=None)
+
+    first, last = expenses[0], expenses[-1]
+    prev_request = next_request = None
+    if has_prev:
+        prev_request = ReportPageRequest(
+            year=request.year,
+            month=request.month,
+            page=max(request.page - 1, 1),
+            cursor=PageCursor(first.created_at, first.id),
+            older=False,
+        )
+    if has_next:
+        next_request = ReportPageRequest(
+            year=request.year,
+            month=request.month,
+            page=request.page + 1,
+            cursor=PageCursor(last.created_at, last.id),
+            older=True,
+        )
+    return ReportPage(text=text, prev_request=prev_request, next_request=next_request)
+
+
+async def warm_month_reports(months: list[tuple[int, int]]) -> None:
+    """Заранее строит сводки и отчёты за месяцы, чтобы выбор месяца обслуживался из кэша."""
+    for year, month in months:
+        try:
+            summary = await get_month_summary(year, month)
+            if summary.count <= strings.REPORT_PAGE_SIZE:
+                await get_month_report(year, month)
+        except Exception as err:
+            logger.warning(strings.LOG_REPORT_PREFETCH_FAILED, year, month, err)
+
+
+def start_prefetch(user_id: int | None, months: list[tuple[int, int]]) -> asyncio.Task:
+    """Запускает фоновый прогрев отчётов для пользователя, отменяя его предыдущий прогрев."""
+    cancel_prefetch(user_id)
+    task = asyncio.create_task(warm_month_reports(months))
+    _prefetch_tasks[user_id] = task
+    task.add_done_callback(lambda done: _forget_prefetch(user_id, done))
+    return task
+
+
+def cancel_prefetch(user_id: int | None) -> bool:
+    """
+    Отменяет фоновый прогрев пользователя, если он ещё идёт.
+    Уже начатое общее построение отчёта продолжается: его могут ждать другие запросы.
+    """
+    task = _prefetch_tasks.pop(user_id, None)
+    if task is None or task.done():
+        return False
+    task.cancel()
+    return True
+
+
+def _forget_prefetch(user_id: int | None, task: asyncio.Task) -> None:
+    if _prefetch_tasks.get(user_id) is task:
+        del _prefetch_tasks[user_id]
+
+
+async def _get_cached(key: ReportKey, build: Callable[[], Any]) -> Any:
+    """Возвращает значение из кэша или строит его один раз для всех одновременных запросов."""
+    cache = get_report_cache()
+    if (value := cache.get(key)) is not None:
+        logger.debug(strings.LOG_REPORT_CACHE_HIT, key[0], key[1], key[2])
+        return value
+
+    # Версия входит в ключ: запрос, пришедший после вставки, не присоединится к построению по старым данным
+    version = cache.get_version(key[0], key[1])
+    return await _in_flight.do((*key, version), lambda: _build_and_cache(key, build, version))
+
+
+async def _build_and_cache(key: ReportKey, build: Callable[[], Any], version: int) -> Any:
+    """Строит значение по версии данных version в потоке, чтобы не блокировать event loop, и кладёт его в кэш."""
+    cache = get_report_cache()
+    value = await asyncio.to_thread(build)
+    cache.put(key, value, version)
+    return value
@@ -0,0 +1,233 @@
+"""Rate-aware scheduler for outbound Bot API requests."""
+
+import asyncio
+import bisect
+import itertools
+import logging
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+
+from . import strings
+from .rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class SendPriority(IntEnum):
+    """Приоритет исходящего запроса: чем меньше значение, тем раньше он отправляется."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_send_priority: ContextVar[SendPriority] = ContextVar("send_priority", default=SendPriority.INTERACTIVE)
+
+
+@contextmanager
+def background_priority() -> Iterator[None]:
+    """Помечает исходящие запросы внутри блока как фоновые."""
+    token = _send_priority.set(SendPriority.BACKGROUND)
+    try:
+        yield
+    finally:
+        _send_priority.reset(token)
+
+
+@dataclass
+class SendSchedulerStats:
+    """Счётчики планировщика исходящих запросов."""
+
+    sent: int = 0
+    retries: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def avg_wait(self) -> float:
+        """Возвращает среднее время ожидания отправки в секундах."""
+        return self.total_wait / self.sent if self.sent else 0.0
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    chat_id: Any = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+class SendScheduler:
+    """
+    Выдаёт разрешения на отправку с учётом общего лимита бота и лимита на каждый чат.
+    Ожидающие запросы обслуживаются по приоритету, а внутри приоритета — по очереди;
+    запрос в чат, чей лимит исчерпан, не задерживает запросы в другие чаты.
+    Скорости должны быть положительными; корзины вмещают не меньше одного запроса, иначе отправка встала бы.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = strings.OUTBOUND_GLOBAL_RATE_DEFAULT,
+        chat_rate: float = strings.OUTBOUND_CHAT_RATE_DEFAULT,
+        chat_burst: float = strings.OUTBOUND_CHAT_BURST_DEFAULT,
+        max_tracked_chats: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if global_rate <= 0 or chat_rate <= 0:
+            raise ValueError(strings.ERROR_SEND_RATE_NOT_POSITIVE.format(global_rate=global_rate, chat_rate=chat_rate))
+        self._clock = clock
+        self._global = TokenBucket(max(global_rate, 1.0), global_rate, clock())
+        self._chat_rate = chat_rate
+        self._chat_burst = max(chat_burst, 1.0)
+        self._max_tracked_chats = max_tracked_chats
+        self._chats: dict[Any, TokenBucket] = {}
+        self._paused_until: dict[Any, float] = {}
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._changed = asyncio.Event()
+        self._worker: asyncio.Task | None = None
+        self._stats = SendSchedulerStats()
+
+    @property
+    def stats(self) -> SendSchedulerStats:
+        """Возвращает снимок счётчиков."""
+        return SendSchedulerStats(
+            sent=self._stats.sent,
+            retries=self._stats.retries,
+            queue_depth=len(self._waiters),
+            max_queue_depth=self._stats.max_queue_depth,
+            total_wait=self._stats.total_wait,
+            max_wait=self._stats.max_wait,
+        )
+
+    async def acquire(self, chat_id: Any, priority: SendPriority | None = None) -> float:
+        """Ждёт разрешения на отправку в чат и возвращает время ожидания в секундах."""
+        if priority is None:
+            priority = _send_priority.get()
+
+        now = self._clock()
+        waiter = _Waiter(int(priority), next(self._seq), chat_id, asyncio.get_running_loop().create_future(), now)
+        bisect.insort(self._waiters, waiter)
+        self._stats.max_queue_depth = max(self._stats.max_queue_depth, len(self._waiters))
+
+        self._changed.set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+        waited = self._clock() - now
+        self._stats.sent += 1
+        self._stats.total_wait += waited
+        self._stats.max_wait = max(self._stats.max_wait, waited)
+        return waited
+
+    def pause_chat(self, chat_id: Any, seconds: float) -> None:
+        """Приостанавливает отправку в чат, например, после ответа 429 с retry_after."""
+        self._paused_until[chat_id] = max(self._paused_until.get(chat_id, 0.0), self._clock() + seconds)
+        self._stats.retries += 1
+        self._changed.set()
+
+    def _chat_bucket(self, chat_id: Any, now: float) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self._max_tracked_chats:
+                for key in [key for key, value in self._chats.items() if value.is_full(now)]:
+                    del self._chats[key]
+            bucket = self._chats[chat_id] = TokenBucket(self._chat_burst, self._chat_rate, now)
+        return bucket
+
+    def _chat_delay(self, chat_id: Any, now: float) -> float:
+        paused = self._paused_until.get(chat_id, 0.0) - now
+        if paused <= 0 and chat_id in self._paused_until:
+            del self._paused_until[chat_id]
+        return max(paused, self._chat_bucket(chat_id, now).time_until(now))
+
+    async def _run(self) -> None:
+        try:
+            await self._serve()
+        except Exception as err:
+            # Ожидающие получают ошибку цикла, а не ждут вечно; следующий acquire запустит цикл заново
+            logger.exception(strings.LOG_SEND_SCHEDULER_FAILED, err)
+            waiters, self._waiters = self._waiters, []
+            for waiter in waiters:
+                if not waiter.future.done():
+                    waiter.future.set_exception(err)
+
+    async def _serve(self) -> None:
+        while self._waiters:
+            self._changed.clear()
+            now = self._clock()
+            delay = self._global.time_until(now)
+
+            if delay <= 0:
+                delay = float("inf")
+                for index, waiter in enumerate(self._waiters):
+                    if waiter.future.done():
+                        continue
+                    chat_delay = self._chat_delay(waiter.chat_id, now)
+                    if chat_delay <= 0:
+                        del self._waiters[index]
+                        self._global.consume(now)
+                        self._chats[waiter.chat_id].consume(now)
+                        waiter.future.set_result(None)
+                        delay = 0.0
+                        break
+                    delay = min(delay, chat_delay)
+                self._waiters = [waiter for waiter in self._waiters if not waiter.future.done()]
+
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=None if delay == float("inf") else delay)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(0)
+
+
+class SendSchedulerMiddleware(BaseRequestMiddleware):
+    """
+    Middleware сессии бота: пропускает запросы с chat_id через SendScheduler
+    и повторяет их после ответа 429, выдерживая retry_after.
+    """
+
+    def __init__(self, scheduler: SendScheduler, max_retries: int = strings.OUTBOUND_MAX_RETRIES) -> None:
+        self.scheduler = scheduler
+        self._max_retries = max_retries
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ) -> Response:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        for attempt in itertools.count():
+            await self.scheduler.acquire(chat_id)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as err:
+                if attempt >= self._max_retries:
+                    raise
+                logger.warning(strings.LOG_OUTBOUND_RETRY_AFTER, type(method).__name__, chat_id, err.retry_after)
+                self.scheduler.pause_chat(chat_id, err.retry_after)
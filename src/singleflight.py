@@ -0,0 +1,57 @@
+"""Single-flight deduplication of concurrent identical async computations."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    """Счётчики дедупликации."""
+
+    started: int = 0
+    shared: int = 0
+    in_flight: int = 0
+
+
+class SingleFlight(Generic[T]):
+    """
+    Объединяет одновременные вычисления с одинаковым ключом: первое обращение
+    запускает вычисление, остальные ждут его результат (или исключение).
+    Отмена одного из ожидающих не отменяет общее вычисление.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: dict[Hashable, asyncio.Task[T]] = {}
+        self._stats = SingleFlightStats()
+
+    @property
+    def stats(self) -> SingleFlightStats:
+        """Возвращает снимок счётчиков."""
+        return SingleFlightStats(started=self._stats.started, shared=self._stats.shared, in_flight=len(self._tasks))
+
+    def is_in_flight(self, key: Hashable) -> bool:
+        """Проверяет, выполняется ли сейчас вычисление для ключа."""
+        return key in self._tasks
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """Возвращает результат func(), разделяя его между одновременными вызовами с тем же ключом."""
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            self._stats.started += 1
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self._stats.shared += 1
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task[T]) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # помечаем исключение полученным, даже если все ожидающие отменены
@@ -0,0 +1,69 @@
+"""Startup phase timings, enabled with STARTUP_PROFILE=1."""
+
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager
+
+from . import config, strings
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """
+    Замеряет длительность фаз запуска (импорты, инициализация БД, создание диспетчера).
+    Фазы записываются до настройки логирования и выводятся одним отчётом в report().
+    Выключенный профилировщик ничего не замеряет.
+    """
+
+    def __init__(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self._started_at = time.perf_counter()
+        self._phases: list[tuple[str, float]] = []
+
+    @property
+    def phases(self) -> list[tuple[str, float]]:
+        """Возвращает замеренные фазы: (название, длительность в секундах)."""
+        return list(self._phases)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Замеряет длительность блока как фазу name."""
+        if not self.enabled:
+            yield
+            return
+
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._phases.append((name, time.perf_counter() - started_at))
+
+    def report(self) -> None:
+        """Логирует длительность каждой фазы и общее время с создания профилировщика."""
+        if not self.enabled:
+            return
+
+        for name, elapsed in self._phases:
+            logger.info(strings.LOG_STARTUP_PHASE, name, elapsed * 1000)
+        total = time.perf_counter() - self._started_at
+        logger.info(strings.LOG_STARTUP_TOTAL, total * 1000)
+
+
+_profiler = StartupProfiler(config.is_startup_profile_enabled())
+
+
+def get_profiler() -> StartupProfiler:
+    """Возвращает профилировщик запуска процесса."""
+    return _profiler
+
+
+def phase(name: str) -> AbstractContextManager[None]:
+    """Замеряет фазу запуска name общим профилировщиком."""
+    return _profiler.phase(name)
+
+
+def report() -> None:
+    """Логирует отчёт о фазах запуска, если профилирование включено."""
+    _profiler.report()
@@ -22,8 +22,16 @@ ERROR_INVALID_FORMAT = "❌ Некорректный формат. Введит
 ERROR_PROCESSING_TEMPLATE = "❌ Не удалось обработать сообщение: {err}."
 ERROR_EMPTY_DESCRIPTION_OR_AMOUNT = "❌ Описание и сумма не могут быть пустыми."
 ERROR_ACCESS_DENIED = "⛔ У вас нет доступа к этому боту."
+ERROR_OVERLOADED = "⏳ Бот сейчас перегружен. Пожалуйста, повторите через минуту."
+ERROR_RATE_LIMITED = "⏳ Слишком много сообщений. Подождите немного и попробуйте снова."
 ERROR_PARSING_TEMPLATE = "⚠️ Ошибки парсинга {count} записей:\n{details}"
 ERROR_SAVING_TEMPLATE = "⚠️ Не удалось сохранить {count} записей:\n{details}"
+ERROR_ADMIN_ONLY = "⛔ Команда доступна только администраторам."
+ERROR_BATCH_WRITE_INTERRUPTED = "запись прервана, сохранение не подтверждено"
+
+REPLY_SECTIONS_SEPARATOR = "\n\n"
+TELEGRAM_MESSAGE_MAX_LENGTH = 4096
+BOT_API_DEFAULT_NAME = "api.telegram.org"
 
 # ===== СООБЩЕНИЯ ДЛЯ ПАРСИНГА =====
 
@@ -33,37 +41,178 @@ PARSING_ERROR_INVALID_AMOUNT = "❌ Некорректный формат сум
 # ===== ЛОГИРОВАНИЕ =====
 
 LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s - %(message)s"
+LOG_FORMAT_TEXT = "text"
+LOG_FORMAT_JSON = "json"
 
 # Логи инициализации
-LOG_BOT_STARTING = "Starting bot by user_id=[{user_id}]..."
-LOG_BOT_START_SUCCESS = "... /start successfully processed for user_id=[{user_id}]."
-LOG_ACCESS_DENIED_START = "...Access denied for user_id=[{user_id}] on /start"
-LOG_ACCESS_DENIED_MESSAGE = "Access denied for new message from user_id=[{user_id}]."
+LOG_BOT_STARTING = "Starting bot by user_id=[%s]..."
+LOG_BOT_START_SUCCESS = "... /start successfully processed for user_id=[%s]."
+LOG_ACCESS_DENIED_UPDATE = "Access denied for update from user_id=[%s]."
+LOG_ACCESS_DENIED_DROPPED = "Update from denied user_id=[%s] within reply cooldown: no message reply."
+LOG_RATE_LIMITED = "Rate limit exceeded for user_id=[%s], dropping update."
+LOG_RATE_LIMIT_WARNING = "Rate limit exceeded for user_id=[%s], sending warning."
+LOG_OUTBOUND_RETRY_AFTER = "Flood control on [%s] for chat_id=[%s], retrying in [%s] s."
+LOG_SEND_SCHEDULER_FAILED = "Outbound send scheduler failed, pending sends are aborted: [%s]."
+LOG_UPDATE_SHED = "Update queue is full, shedding update from user_id=[%s]."
+LOG_SUPERVISOR_STARTED = "Supervisor started [%s] worker process(es)."
+LOG_WORKER_STARTED = "Worker [%s] started with pid=[%s]."
+LOG_WORKER_RESTARTED = "Worker [%s] exited with code=[%s], restarting with [%s] unread updates moved to a new queue."
+LOG_POLLING_FAILED = "Failed to fetch updates, retrying in [%s] s. Error: [%s]."
+LOG_STARTUP_PHASE = "Startup phase [%s] took [%.1f] ms."
+LOG_STARTUP_TOTAL = "Startup finished in [%.1f] ms."
+LOG_METRICS_SERVER_STARTED = "Metrics server listening on http://%s:%s/metrics"
+LOG_HEALTHCHECK_FAILED = "Health check failed. Error: [%s]."
+LOG_TRACING_ENABLED = "Tracing [%.1f%%] of updates to [%s]."
+LOG_PROFILING_STARTED = "Profiling started for chat_id=[%s]: updates=[%s], seconds=[%s]."
+LOG_PROFILING_SAVED = "Profile of [%s] update(s) over [%.1f] s saved to [%s]."
+LOG_PROFILING_SEND_FAILED = "Failed to send profile to chat_id=[%s]. Error: [%s]."
+LOG_PROFILING_SAVE_FAILED = "Failed to save profile to [%s]. Error: [%s]."
+LOG_PROFILING_SIGNAL = "Send SIGUSR1 to pid=[%s] to start or stop profiling."
+LOG_LOOP_WATCHDOG_STARTED = "Event loop watchdog reports stalls longer than [%.0f] ms."
+LOG_LOOP_BLOCKED = "Event loop blocked for [%.0f] ms at [%s] ([%s] stack sample(s)). Stack:\n%s"
+LOG_LOOP_STILL_BLOCKED = "Event loop is still blocked after [%.0f] ms at [%s]. Stack:\n%s"
+LOG_UPDATE_HANDLED = "[%s] Update from user_id=[%s] handled in [%.1f] ms."
 
 # Логи парсинга
-LOG_SKIPPING_EMPTY_PART = "Skipping empty part: [{text}]."
-LOG_SKIPPING_INVALID_PART = "Skipping invalid part: [{text}]."
-LOG_PARSING_FAILED = "Parsing failed for the message: [{message}] from user_id=[{user_id}]"
-LOG_SKIPPING_INVALID_PART_ERROR = "Skipping invalid part: [{part}]. Error: [{error}]."
+LOG_SKIPPING_EMPTY_PART = "Skipping empty part: [%s]."
+LOG_SKIPPING_INVALID_PART = "Skipping invalid part: [%s]."
+LOG_PARSING_FAILED = "Parsing failed for the message: [%s] from user_id=[%s]"
+LOG_SKIPPING_INVALID_PART_ERROR = "Skipping invalid part: [%s]. Error: [%s]."
+LOG_SKIPPING_INVALID_LINE_ERROR = "Skipping invalid part at line [%s]: [%s]. Error: [%s]."
 
 # Логи базы данных
-LOG_ADDING_EXPENSE = "Adding expense: [{description}] with amount=[{amount}] for user_id=[{user_id}]..."
-LOG_EXPENSE_SAVED = "...expense [{description}] with amount=[{amount_str}] successfully saved for user_id=[{user_id}]."
-LOG_FAILED_INSERT = "Failed to insert expense for user_id=[{user_id}]. Error: [{error}]."
+LOG_ADDING_EXPENSE = "Adding expense: [%s] with amount=[%s] for user_id=[%s]..."
+LOG_EXPENSE_SAVED = "...expense [%s] with amount=[%s] successfully saved for user_id=[%s]."
+LOG_FAILED_INSERT = "Failed to insert expense for user_id=[%s]. Error: [%s]."
 
 # Логи конфигурации
-LOG_ACCESS_RESTRICTED = "Access restricted to [{count}] user(s)."
+LOG_ACCESS_RESTRICTED = "Access restricted to [%s] user(s)."
 LOG_ACCESS_OPEN = "Access open to all users (no ALLOWED_USER_IDS set)"
-LOG_SKIPPING_USER_ID = "Skipping user id=[{user_id}] due to error: [{error}]."
+LOG_SKIPPING_USER_ID = "Skipping user id=[%s] due to error: [%s]."
+LOG_ALLOW_LIST_RELOADED = "Allow-list reloaded from [%s]: [%s] user(s)."
+LOG_ALLOW_LIST_EMPTY = "Allow-list file [%s] has no user ids, keeping previous list of [%s] user(s)."
+LOG_ALLOW_LIST_READ_FAILED = "Failed to read allow-list file [%s], keeping previous list. Error: [%s]."
+LOG_ENV_VALUE_CLAMPED = "Value [%s] for [%s] is out of range, using [%s]."
+LOG_INVALID_ENV_VALUE = "Invalid value [%s] for [%s], using default. Error: [%s]."
 
 # Логи окружения
-LOG_ENV_TOKEN = "[ENV]: TELEGRAM_TOKEN=[{token}]"
-LOG_ENV_LOG_LEVEL = "[ENV]: LOG_LEVEL=[{level}]"
-LOG_ENV_USER_IDS = "[ENV]: ALLOWED_USER_IDS_RAW=[{user_ids}]"
+LOG_ENV_TOKEN = "[ENV]: TELEGRAM_TOKEN=[%s]"
+LOG_ENV_LOG_LEVEL = "[ENV]: LOG_LEVEL=[%s]"
+LOG_ENV_LOG_FORMAT = "[ENV]: LOG_FORMAT=[%s]"
+LOG_ENV_USER_IDS = "[ENV]: ALLOWED_USER_IDS_RAW=[%s]"
+LOG_ENV_USER_IDS_FILE = "[ENV]: ALLOWED_USER_IDS_FILE=[%s]"
+LOG_ENV_RATE_LIMIT = "[ENV]: RATE_LIMIT_BURST=[%s], RATE_LIMIT_RATE=[%s]"
+LOG_ENV_CONCURRENCY = "[ENV]: MAX_CONCURRENT_UPDATES=[%s], MAX_QUEUED_UPDATES=[%s]"
+LOG_ENV_WORKERS = "[ENV]: WORKERS=[%s]"
+LOG_ENV_TRACING = "[ENV]: TRACE_SAMPLE_RATE=[%s], TRACE_FILE=[%s]"
+LOG_ENV_BOT_API_BASE_URL = "[ENV]: BOT_API_BASE_URL=[%s]"
+LOG_ENV_METRICS = "[ENV]: METRICS_HOST=[%s], METRICS_PORT=[%s]"
+LOG_ENV_LOOP_WATCHDOG = "[ENV]: LOOP_BLOCK_THRESHOLD_MS=[%s]"
+LOG_ENV_PROFILING = "[ENV]: ADMIN_USER_IDS=[%s], PROFILE_DIR=[%s]"
+LOG_ENV_OUTBOUND = "[ENV]: OUTBOUND_GLOBAL_RATE=[%s], OUTBOUND_CHAT_RATE=[%s], OUTBOUND_CHAT_BURST=[%s]"
+
+# ===== КОНТРОЛЬ ДОСТУПА =====
+
+ALLOWED_USER_IDS_RELOAD_INTERVAL_DEFAULT = 5.0
+ACCESS_DENIED_REPLY_COOLDOWN = 60.0
+ACCESS_DENIED_TRACKED_USERS_MAX = 10_000
+
+# ===== ОГРАНИЧЕНИЕ ЧАСТОТЫ ЗАПРОСОВ =====
+
+RATE_LIMIT_BURST_DEFAULT = 20.0
+RATE_LIMIT_RATE_DEFAULT = 2.0
+
+# ===== ПАРАЛЛЕЛЬНАЯ ОБРАБОТКА ОБНОВЛЕНИЙ =====
+
+MAX_CONCURRENT_UPDATES_DEFAULT = 16
+MAX_QUEUED_UPDATES_DEFAULT = 256
+
+# ===== ЗАПУСК =====
+
+# Значения переменных окружения, включающих флаг
+TRUE_ENV_VALUES = frozenset({"1", "true", "yes", "on"})
+
+# ===== МЕТРИКИ =====
+
+METRICS_HOST_DEFAULT = "127.0.0.1"
+METRICS_PORT_DEFAULT = 0
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4"
+METRICS_DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+EVENT_LOOP_LAG_INTERVAL = 0.5
+LOOP_BLOCK_THRESHOLD_MS_DEFAULT = 100.0
+LOOP_WATCHDOG_MIN_SAMPLE_INTERVAL = 0.005
+LOOP_WATCHDOG_RECENT_BLOCKS = 20
+LOOP_WATCHDOG_ONGOING_FACTOR = 10
+HEALTHZ_OK = "ok"
+ERROR_METRIC_LABELS = "Metric [{name}] expects labels {expected}"
+
+# ===== ТРАССИРОВКА =====
+
+TRACE_SAMPLE_RATE_DEFAULT = 0.0
+TRACE_FILE_DEFAULT = "traces.jsonl"
+TRACE_FILE_MAX_BYTES = 10 * 1024 * 1024
+TRACE_FILE_BACKUP_COUNT = 3
+TRACE_SUMMARY_TOP_DEFAULT = 10
+
+# ===== ПРОФИЛИРОВАНИЕ =====
+
+PROFILE_COMMAND = "profile"
+PROFILE_STOP_ARG = "stop"
+PROFILE_DIR_DEFAULT = "profiles"
+PROFILE_DEFAULT_UPDATES = 100
+PROFILE_MAX_UPDATES = 10_000
+PROFILE_MAX_SECONDS = 600.0
+PROFILE_SIGNAL_SECONDS = 60.0
+PROFILE_TOP_FUNCTIONS = 40
+PROFILE_STARTED_UPDATES_TEMPLATE = "🔬 Профилирую следующие {count} обновлений. Досрочно остановить: /profile stop"
+PROFILE_STARTED_SECONDS_TEMPLATE = "🔬 Профилирую {seconds:g} с. Досрочно остановить: /profile stop"
+PROFILE_ALREADY_RUNNING = "🔬 Профилирование уже идёт. Остановить: /profile stop"
+PROFILE_NOT_RUNNING = "🔬 Профилирование не запущено."
+PROFILE_STOPPED = "🔬 Профилирование остановлено, отчёт придёт отдельным сообщением."
+PROFILE_USAGE = (
+    "Использование: /profile [N | Ns | stop]\n"
+    "N — профилировать следующие N обновлений (по умолчанию 100, не больше 10000),\n"
+    "Ns — профилировать N секунд (не больше 600), stop — остановить."
+)
+PROFILE_DONE_CAPTION_TEMPLATE = "🔬 Профиль: {updates} обновлений за {seconds:.1f} с.\npstats: {path}"
+PROFILE_SUMMARY_HEADER_TEMPLATE = "Profiled {updates} update(s) over {seconds:.1f} s (event loop thread only)\n\n"
+
+# ===== РАБОЧИЕ ПРОЦЕССЫ =====
+
+WORKERS_DEFAULT = 1
+POLLING_TIMEOUT = 30
+POLLING_RETRY_DELAY = 5.0
+WORKER_SHUTDOWN_TIMEOUT = 10.0
+
+# ===== ИСХОДЯЩИЕ ЗАПРОСЫ К BOT API =====
+
+OUTBOUND_GLOBAL_RATE_DEFAULT = 30.0
+OUTBOUND_CHAT_RATE_DEFAULT = 1.0
+OUTBOUND_CHAT_BURST_DEFAULT = 3.0
+OUTBOUND_MAX_RETRIES = 3
+ERROR_SEND_RATE_NOT_POSITIVE = "Send rates must be positive, got global_rate={global_rate}, chat_rate={chat_rate}"
+
+# ===== КЭШ ОТЧЁТОВ =====
+
+REPORT_CACHE_MAX_ENTRIES = 128
+
+# ===== СТРАНИЦЫ ОТЧЁТОВ =====
+
+REPORT_PAGE_SIZE = 30
+REPORT_DESCRIPTION_MAX_LENGTH = 60
+
+# ===== ПАКЕТНАЯ ЗАПИСЬ РАСХОДОВ =====
+
+# Сколько строк записывается одной транзакцией
+EXPENSE_BATCH_MAX_ROWS = 500
 
 # ===== БАЗА ДАННЫХ =====
 
 DB_PATH_DEFAULT = "expenses.db"
+DB_BUSY_TIMEOUT = 10.0
+DB_ENABLE_WAL_SQL = "PRAGMA journal_mode=WAL"
+DB_HEALTHCHECK_SQL = "SELECT 1 FROM expenses LIMIT 1"
 DB_CREATE_TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS expenses (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -73,17 +222,24 @@ CREATE TABLE IF NOT EXISTS expenses (
     user_id INTEGER NOT NULL
 );
 """
+DB_CREATE_CREATED_AT_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_expenses_created_at_id ON expenses(created_at, id)"
 DB_INSERT_SQL = "INSERT INTO expenses(description, amount, created_at, user_id) VALUES (?, ?, ?, ?)"
 
 # Логи базы данных
-LOG_DB_INITIALIZING = "Initializing database at [{path}]..."
+LOG_DB_INITIALIZING = "Initializing database at [%s]..."
 LOG_DB_INITIALIZED = "...Database initialized."
-LOG_DB_EXECUTING_SQL = "Executing SQL: [{sql}] with params=[{params}]..."
-LOG_DB_INSERTED = "...Inserted expense with id=[{expense_id}]"
+LOG_DB_EXECUTING_SQL = "Executing SQL: [%s] with params=[%s]..."
+LOG_DB_INSERTED = "...Inserted expense with id=[%s]"
+LOG_DB_INSERTED_BATCH = "...Inserted [%s] expense(s) in one transaction."
+
+# Логи отчётов
+LOG_REPORT_CACHE_HIT = "Report cache hit for [%s-%02d] view=[%s]."
+LOG_REPORT_PREFETCH_FAILED = "Failed to prefetch report for [%s-%02d]. Error: [%s]."
 
 # ===== РАЗДЕЛИТЕЛИ =====
 
-COSTS_SEPARATORS = (";", "\n")
+COSTS_SEPARATOR = ";"
+COSTS_LINE_SEPARATOR = "\n"
 
 # ===== КНОПКИ И ИНТЕРФЕЙС =====
 
@@ -92,14 +248,26 @@ BUTTON_VIEW_EXPENSES = "📊 Показать расходы"
 BUTTON_THIS_MONTH = "📅 Этот месяц"
 BUTTON_LAST_MONTH = "📅 Прошлый месяц"
 BUTTON_PREVIOUS_MONTH = "📅 Предыдущий месяц"
+BUTTON_OTHER_MONTH = "📆 Другой месяц"
+BUTTON_BACK = "🔙 Назад"
 BUTTON_BACK_TO_MENU = "🔙 Назад в меню"
+BUTTON_PREV_PAGE = "◀"
+BUTTON_NEXT_PAGE = "▶"
 
 # Сообщения для отображения расходов
 EXPENSES_HEADER_TEMPLATE = "📊 Расходы за {month_name} {year}:\n\n"
 EXPENSES_USER_HEADER_TEMPLATE = "👤 {user_name}:\n"
 EXPENSES_ITEM_TEMPLATE = "  • {description} — {amount_str} ({date})\n"
+EXPENSES_USER_TOTAL_TEMPLATE = "  💰 Итого: {total_amount_str}\n\n"
 EXPENSES_TOTAL_TEMPLATE = "\n💰 Итого: {total_amount_str}"
 EXPENSES_EMPTY_TEMPLATE = "📭 Расходов за {month_name} {year} не найдено."
+EXPENSES_PAGE_HEADER_TEMPLATE = "📊 Расходы за {month_name} {year} (стр. {page}):\n\n"
+EXPENSES_PAGE_ITEM_TEMPLATE = "  • {description} — {amount_str} ({date}, {user_name})\n"
+EXPENSES_PAGE_TOTAL_TEMPLATE = "\n💰 Итого за месяц: {total_amount_str} ({count} записей)"
+
+MONTH_PICKER_TEXT = "📆 Выберите месяц ({year}):"
+MONTH_PICKER_EMPTY_TEXT = "📭 Расходов пока нет."
+MONTH_PICKER_COLUMNS = 3
 
 # Названия месяцев
 MONTH_NAMES = [
@@ -122,12 +290,53 @@ DB_GET_EXPENSES_BY_MONTH_SQL = """
 SELECT description, amount, created_at, user_id
 FROM expenses
 WHERE strftime('%Y-%m', created_at) = ?
-ORDER BY created_at DESC
+ORDER BY created_at DESC, id
 """
 
 DB_GET_EXPENSES_BY_USER_AND_MONTH_SQL = """
 SELECT description, amount, created_at
 FROM expenses
 WHERE user_id = ? AND strftime('%Y-%m', created_at) = ?
-ORDER BY created_at DESC
+ORDER BY created_at DESC, id
+"""
+
+DB_GET_MONTH_SUMMARY_SQL = """
+SELECT COUNT(*) AS count, COALESCE(SUM(amount), 0) AS total
+FROM expenses
+WHERE created_at >= ? AND created_at < ?
+"""
+
+DB_GET_EXPENSES_PAGE_FIRST_SQL = """
+SELECT id, description, amount, created_at, user_id
+FROM expenses
+WHERE created_at >= ? AND created_at < ?
+ORDER BY created_at DESC, id DESC
+LIMIT ?
+"""
+
+DB_GET_EXPENSES_PAGE_OLDER_SQL = """
+SELECT id, description, amount, created_at, user_id
+FROM expenses
+WHERE created_at >= ? AND created_at < ? AND (created_at, id) < (?, ?)
+ORDER BY created_at DESC, id DESC
+LIMIT ?
+"""
+
+DB_GET_EXPENSES_PAGE_NEWER_SQL = """
+SELECT id, description, amount, created_at, user_id
+FROM expenses
+WHERE created_at >= ? AND created_at < ? AND (created_at, id) > (?, ?)
+ORDER BY created_at ASC, id ASC
+LIMIT ?
+"""
+
+DB_GET_EXPENSE_MONTHS_SQL = """
+WITH RECURSIVE months(month) AS (
+    SELECT substr(MAX(created_at), 1, 7) FROM expenses
+    UNION ALL
+    SELECT (SELECT substr(MAX(created_at), 1, 7) FROM expenses WHERE created_at < months.month || '-01')
+    FROM months
+    WHERE months.month IS NOT NULL
+)
+SELECT month FROM months WHERE month IS NOT NULL
 """
@@ -0,0 +1,90 @@
+"""Summarise the slowest traces from tracing JSONL files.
+
+Usage: python -m src.trace_summary traces.jsonl [traces.jsonl.1 ...] [--top 10]
+"""
+
+import argparse
+import json
+import sys
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from . import strings
+
+
+def load_traces(paths: Iterable[str]) -> Iterator[dict[str, Any]]:
+    """Читает трассы из JSONL-файлов, пропуская повреждённые строки (например, недописанную последнюю)."""
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    trace = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(trace, dict) and "spans" in trace:
+                    yield trace
+
+
+def _span_depths(spans: list[dict[str, Any]]) -> dict[str, int]:
+    parents = {span["span_id"]: span["parent_id"] for span in spans}
+    depths: dict[str, int] = {}
+    for span_id in parents:
+        depth, parent = 0, parents[span_id]
+        while parent is not None and parent in parents:
+            depth, parent = depth + 1, parents[parent]
+        depths[span_id] = depth
+    return depths
+
+
+def format_trace(trace: dict[str, Any]) -> list[str]:
+    """Возвращает строки с деревом span'ов трассы: смещение от начала, длительность, имя."""
+    attributes = " ".join(f"{key}={value}" for key, value in trace.get("attributes", {}).items())
+    lines = [f"{trace['duration_ms']:>10.1f} ms  {trace['name']}  {attributes}  trace_id={trace['trace_id']}"]
+    spans = trace["spans"]
+    depths = _span_depths(spans)
+    for span in sorted(spans[1:], key=lambda item: item["offset_ms"]):
+        indent = "  " * depths[span["span_id"]]
+        lines.append(f"{'':>10}    +{span['offset_ms']:>8.1f} {span['duration_ms']:>9.1f} ms  {indent}{span['name']}")
+    return lines
+
+
+def aggregate_spans(traces: list[dict[str, Any]]) -> list[tuple[str, int, float, float]]:
+    """Возвращает (имя, количество, суммарная длительность, максимальная длительность) по именам span'ов."""
+    totals: dict[str, list[float]] = {}
+    for trace in traces:
+        for span in trace["spans"][1:]:
+            totals.setdefault(span["name"], []).append(span["duration_ms"])
+    rows = [(name, len(values), sum(values), max(values)) for name, values in totals.items()]
+    return sorted(rows, key=lambda row: row[2], reverse=True)
+
+
+def summarize(traces: list[dict[str, Any]], top: int = strings.TRACE_SUMMARY_TOP_DEFAULT) -> str:
+    """Возвращает отчёт: самые медленные трассы с деревом span'ов и суммарное время по видам span'ов."""
+    if not traces:
+        return "No traces found.\n"
+
+    slowest = sorted(traces, key=lambda trace: trace["duration_ms"], reverse=True)[:top]
+    lines = [f"Slowest {len(slowest)} of {len(traces)} traces:", ""]
+    for trace in slowest:
+        lines.extend(format_trace(trace))
+        lines.append("")
+
+    lines.append(f"{'span':<40} {'count':>7} {'total ms':>12} {'max ms':>10}")
+    for name, count, total, longest in aggregate_spans(traces):
+        lines.append(f"{name:<40} {count:>7} {total:>12.1f} {longest:>10.1f}")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Точка входа CLI."""
+    parser = argparse.ArgumentParser(description="Самые медленные трассы обновлений из JSONL-файлов трассировки.")
+    parser.add_argument("paths", nargs="+", help="файлы трасс (TRACE_FILE и его ротации)")
+    parser.add_argument("--top", type=int, default=strings.TRACE_SUMMARY_TOP_DEFAULT, help="сколько трасс показать")
+    args = parser.parse_args(argv)
+
+    sys.stdout.write(summarize(list(load_traces(args.paths)), args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""Lightweight per-update tracing: sampled span trees exported to a rotating JSONL file."""
+
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import time
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from logging.handlers import QueueListener, RotatingFileHandler
+from typing import Any, TypeVar
+
+from . import strings
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass(slots=True)
+class Span:
+    """Участок обработки обновления: имя, родитель, время начала и длительность."""
+
+    name: str
+    span_id: str
+    parent_id: str | None
+    started_at: float
+    duration: float = 0.0
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class Trace:
+    """Дерево span'ов одного обновления."""
+
+    trace_id: str
+    started_wall: float
+    spans: list[Span] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Возвращает трассу в виде, который пишется строкой JSONL."""
+        root = self.spans[0]
+        return {
+            "trace_id": self.trace_id,
+            "name": root.name,
+            "ts": self.started_wall,
+            "duration_ms": round(root.duration * 1000, 3),
+            "attributes": root.attributes,
+            "spans": [
+                {
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "name": span.name,
+                    "offset_ms": round((span.started_at - root.started_at) * 1000, 3),
+                    "duration_ms": round(span.duration * 1000, 3),
+                    "attributes": span.attributes,
+                }
+                for span in self.spans
+            ],
+        }
+
+
+# Текущий span задачи; asyncio.to_thread копирует контекст, поэтому span'ы из потоков попадают в ту же трассу
+_current: ContextVar[tuple[Trace, Span] | None] = ContextVar("trace_span", default=None)
+
+
+def _new_id() -> str:
+    return os.urandom(8).hex()
+
+
+class _JsonLineFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg, ensure_ascii=False, default=str)
+
+
+class TraceExporter:
+    """
+    Пишет завершённые трассы в JSONL-файл с ротацией по размеру.
+    Сериализация и запись выполняются в потоке QueueListener, а не в цикле событий.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = strings.TRACE_FILE_MAX_BYTES,
+        backup_count: int = strings.TRACE_FILE_BACKUP_COUNT,
+    ) -> None:
+        self.path = path
+        output = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        output.setFormatter(_JsonLineFormatter())
+        self._output = output
+        self._queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        self._listener = QueueListener(self._queue, output)
+
+    def start(self) -> None:
+        """Запускает поток записи."""
+        self._listener.start()
+
+    def stop(self) -> None:
+        """Дописывает трассы из очереди и закрывает файл."""
+        self._listener.stop()
+        self._output.close()
+
+    def export(self, trace: Trace) -> None:
+        """Ставит трассу в очередь на запись."""
+        self._queue.put(logging.makeLogRecord({"msg": trace.to_dict()}))
+
+
+class Tracer:
+    """Решает, записывать ли трассу обновления (доля sample_rate), и передаёт завершённые трассы экспортёру."""
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        exporter: TraceExporter | None = None,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self._rng = rng
+
+    @contextmanager
+    def start_trace(self, name: str, **attributes: Any) -> Iterator[Trace | None]:
+        """Начинает трассу с корневым span'ом name, если обновление попало в выборку."""
+        if self.exporter is None or self.sample_rate <= 0 or self._rng() >= self.sample_rate:
+            yield None
+            return
+
+        trace = Trace(trace_id=_new_id(), started_wall=time.time())
+        root = Span(name, _new_id(), None, time.perf_counter(), attributes=attributes)
+        trace.spans.append(root)
+        token = _current.set((trace, root))
+        try:
+            yield trace
+        finally:
+            root.duration = time.perf_counter() - root.started_at
+            _current.reset(token)
+            self.exporter.export(trace)
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Возвращает трассировщик процесса."""
+    return _tracer
+
+
+def configure(sample_rate: float, path: str) -> None:
+    """Включает трассировку: доля sample_rate обновлений записывается в файл path."""
+    if _tracer.exporter is not None:
+        _tracer.exporter.stop()
+    _tracer.exporter = TraceExporter(path)
+    _tracer.exporter.start()
+    _tracer.sample_rate = sample_rate
+
+
+def shutdown() -> None:
+    """Дописывает оставшиеся трассы и выключает трассировку."""
+    if _tracer.exporter is not None:
+        _tracer.exporter.stop()
+        _tracer.exporter = None
+
+
+def current_trace_id() -> str | None:
+    """Возвращает id текущей трассы, если обновление попало в выборку."""
+    current = _current.get()
+    return current[0].trace_id if current else None
+
+
+@contextmanager
+def _span(trace: Trace, parent: Span, name: str, attributes: dict[str, Any]) -> Iterator[Span]:
+    span = Span(name, _new_id(), parent.span_id, time.perf_counter(), attributes=attributes)
+    trace.spans.append(span)
+    token = _current.set((trace, span))
+    try:
+        yield span
+    finally:
+        span.duration = time.perf_counter() - span.started_at
+        _current.reset(token)
+
+
+def span(name: str, **attributes: Any) -> AbstractContextManager[Span | None]:
+    """Замеряет блок как дочерний span текущего; вне трассы ничего не делает."""
+    current = _current.get()
+    if current is None:
+        return nullcontext()
+    return _span(current[0], current[1], name, attributes)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Декоратор синхронной функции: каждый вызов внутри трассы записывается span'ом name."""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            current = _current.get()
+            if current is None:
+                return func(*args, **kwargs)
+            with _span(current[0], current[1], name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
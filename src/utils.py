@@ -10,37 +10,64 @@ def get_user_id(message: Message) -> int | None:
     return message.from_user.id if message.from_user else None
 
 
-async def send_access_denied(message: Message) -> None:
-    """Отправляет сообщение об отказе в доступе."""
-    await message.answer(strings.ERROR_ACCESS_DENIED)
-
-
-async def send_success_messages(message: Message, success_messages: list[str]) -> None:
-    """Отправляет сообщения об успешном сохранении расходов."""
+def format_success_messages(success_messages: list[str]) -> str | None:
+    """Формирует раздел ответа об успешном сохранении расходов."""
     if not success_messages:
-        return
+        return None
 
     if len(success_messages) == 1:
-        await message.answer(success_messages[0])
-    else:
-        await message.answer(
-            strings.SUCCESS_MULTIPLE_SAVED_TEMPLATE.format(
-                count=len(success_messages), details="\n".join(success_messages)
-            )
-        )
-
-
-async def send_db_insert_error_messages(message: Message, failed_messages: list[str]) -> None:
-    """Отправляет сообщения об ошибках сохранения."""
-    if failed_messages:
-        await message.answer(
-            strings.ERROR_SAVING_TEMPLATE.format(count=len(failed_messages), details="\n".join(failed_messages))
-        )
-
-
-async def send_parsing_errors(message: Message, failed_costs: list[str]) -> None:
-    """Отправляет сообщения об ошибках парсинга."""
-    if failed_costs:
-        await message.answer(
-            strings.ERROR_PARSING_TEMPLATE.format(count=len(failed_costs), details="\n".join(failed_costs))
-        )
+        return success_messages[0]
+    return strings.SUCCESS_MULTIPLE_SAVED_TEMPLATE.format(
+        count=len(success_messages), details="\n".join(success_messages)
+    )
+
+
+def format_db_insert_error_messages(failed_messages: list[str]) -> str | None:
+    """Формирует раздел ответа об ошибках сохранения."""
+    if not failed_messages:
+        return None
+    return strings.ERROR_SAVING_TEMPLATE.format(count=len(failed_messages), details="\n".join(failed_messages))
+
+
+def format_parsing_errors(failed_costs: list[str]) -> str | None:
+    """Формирует раздел ответа об ошибках парсинга."""
+    if not failed_costs:
+        return None
+    return strings.ERROR_PARSING_TEMPLATE.format(count=len(failed_costs), details="\n".join(failed_costs))
+
+
+def build_expenses_reply(success_messages: list[str], failed_messages: list[str], failed_costs: list[str]) -> str:
+    """Собирает единый ответ из разделов об успешных записях, ошибках сохранения и ошибках парсинга."""
+    sections = (
+        format_success_messages(success_messages),
+        format_db_insert_error_messages(failed_messages),
+        format_parsing_errors(failed_costs),
+    )
+    return strings.REPLY_SECTIONS_SEPARATOR.join(section for section in sections if section)
+
+
+def split_message(text: str, limit: int = strings.TELEGRAM_MESSAGE_MAX_LENGTH) -> list[str]:
+    """
+    Разбивает текст на части не длиннее limit символов.
+    Части режутся по переводу строки, а строка длиннее limit — по limit символов.
+    """
+    chunks: list[str] = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit + 1)
+        if cut <= 0:
+            chunks.append(text[:limit])
+            text = text[limit:]
+        else:
+            chunks.append(text[:cut])
+            start = cut + 1
+            text = text[start:]
+
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+async def send_long_message(message: Message, text: str) -> None:
+    """Отправляет текст одним сообщением или, если он превышает лимит Telegram, несколькими."""
+    for chunk in split_message(text):
+        await message.answer(chunk)
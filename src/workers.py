@@ -0,0 +1,235 @@
+"""Supervisor mode: shard updates across worker processes by user id."""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+from collections import deque
+from multiprocessing.process import BaseProcess
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+from aiogram.types import Update
+
+from . import config, logging_setup, loop_watchdog, report_cache, strings, tracing
+from .bot import create_bot, create_dispatcher, start_metrics_server
+
+logger = logging.getLogger(__name__)
+
+# Сообщение в очереди, по которому рабочий процесс завершается
+STOP = None
+
+
+def get_update_user_id(update: Update) -> int | None:
+    """Возвращает id пользователя, от которого пришло обновление, или None."""
+    for event in (update.message, update.callback_query, update.edited_message):
+        if event is not None and event.from_user is not None:
+            return event.from_user.id
+    return None
+
+
+def get_shard(update: Update, num_workers: int) -> int:
+    """
+    Возвращает номер рабочего процесса для обновления.
+    Все обновления одного пользователя попадают в один процесс и обрабатываются там по порядку.
+    """
+    user_id = get_update_user_id(update)
+    key = user_id if user_id is not None else update.update_id
+    return key % num_workers
+
+
+def dump_update(update: Update) -> dict[str, Any]:
+    """Сериализует обновление для передачи в рабочий процесс."""
+    return update.model_dump(mode="json", exclude_unset=True)
+
+
+async def consume_updates(
+    dp: Dispatcher, bot: Bot, updates: "queue.Queue[dict[str, Any] | None]", taken: Any = None
+) -> None:
+    """
+    Читает обновления из очереди и обрабатывает каждое в отдельной задаче до сообщения STOP.
+    Порядок обновлений одного пользователя сохраняет UpdateLimiter в middleware.
+    Если передан общий счётчик taken, он увеличивается на каждое прочитанное сообщение.
+    """
+
+    def take() -> dict[str, Any] | None:
+        payload = updates.get()
+        if taken is not None:
+            # Пишет только этот процесс, поэтому счётчик без блокировки: умерев, процесс не оставит её занятой
+            taken.value += 1
+        return payload
+
+    tasks: set[asyncio.Task[Any]] = set()
+    while (payload := await asyncio.to_thread(take)) is not STOP:
+        update = Update.model_validate(payload, context={"bot": bot})
+        task = asyncio.create_task(dp.feed_update(bot, update))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def get_worker_metrics_port(index: int) -> int:
+    """Возвращает порт сервера метрик рабочего процесса: METRICS_PORT + 1 + index, или 0 при выключенных метриках."""
+    metrics_port = config.get_metrics_port()
+    return metrics_port + 1 + index if metrics_port > 0 else 0
+
+
+async def _run_worker(updates: "queue.Queue[dict[str, Any] | None]", taken: Any, num_workers: int, index: int) -> None:
+    """
+    Обрабатывает обновления своего шарда, используя долю общего лимита исходящих запросов.
+    Метрики обработчиков копятся в этом процессе, поэтому у него свой сервер метрик.
+    """
+    # Доля лимита может быть меньше одного запроса в секунду; корзина SendScheduler всё равно вмещает
+    # один запрос, поэтому процесс отправляет ответы, а не ждёт накопления токена, которого не будет
+    bot = create_bot(global_rate=config.get_outbound_global_rate() / num_workers)
+    metrics_server = await start_metrics_server(get_worker_metrics_port(index))
+    watchdog = loop_watchdog.start_from_config()
+    try:
+        await consume_updates(create_dispatcher(), bot, updates, taken)
+    finally:
+        if watchdog is not None:
+            await watchdog.stop()
+        if metrics_server is not None:
+            await metrics_server.stop()
+        await bot.session.close()
+
+
+def _worker_main(
+    index: int, updates: "queue.Queue[dict[str, Any] | None]", taken: Any, generation: Any, num_workers: int
+) -> None:
+    """Точка входа рабочего процесса."""
+    config.setup_logging()
+    report_cache.get_report_cache().attach_shared_generation(generation)
+    if (sample_rate := config.get_trace_sample_rate()) > 0:
+        # У каждого процесса свой файл: ротация одного файла из нескольких процессов небезопасна
+        root, ext = os.path.splitext(config.get_trace_file())
+        tracing.configure(sample_rate, f"{root}.worker-{index}{ext}")
+    logger.info(strings.LOG_WORKER_STARTED, index, multiprocessing.current_process().pid)
+    try:
+        asyncio.run(_run_worker(updates, taken, num_workers, index))
+    finally:
+        tracing.shutdown()
+        logging_setup.stop()
+
+
+class Supervisor:
+    """
+    Получает обновления от Telegram и распределяет их по N рабочим процессам по id пользователя.
+    Кэши отчётов рабочих процессов согласованы через общий счётчик поколений,
+    запись в SQLite идёт в режиме WAL с ожиданием блокировки.
+    Отправленные обновления хранятся, пока рабочий процесс не прочитает их из очереди,
+    чтобы после его падения передать непрочитанные перезапущенному процессу.
+    """
+
+    def __init__(self, num_workers: int) -> None:
+        self._num_workers = num_workers
+        self._context = multiprocessing.get_context("spawn")
+        self._generation = self._context.Value("q", 0)
+        self._queues = [self._context.Queue() for _ in range(num_workers)]
+        # Сколько сообщений прочитал из очереди каждый процесс и сколько из них уже убрано из _pending
+        self._taken = [self._context.RawValue("q", 0) for _ in range(num_workers)]
+        self._acked = [0] * num_workers
+        self._pending: list[deque[dict[str, Any]]] = [deque() for _ in range(num_workers)]
+        self._processes: list[BaseProcess | None] = [None] * num_workers
+
+    def start(self) -> None:
+        """Запускает рабочие процессы."""
+        for index in range(self._num_workers):
+            self._start_worker(index)
+        logger.info(strings.LOG_SUPERVISOR_STARTED, self._num_workers)
+
+    def _start_worker(self, index: int) -> None:
+        process = self._context.Process(
+            target=_worker_main,
+            args=(index, self._queues[index], self._taken[index], self._generation, self._num_workers),
+            name=f"worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[index] = process
+
+    def _forget_taken(self, index: int) -> None:
+        """Убирает из _pending обновления, которые процесс уже прочитал из очереди."""
+        pending = self._pending[index]
+        taken = self._taken[index].value
+        for _ in range(min(taken - self._acked[index], len(pending))):
+            pending.popleft()
+        self._acked[index] = taken
+
+    def restart_dead_workers(self) -> None:
+        """
+        Перезапускает завершившиеся рабочие процессы с новыми очередями. Процесс почти всё время ждёт
+        в get() и держит блокировку чтения своей очереди; умерев, он оставляет её занятой, и новый процесс
+        навсегда завис бы на старой очереди. Поэтому непрочитанные обновления берутся из _pending
+        и по порядку кладутся в новую очередь; теряются только те, что процесс успел прочитать.
+        """
+        for index, process in enumerate(self._processes):
+            if process is not None and not process.is_alive():
+                self._forget_taken(index)
+                pending = self._pending[index]
+                logger.error(strings.LOG_WORKER_RESTARTED, index, process.exitcode, len(pending))
+                stale = self._queues[index]
+                # Старую очередь никто не прочитает: при выходе не ждём, пока её буфер уйдёт в канал
+                stale.cancel_join_thread()
+                stale.close()
+                updates = self._queues[index] = self._context.Queue()
+                for payload in pending:
+                    updates.put(payload)
+                self._taken[index] = self._context.RawValue("q", 0)
+                self._acked[index] = 0
+                self._start_worker(index)
+
+    def dispatch(self, update: Update) -> None:
+        """Передаёт обновление рабочему процессу его пользователя."""
+        index = get_shard(update, self._num_workers)
+        self._forget_taken(index)
+        payload = dump_update(update)
+        self._pending[index].append(payload)
+        self._queues[index].put(payload)
+
+    async def stop(self) -> None:
+        """Дожидается обработки очередей и завершает рабочие процессы."""
+        for updates in self._queues:
+            updates.put(STOP)
+        for process in self._processes:
+            if process is not None:
+                await asyncio.to_thread(process.join, strings.WORKER_SHUTDOWN_TIMEOUT)
+                if process.is_alive():
+                    process.terminate()
+
+
+async def fetch_updates(bot: Bot, offset: int | None) -> list[Update]:
+    """
+    Получает обновления long polling'ом, повторяя запрос после любой ошибки Bot API, как start_polling aiogram.
+    После ответа 429 ждёт retry_after, после остальных ошибок — POLLING_RETRY_DELAY.
+    """
+    while True:
+        try:
+            return await bot.get_updates(offset=offset, timeout=strings.POLLING_TIMEOUT)
+        except TelegramRetryAfter as err:
+            delay = max(float(err.retry_after), strings.POLLING_RETRY_DELAY)
+            logger.error(strings.LOG_POLLING_FAILED, delay, err)
+        except TelegramAPIError as err:
+            delay = strings.POLLING_RETRY_DELAY
+            logger.error(strings.LOG_POLLING_FAILED, delay, err)
+        await asyncio.sleep(delay)
+
+
+async def run_supervisor(bot: Bot, num_workers: int) -> None:
+    """Запускает рабочие процессы и раздаёт им обновления, полученные long polling'ом."""
+    supervisor = Supervisor(num_workers)
+    supervisor.start()
+    offset: int | None = None
+    try:
+        while True:
+            updates = await fetch_updates(bot, offset)
+            supervisor.restart_dead_workers()
+            for update in updates:
+                supervisor.dispatch(update)
+                offset = update.update_id + 1
+    finally:
+        await supervisor.stop()
+        await bot.session.close()
@@ -0,0 +1,11 @@
+import pytest
+
+from src.report_cache import get_report_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_report_cache():
+    """Не даёт закэшированным отчётам одного теста попасть в другой."""
+    get_report_cache().clear()
+    yield
+    get_report_cache().clear()
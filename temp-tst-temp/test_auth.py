@@ -0,0 +1,117 @@
+"""Tests for the cached allow-list."""
+
+import os
+
+import pytest
+
+from src import auth
+from src.auth import AllowList
+
+
+@pytest.fixture(autouse=True)
+def reset_allow_list():
+    yield
+    auth.reload_allow_list()
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_allow_list_empty_allows_everyone():
+    allow_list = AllowList()
+    assert allow_list.is_allowed(123)
+    assert allow_list.is_allowed(None)
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_allow_list_membership():
+    allow_list = AllowList(user_ids={1, 2})
+    assert allow_list.user_ids == frozenset({1, 2})
+    assert allow_list.is_allowed(1)
+    assert not allow_list.is_allowed(3)
+    assert not allow_list.is_allowed(None)
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_allow_list_env_is_parsed_once(monkeypatch):
+    monkeypatch.setenv("ALLOWED_USER_IDS", "1,2")
+    monkeypatch.delenv("ALLOWED_USER_IDS_FILE", raising=False)
+    auth.reload_allow_list()
+
+    monkeypatch.setenv("ALLOWED_USER_IDS", "3")
+    assert auth.is_user_allowed(1)
+    assert not auth.is_user_allowed(3)
+
+    auth.reload_allow_list()
+    assert auth.is_user_allowed(3)
+    assert not auth.is_user_allowed(1)
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_allow_list_reloads_file_on_mtime_change(tmp_path):
+    path = tmp_path / "allowed.txt"
+    path.write_text("1\n2\n")
+    allow_list = AllowList(user_ids={99}, file_path=str(path), check_interval=0)
+
+    assert allow_list.user_ids == frozenset({1, 2})
+
+    path.write_text("3, 4\n")
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+    assert allow_list.user_ids == frozenset({3, 4})
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_allow_list_respects_check_interval(tmp_path):
+    path = tmp_path / "allowed.txt"
+    path.write_text("1")
+    allow_list = AllowList(file_path=str(path), check_interval=3600)
+
+    path.write_text("2")
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+    assert allow_list.user_ids == frozenset({1})
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_allow_list_keeps_previous_list_when_file_missing(tmp_path):
+    allow_list = AllowList(user_ids={5}, file_path=str(tmp_path / "missing.txt"), check_interval=0)
+    assert allow_list.user_ids == frozenset({5})
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_allow_list_keeps_previous_list_when_file_emptied(tmp_path):
+    path = tmp_path / "allowed.txt"
+    path.write_text("1\n2\n")
+    allow_list = AllowList(file_path=str(path), check_interval=0)
+
+    path.write_text("")
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+    assert allow_list.user_ids == frozenset({1, 2})
+    assert not allow_list.is_allowed(3)
+
+    path.write_text("3")
+    os.utime(path, (stat.st_atime, stat.st_mtime + 20))
+    assert allow_list.user_ids == frozenset({3})
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_allow_list_fails_closed_when_file_has_no_ids(tmp_path):
+    path = tmp_path / "allowed.txt"
+    path.write_text("\n")
+
+    allow_list = AllowList(file_path=str(path), check_interval=0)
+
+    assert allow_list.user_ids == frozenset()
+    assert not allow_list.is_allowed(1)
+    assert not AllowList(file_path=str(tmp_path / "missing.txt")).is_allowed(1)
@@ -0,0 +1,164 @@
+"""Tests for group commit of expenses."""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src import db, handlers, strings
+from src.batch_writer import ExpenseBatchWriter
+from src.concurrency import UpdateLimiter
+from src.exceptions import BatchWriteInterrupted
+from src.report_cache import get_report_cache
+
+
+@pytest.fixture
+def writer_db(tmp_path):
+    db_path = str(tmp_path / "expenses.db")
+    db.init_db(db_path)
+    return db_path
+
+
+def count_rows(db_path: str) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM expenses").fetchone()[0]
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_insert_expenses_reports_invalid_rows_and_commits_the_rest(writer_db):
+    results = db.insert_expenses([("Кофе", 100.0, 1), ("", 50.0, 1), ("Такси", 250.0, 2)], db_path=writer_db)
+
+    assert isinstance(results[0], int) and isinstance(results[2], int)
+    assert isinstance(results[1], ValueError)
+    assert count_rows(writer_db) == 2
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_insert_expenses_invalidates_month_reports(writer_db):
+    cache = get_report_cache()
+    version = cache.get_version(0, 0)
+
+    db.insert_expenses([("Кофе", 100.0, 1)], db_path=writer_db)
+
+    assert cache.get_version(0, 0) == version + 1
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_concurrent_messages_are_written_in_one_transaction(writer_db):
+    writer = ExpenseBatchWriter(db_path=writer_db)
+
+    results = await asyncio.gather(
+        *(writer.write(user_id, [(f"Кофе {user_id}", 10.0), ("Такси", 20.0)]) for user_id in range(50))
+    )
+
+    assert writer.stats.batches == 1
+    assert writer.stats.rows == 100
+    ids = [expense_id for message in results for expense_id in message]
+    assert len(set(ids)) == 100
+    assert count_rows(writer_db) == 100
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_batches_are_capped_by_max_rows(writer_db):
+    writer = ExpenseBatchWriter(db_path=writer_db, max_batch_rows=4)
+
+    await asyncio.gather(*(writer.write(1, [("Кофе", 10.0), ("Чай", 5.0)]) for _ in range(5)))
+
+    assert writer.stats.batches == 3
+    assert writer.stats.max_batch_rows == 4
+    assert count_rows(writer_db) == 10
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_database_error_fails_every_message_in_batch(writer_db):
+    writer = ExpenseBatchWriter(db_path=writer_db)
+
+    with patch.object(db, "insert_expenses", side_effect=sqlite3.OperationalError("locked")):
+        results = await asyncio.gather(
+            writer.write(1, [("Кофе", 10.0)]), writer.write(2, [("Чай", 5.0)]), return_exceptions=True
+        )
+
+    assert all(isinstance(result, sqlite3.OperationalError) for result in results)
+
+    assert await writer.write(1, [("Кофе", 10.0)]) != []
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_messages_of_one_user_share_transactions_and_keep_reply_order(writer_db):
+    writer = ExpenseBatchWriter(db_path=writer_db)
+    limiter = UpdateLimiter(max_in_flight=1, max_queued=100)
+    replies = []
+
+    def make_message(number):
+        async def answer(text):
+            replies.append(number)
+
+        return SimpleNamespace(from_user=SimpleNamespace(id=1), text=f"Кофе {number} 10", answer=answer)
+
+    with patch("src.batch_writer.get_expense_writer", return_value=writer):
+        await asyncio.gather(
+            *(
+                limiter.run(1, lambda message=make_message(n): handlers.handle_text(message), may_write=True)
+                for n in range(40)
+            )
+        )
+
+    assert count_rows(writer_db) == 40
+    assert writer.stats.batches <= 3
+    assert replies == list(range(40))
+    assert limiter.stats.in_flight == limiter.stats.queued == 0
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_cancelled_flush_fails_taken_messages(writer_db):
+    writer = ExpenseBatchWriter(db_path=writer_db)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_insert(rows, db_path):
+        started.set()
+        release.wait(5)
+        return [1] * len(rows)
+
+    with patch.object(db, "insert_expenses", side_effect=slow_insert):
+        writes = asyncio.gather(
+            writer.write(1, [("Кофе", 10.0)]), writer.write(2, [("Чай", 5.0)]), return_exceptions=True
+        )
+        await asyncio.to_thread(started.wait, 5)
+        writer._flusher.cancel()
+        results = await asyncio.wait_for(writes, 1)
+        release.set()
+
+    assert all(isinstance(result, BatchWriteInterrupted) for result in results)
+    assert writer._flusher is None
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_failed_batch_is_logged_once(writer_db, caplog):
+    message = SimpleNamespace(from_user=SimpleNamespace(id=1), text="Кофе 10; Чай 5", answer=AsyncMock())
+
+    with (
+        patch("src.batch_writer.get_expense_writer", return_value=ExpenseBatchWriter(db_path=writer_db)),
+        patch.object(db, "insert_expenses", side_effect=sqlite3.OperationalError("locked")),
+        caplog.at_level(logging.ERROR, logger="src.handlers"),
+    ):
+        await handlers.handle_text(message)
+
+    assert [record.getMessage() for record in caplog.records] == [strings.LOG_FAILED_INSERT % (1, "locked")]
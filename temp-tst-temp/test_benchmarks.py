@@ -0,0 +1,78 @@
+"""Tests for the benchmark suite harness."""
+
+import json
+import random
+
+import pytest
+
+from benchmarks import suite
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_make_message_has_exact_size_and_parses():
+    rng = random.Random(1)
+
+    for size in (1, 64, 4096):
+        assert len(suite.make_message(size, rng)) == size
+
+    costs, failed = suite.parse_multiple_expenses(suite.make_message(512, rng))
+    assert len(costs) > 10
+    assert len(failed) <= 1  # последняя строка может быть обрезана
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_measure_repeats_until_minimum_duration(monkeypatch):
+    monkeypatch.setattr(suite, "MIN_REPEAT_SECONDS", 0.001)
+    calls = []
+
+    result = suite.measure("noop", lambda: calls.append(1), repeat=3)
+
+    assert len(result.timings) == 3
+    assert result.number > 1
+    assert result.best <= result.median
+    assert result.to_dict()["repeat"] == 3
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_compare_reports_only_regressions_beyond_tolerance():
+    baseline = {"benchmarks": {"fast": {"best_us": 100.0}, "slow": {"best_us": 100.0}}}
+    report = {"benchmarks": {"fast": {"best_us": 120.0}, "slow": {"best_us": 200.0}, "new": {"best_us": 1.0}}}
+
+    regressions = suite.compare(report, baseline, tolerance=0.3)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("slow: 100.0 us -> 200.0 us")
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_main_fails_on_regression_and_writes_results(tmp_path, monkeypatch):
+    monkeypatch.setattr(suite, "MIN_REPEAT_SECONDS", 0.001)
+    output = tmp_path / "results.json"
+    baseline = tmp_path / "baseline.json"
+    name = "parse_multiple_expenses[64]"
+    args = ["-k", name, "--repeat", "1", "--output", str(output), "--baseline", str(baseline)]
+
+    assert suite.main([*args, "--save-baseline"]) == 0
+    assert list(json.loads(baseline.read_text())["benchmarks"]) == [name]
+
+    stored = json.loads(baseline.read_text())
+    stored["benchmarks"][name]["best_us"] = 0.001
+    baseline.write_text(json.dumps(stored))
+
+    assert suite.main(args) == 1
+    assert name in json.loads(output.read_text())["benchmarks"]
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_mixed_message_uses_all_separators():
+    message = suite.make_message(4096, random.Random(1), suite.MIXED_SEPARATORS)
+
+    assert len(message) == 4096
+    assert ";" in message and "\n" in message
+    costs, failed = suite.parse_multiple_expenses(message)
+    assert len(costs) == len(list(suite.iter_expenses(message))) - len(failed)
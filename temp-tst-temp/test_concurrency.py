@@ -0,0 +1,185 @@
+"""Tests for bounded-concurrency update processing."""
+
+import asyncio
+
+import pytest
+
+from src.concurrency import UpdateLimiter, run_outside_turn, wait_for_writes
+from src.exceptions import UpdateQueueFull
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_limiter_caps_in_flight_updates():
+    limiter = UpdateLimiter(max_in_flight=2, max_queued=10)
+    release = asyncio.Event()
+    peak = 0
+
+    async def work():
+        nonlocal peak
+        peak = max(peak, limiter.stats.in_flight)
+        await release.wait()
+
+    tasks = [asyncio.create_task(limiter.run(user_id, work)) for user_id in range(5)]
+    await asyncio.sleep(0)
+    assert limiter.stats.in_flight == 2
+    assert limiter.stats.queued == 3
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert peak == 2
+    stats = limiter.stats
+    assert (stats.in_flight, stats.queued, stats.processed) == (0, 0, 5)
+    assert stats.max_queued == 3
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_limiter_keeps_per_user_order():
+    limiter = UpdateLimiter(max_in_flight=4, max_queued=10)
+    order = []
+
+    async def work(tag, delay):
+        await asyncio.sleep(delay)
+        order.append(tag)
+
+    await asyncio.gather(
+        limiter.run(1, lambda: work("a1", 0.02)),
+        limiter.run(1, lambda: work("a2", 0)),
+        limiter.run(2, lambda: work("b1", 0)),
+    )
+
+    assert order.index("a1") < order.index("a2")
+    assert order[0] == "b1"
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_unlimited_limiter_still_keeps_per_user_order():
+    limiter = UpdateLimiter(max_in_flight=0, max_queued=10)
+    order = []
+
+    async def work(tag, delay):
+        await asyncio.sleep(delay)
+        order.append(tag)
+
+    await asyncio.gather(
+        limiter.run(1, lambda: work("a1", 0.1)),
+        limiter.run(1, lambda: work("a2", 0)),
+        *(limiter.run(user_id, lambda: work("other", 0.01)) for user_id in range(2, 12)),
+    )
+
+    assert order.index("a1") < order.index("a2")
+    assert order[:10] == ["other"] * 10
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_limiter_sheds_when_queue_is_full():
+    limiter = UpdateLimiter(max_in_flight=1, max_queued=1)
+    release = asyncio.Event()
+
+    running = asyncio.create_task(limiter.run(1, release.wait))
+    queued = asyncio.create_task(limiter.run(2, release.wait))
+    await asyncio.sleep(0)
+
+    with pytest.raises(UpdateQueueFull):
+        await limiter.run(3, release.wait)
+    assert limiter.stats.shed == 1
+
+    release.set()
+    await asyncio.gather(running, queued)
+    assert limiter.stats.processed == 2
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_limiter_releases_slots_on_error():
+    limiter = UpdateLimiter(max_in_flight=1, max_queued=1)
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await limiter.run(1, fail)
+
+    assert await limiter.run(1, lambda: asyncio.sleep(0, result="ok")) == "ok"
+    assert limiter.stats.in_flight == 0
+    assert limiter._users == {}
+
+
+async def run_user_updates(limiter, updates):
+    """
+    Запускает обновления одного пользователя по порядку поступления, держа первую запись незаконченной.
+    Возвращает обновления, начавшиеся за это время, и порядок ответов.
+    """
+    started, replies = [], []
+    write_started = asyncio.Event()
+    write_done = asyncio.Event()
+
+    async def write(tag):
+        started.append(tag)
+        write_started.set()
+        await run_outside_turn(write_done.wait())
+        replies.append(tag)
+
+    async def skip_write(tag):
+        started.append(tag)
+        await wait_for_writes()
+        replies.append(tag)
+
+    async def report(tag):
+        started.append(tag)
+        replies.append(tag)
+
+    kinds = {"write": (write, True), "skip": (skip_write, True), "report": (report, False)}
+    tasks = []
+    for tag, kind in updates:
+        func, may_write = kinds[kind]
+        tasks.append(asyncio.create_task(limiter.run(1, lambda func=func, tag=tag: func(tag), may_write=may_write)))
+    await write_started.wait()
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert replies == []
+    started_during_write = list(started)
+    write_done.set()
+    await asyncio.gather(*tasks)
+    return started_during_write, replies
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+@pytest.mark.parametrize("max_in_flight", (0, 1))
+async def test_update_queued_behind_write_waits_for_it(max_in_flight):
+    limiter = UpdateLimiter(max_in_flight=max_in_flight, max_queued=10)
+
+    started, replies = await run_user_updates(
+        limiter, [("A1 text", "write"), ("A2 report", "report"), ("A3 text", "write")]
+    )
+
+    assert started == ["A1 text"]
+    assert replies == ["A1 text", "A2 report", "A3 text"]
+    assert limiter._users == {}
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+@pytest.mark.parametrize("max_in_flight", (0, 1))
+async def test_later_writes_skip_ahead_and_reply_in_order(max_in_flight):
+    limiter = UpdateLimiter(max_in_flight=max_in_flight, max_queued=10)
+
+    started, replies = await run_user_updates(
+        limiter, [("A1 text", "write"), ("A2 text", "write"), ("A3 invalid", "skip"), ("A4 report", "report")]
+    )
+
+    # A2 и A3 начались, пока A1 ещё писал, но ответили после него; отчёт A4 ждал всех
+    assert started == ["A1 text", "A2 text", "A3 invalid"]
+    assert replies == ["A1 text", "A2 text", "A3 invalid", "A4 report"]
@@ -0,0 +1,70 @@
+"""Tests for the synthetic expense dataset generator."""
+
+import sqlite3
+from collections import Counter
+from datetime import date
+
+import pytest
+
+from benchmarks import dataset
+from src import db
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_same_seed_produces_same_rows():
+    spec = dataset.DatasetSpec(end=date(2024, 12, 31), years=1, users=3, per_day=2)
+
+    first = list(dataset.generate_rows(spec))
+
+    assert first == list(dataset.generate_rows(spec))
+    assert first != list(dataset.generate_rows(dataset.DatasetSpec(end=date(2024, 12, 31), years=1, seed=1)))
+    assert first[0][2] >= "2024-01-01" and first[-1][2] < "2025-01-01"
+    assert {user_id for *_, user_id in first} == {1, 2, 3}
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_rows_follow_seasonality_and_vocabulary():
+    vocabulary = (dataset.VocabularyItem("кофе", 200, 3), dataset.VocabularyItem("аренда", 30000, 1))
+    spec = dataset.DatasetSpec(end=date(2023, 12, 31), years=1, users=4, per_day=5, vocabulary=vocabulary)
+
+    rows = list(dataset.generate_rows(spec))
+    months = Counter(int(created_at[5:7]) for _, _, created_at, _ in rows)
+    coffee = sorted(amount for description, amount, _, _ in rows if description == "кофе")
+
+    assert months[12] > months[1] * 1.4
+    assert {description for description, *_ in rows} == {"кофе", "аренда"}
+    assert 150 < coffee[len(coffee) // 2] < 270
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_load_vocabulary(tmp_path):
+    path = tmp_path / "vocabulary.txt"
+    path.write_text("# описание;медиана;вес\nкофе; 250; 5\n\nтакси;600\n", encoding="utf-8")
+
+    assert dataset.load_vocabulary(str(path)) == (
+        dataset.VocabularyItem("кофе", 250, 5),
+        dataset.VocabularyItem("такси", 600, 1),
+    )
+
+    path.write_text("кофе\n", encoding="utf-8")
+    with pytest.raises(ValueError, match=":1:"):
+        dataset.load_vocabulary(str(path))
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_main_fills_database_readable_by_bot(tmp_path, capsys):
+    db_path = tmp_path / "expenses.db"
+
+    args = [str(db_path), "--years", "1", "--users", "2", "--per-day", "3", "--end", "2024-06-30"]
+    assert dataset.main(args) == 0
+    assert dataset.main([*args, "--replace"]) == 0
+
+    with sqlite3.connect(db_path) as conn:
+        count = conn.execute("SELECT COUNT(*) FROM expenses").fetchone()[0]
+    assert f"Inserted {count} expenses" in capsys.readouterr().out.splitlines()[-1]
+    assert db.get_month_summary(2024, 6, str(db_path)).count > 0
+    assert db.get_months_with_expenses(str(db_path))[0] == (2024, 6)
@@ -5,7 +5,7 @@ import pytest
 
 from src import handlers
 from src.db import init_db
-from src.strings import ERROR_ACCESS_DENIED, SUCCESS_SAVED_TEMPLATE
+from src.strings import SUCCESS_SAVED_TEMPLATE
 
 
 class DummyMessage:
@@ -22,20 +22,6 @@ class DummyMessage:
         return self._answers
 
 
-@pytest.mark.asyncio
-@pytest.mark.parametrize("message_text", ("/start", "Кофе 10"))
-async def test_access_denied(monkeypatch, message_text):
-    from src import auth
-
-    monkeypatch.setattr(auth, "is_user_allowed", lambda _uid: False)
-    msg = DummyMessage(user_id=1, text=message_text)
-    if message_text == "/start":
-        await handlers.handle_start(msg)
-    else:
-        await handlers.handle_text(msg)
-    assert msg.answers[-1] == ERROR_ACCESS_DENIED
-
-
 @pytest.mark.asyncio
 async def test_on_text_invalid_format(monkeypatch):
     from src import auth
@@ -52,7 +38,7 @@ async def test_on_text_success(monkeypatch):
     from src import auth, db
 
     monkeypatch.setattr(auth, "is_user_allowed", lambda _uid: True)
-    monkeypatch.setattr(db, "insert_expense", lambda **kwargs: 1)
+    monkeypatch.setattr(db, "insert_expenses", lambda rows, *args: [1] * len(rows))
     msg = DummyMessage(user_id=1, text="Кофе 12.5")
     await handlers.handle_text(msg)
     assert any(ans.startswith(SUCCESS_SAVED_TEMPLATE.split(": ")[0]) for ans in msg.answers)
@@ -89,7 +75,7 @@ async def test_e2e_multiple_expenses_success(monkeypatch):
     from src import auth, db
 
     monkeypatch.setattr(auth, "is_user_allowed", lambda _uid: True)
-    monkeypatch.setattr(db, "insert_expense", lambda **kwargs: 1)
+    monkeypatch.setattr(db, "insert_expenses", lambda rows, *args: [1] * len(rows))
     msg = DummyMessage(user_id=1, text="Кофе 3.5; Такси 250")
     await handlers.handle_text(msg)
 
@@ -103,13 +89,11 @@ async def test_e2e_multiple_expenses_success(monkeypatch):
 async def test_e2e_multiple_expenses_with_errors(monkeypatch):
     from src import auth, db
 
-    def mock_insert(description, amount, **kwargs):
-        if description == "Ошибка":
-            raise ValueError("Test error")
-        return 1
+    def mock_insert(rows, *args):
+        return [ValueError("Test error") if description == "Ошибка" else 1 for description, _, _ in rows]
 
     monkeypatch.setattr(auth, "is_user_allowed", lambda _uid: True)
-    monkeypatch.setattr(db, "insert_expense", mock_insert)
+    monkeypatch.setattr(db, "insert_expenses", mock_insert)
     msg = DummyMessage(user_id=1, text="Кофе 3.5; Ошибка 100; Такси 250")
     await handlers.handle_text(msg)
 
@@ -121,3 +105,20 @@ async def test_e2e_multiple_expenses_with_errors(monkeypatch):
     # Проверяем сообщение об ошибке
     assert any("Не удалось сохранить 1 записей" in ans for ans in msg.answers)
     assert any("Test error" in ans for ans in msg.answers)
+
+
+@pytest.mark.asyncio
+async def test_e2e_mixed_results_sent_as_single_message(monkeypatch):
+    from src import db
+
+    def mock_insert(rows, *args):
+        return [ValueError("Test error") if description == "Ошибка" else 1 for description, _, _ in rows]
+
+    monkeypatch.setattr(db, "insert_expenses", mock_insert)
+    msg = DummyMessage(user_id=1, text="Кофе 3.5; Ошибка 100; invalid")
+    await handlers.handle_text(msg)
+
+    assert len(msg.answers) == 1
+    assert "Кофе — 3.5" in msg.answers[0]
+    assert "Не удалось сохранить 1 записей" in msg.answers[0]
+    assert "Ошибки парсинга 1 записей" in msg.answers[0]
@@ -1,5 +1,6 @@
 """Tests for expense display functionality."""
 
+import time
 from datetime import datetime
 
 import pytest
@@ -144,7 +145,69 @@ def test_get_month_from_callback():
     assert year == prev_year
     assert month == prev_month
 
+    # Test compact month encoding
+    assert get_month_from_callback("m:202402") == (2024, 2)
+    with pytest.raises(ValueError):
+        get_month_from_callback("m:202413")
+
     # Test invalid callback
     year, month = get_month_from_callback("invalid")
     assert year == current_year
     assert month == current_month
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_format_expenses_for_display_structure():
+    """Test exact layout of the by-user and flat reports."""
+    expenses = [
+        Expense(1, "Кофе", 100.0, "2024-01-15T10:00:00+00:00", 123),
+        Expense(2, "Обед", 300.0, "2024-01-17T12:00:00+00:00", 456),
+        Expense(3, "Такси", 200.0, "2024-01-16T11:00:00+00:00", 123),
+        Expense(4, "Чай", 5.0, "bad-date", 456),
+    ]
+
+    assert format_expenses_for_display(expenses, 2024, 1) == (
+        "📊 Расходы за январь 2024:\n\n"
+        "👤 Пользователь 123:\n"
+        "  • Кофе — 100.00 ₽ (15.01)\n"
+        "  • Такси — 200.00 ₽ (16.01)\n"
+        "  💰 Итого: 300.00 ₽\n\n"
+        "👤 Пользователь 456:\n"
+        "  • Обед — 300.00 ₽ (17.01)\n"
+        "  • Чай — 5.00 ₽ (bad-date)\n"
+        "  💰 Итого: 305.00 ₽\n\n"
+        "\n💰 Итого: 605.00 ₽"
+    )
+    assert format_expenses_for_display(expenses, 2024, 1, show_by_user=False) == (
+        "📊 Расходы за январь 2024:\n\n"
+        "  • Кофе — 100.00 ₽ (15.01)\n"
+        "  • Обед — 300.00 ₽ (17.01)\n"
+        "  • Такси — 200.00 ₽ (16.01)\n"
+        "  • Чай — 5.00 ₽ (bad-date)\n"
+        "\n💰 Итого: 605.00 ₽"
+    )
+
+
+@pytest.mark.slow
+@pytest.mark.unit
+def test_format_expenses_for_display_scales_linearly():
+    """Rendering 100k rows should take about 10x as long as 10k rows, not 100x."""
+
+    def make_expenses(count):
+        return [
+            Expense(i, f"Покупка {i}", i * 1.5, f"2024-01-{1 + i % 28:02d}T10:00:00+00:00", i % 4) for i in range(count)
+        ]
+
+    def best_time(expenses):
+        timings = []
+        for _ in range(3):
+            started = time.perf_counter()
+            format_expenses_for_display(expenses, 2024, 1)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    small, large = make_expenses(10_000), make_expenses(100_000)
+    ratio = best_time(large) / best_time(small)
+
+    assert ratio < 20, f"100k/10k rendering time ratio is {ratio:.1f}"
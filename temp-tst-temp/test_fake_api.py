@@ -0,0 +1,137 @@
+"""Full-stack tests against the local Bot API stand-in server."""
+
+import asyncio
+import sqlite3
+
+import pytest
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter, TelegramServerError
+
+from benchmarks.fake_api import FakeApiConfig, FakeBotApi
+from src import auth, bot as bot_module, config, db, strings
+
+TOKEN = "123456:fake"
+
+
+@pytest.fixture
+async def api():
+    server = FakeBotApi()
+    await server.start()
+    yield server
+    await server.stop()
+
+
+@pytest.fixture
+async def plain_bot(api):
+    bot = Bot(TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(api.base_url)))
+    yield bot
+    await bot.session.close()
+
+
+async def wait_for(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_bot_api_base_url_from_env(monkeypatch):
+    monkeypatch.setenv("BOT_TOKEN", TOKEN)
+    monkeypatch.setenv("BOT_API_BASE_URL", "http://127.0.0.1:8081/")
+
+    bot = bot_module.create_bot()
+
+    assert config.get_bot_api_base_url() == "http://127.0.0.1:8081"
+    assert bot.session.api.api_url(TOKEN, "getMe") == f"http://127.0.0.1:8081/bot{TOKEN}/getMe"
+
+
+@pytest.mark.slow
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_send_and_edit_message_round_trip(api, plain_bot):
+    sent = await plain_bot.send_message(42, "hello")
+    edited = await plain_bot.edit_message_text("edited", chat_id=42, message_id=sent.message_id)
+    assert await plain_bot.answer_callback_query("1") is True
+
+    assert edited.message_id == sent.message_id
+    assert [message["text"] for message in api.messages] == ["hello", "edited"]
+    assert api.calls == {"sendMessage": 1, "editMessageText": 1, "answerCallbackQuery": 1}
+
+
+@pytest.mark.slow
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_injected_errors_map_to_aiogram_exceptions(api, plain_bot):
+    api.inject_error("sendMessage", 429, "Too Many Requests: retry after 3", retry_after=3)
+    api.inject_error("sendMessage", 400, "Bad Request: chat not found")
+
+    with pytest.raises(TelegramRetryAfter) as retry:
+        await plain_bot.send_message(1, "a")
+    with pytest.raises(TelegramBadRequest):
+        await plain_bot.send_message(1, "b")
+    await plain_bot.send_message(1, "c")
+
+    assert retry.value.retry_after == 3
+    assert [message["text"] for message in api.messages] == ["c"]
+
+
+@pytest.mark.slow
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_error_rate_and_chat_rate_limit(plain_bot, api):
+    api.config = FakeApiConfig(error_rate=1.0)
+    with pytest.raises(TelegramServerError):
+        await plain_bot.send_message(1, "a")
+
+    api.config = FakeApiConfig(chat_rate=0.001, chat_burst=1, retry_after=7)
+    await plain_bot.send_message(1, "b")
+    await plain_bot.send_message(2, "c")
+    with pytest.raises(TelegramRetryAfter) as retry:
+        await plain_bot.send_message(1, "d")
+
+    assert retry.value.retry_after == 7
+
+
+@pytest.mark.slow
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_get_updates_long_polls_and_honours_offset(api, plain_bot):
+    waiter = asyncio.create_task(plain_bot.get_updates(offset=0, timeout=5))
+    await asyncio.sleep(0.05)
+    update_id = api.push_message(7, "кофе 100")
+
+    [update] = await waiter
+    assert update.update_id == update_id
+    assert update.message.text == "кофе 100"
+
+    assert await plain_bot.get_updates(offset=update_id + 1, timeout=0) == []
+
+
+@pytest.mark.slow
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_bot_handles_update_over_http(api, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("BOT_TOKEN", TOKEN)
+    monkeypatch.setenv("BOT_API_BASE_URL", api.base_url)
+    monkeypatch.setattr(auth, "_allow_list", auth.AllowList())
+    db.init_db()
+    bot = bot_module.create_bot()
+    dp = bot_module.create_dispatcher()
+    polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, polling_timeout=1))
+
+    api.push_message(7, "кофе 100\nтакси 250")
+    await wait_for(lambda: api.messages)
+    await dp.stop_polling()
+    await polling
+
+    [reply] = api.messages
+    assert reply["chat_id"] == 7
+    assert strings.SUCCESS_SAVED_TEMPLATE.format(description="такси", amount_str="250") in reply["text"]
+    conn = sqlite3.connect(tmp_path / "expenses.db")
+    assert conn.execute("SELECT COUNT(*) FROM expenses WHERE user_id = 7").fetchone()[0] == 2
+    conn.close()
@@ -3,7 +3,14 @@
 import pytest
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
-from src.keyboards import get_back_to_menu_keyboard, get_main_keyboard, get_month_selection_keyboard
+from src.callback_data import PageCursor, ReportPageRequest, pack_report_page
+from src.keyboards import (
+    get_back_to_menu_keyboard,
+    get_main_keyboard,
+    get_month_picker_keyboard,
+    get_month_selection_keyboard,
+    get_report_page_keyboard,
+)
 
 
 @pytest.mark.fast
@@ -29,7 +36,7 @@ def test_get_month_selection_keyboard():
     keyboard = get_month_selection_keyboard()
 
     assert isinstance(keyboard, InlineKeyboardMarkup)
-    assert len(keyboard.inline_keyboard) == 4  # 4 rows
+    assert len(keyboard.inline_keyboard) == 5  # 5 rows
 
     # Check first row (current month)
     assert len(keyboard.inline_keyboard[0]) == 1
@@ -46,10 +53,15 @@ def test_get_month_selection_keyboard():
     assert keyboard.inline_keyboard[2][0].text == "📅 Предыдущий месяц"
     assert keyboard.inline_keyboard[2][0].callback_data == "month_previous"
 
-    # Check fourth row (back to menu)
+    # Check fourth row (month picker)
     assert len(keyboard.inline_keyboard[3]) == 1
-    assert keyboard.inline_keyboard[3][0].text == "🔙 Назад в меню"
-    assert keyboard.inline_keyboard[3][0].callback_data == "back_to_menu"
+    assert keyboard.inline_keyboard[3][0].text == "📆 Другой месяц"
+    assert keyboard.inline_keyboard[3][0].callback_data == "months"
+
+    # Check fifth row (back to menu)
+    assert len(keyboard.inline_keyboard[4]) == 1
+    assert keyboard.inline_keyboard[4][0].text == "🔙 Назад в меню"
+    assert keyboard.inline_keyboard[4][0].callback_data == "back_to_menu"
 
 
 @pytest.mark.fast
@@ -66,3 +78,32 @@ def test_get_back_to_menu_keyboard():
     assert isinstance(button, InlineKeyboardButton)
     assert button.text == "🔙 Назад в меню"
     assert button.callback_data == "back_to_menu"
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_get_report_page_keyboard():
+    """Test report page navigation keyboard."""
+    prev_request = ReportPageRequest(2024, 1, 1, PageCursor("2024-01-02T00:00:00+00:00", 5), older=False)
+    next_request = ReportPageRequest(2024, 1, 3, PageCursor("2024-01-01T00:00:00+00:00", 1), older=True)
+
+    keyboard = get_report_page_keyboard(prev_request, next_request)
+
+    assert [button.text for button in keyboard.inline_keyboard[0]] == ["◀", "▶"]
+    assert keyboard.inline_keyboard[0][1].callback_data == pack_report_page(next_request)
+    assert keyboard.inline_keyboard[-1][0].callback_data == "back_to_menu"
+
+    keyboard = get_report_page_keyboard(None, None)
+    assert len(keyboard.inline_keyboard) == 1
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_get_month_picker_keyboard():
+    """Test month picker keyboard creation."""
+    keyboard = get_month_picker_keyboard(2024, [1, 2, 5, 11], older_year=2023, newer_year=None)
+
+    assert [button.text for button in keyboard.inline_keyboard[0]] == ["Январь", "Февраль", "Май"]
+    assert [button.callback_data for button in keyboard.inline_keyboard[1]] == ["m:202411"]
+    assert keyboard.inline_keyboard[2][0].callback_data == "mp:2023"
+    assert keyboard.inline_keyboard[3][0].callback_data == "view_expenses"
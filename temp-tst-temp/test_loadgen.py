@@ -0,0 +1,70 @@
+"""Tests for the end-to-end load generator."""
+
+import random
+
+import pytest
+
+from benchmarks import loadgen
+from src import auth
+
+
+@pytest.fixture
+def loadgen_env(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("BOT_TOKEN", loadgen.LOADGEN_TOKEN)
+    monkeypatch.setenv("RATE_LIMIT_BURST", "0")
+    monkeypatch.setenv("OUTBOUND_GLOBAL_RATE", "10000")
+    monkeypatch.setenv("OUTBOUND_CHAT_RATE", "10000")
+    monkeypatch.setenv("OUTBOUND_CHAT_BURST", "10000")
+    monkeypatch.setattr(auth, "_allow_list", auth.AllowList())
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_parse_mix_normalizes_weights_and_rejects_unknown_kinds():
+    assert loadgen.parse_mix("single=3,report=1") == {"single": 0.75, "report": 0.25}
+
+    with pytest.raises(ValueError):
+        loadgen.parse_mix("single=1,upload=1")
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_step_result_percentiles():
+    result = loadgen.StepResult(rate=10, sent=100, completed=100, elapsed=10.0)
+    result.latencies = [index / 1000 for index in range(1, 101)]
+
+    data = result.to_dict()
+
+    assert data["throughput"] == 10.0
+    assert data["p50_ms"] == pytest.approx(50.5)
+    assert data["p99_ms"] == pytest.approx(99.01)
+    assert data["max_ms"] == 100.0
+
+
+@pytest.mark.slow
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_run_feeds_updates_through_real_dispatcher(loadgen_env):
+    mix = loadgen.parse_mix("single=5,multi=3,report=2")
+
+    [result] = await loadgen.run([200], duration=0.3, users=5, mix=mix, latency=0.001, jitter=0.5)
+
+    assert result.sent > 0
+    assert result.completed == result.sent
+    assert result.errors == 0
+    assert result.expenses >= result.api_calls["sendMessage"]
+    assert result.api_calls.get("editMessageText", 0) == result.api_calls.get("answerCallbackQuery", 0)
+    assert len(result.latencies) == result.sent
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_fake_session_counts_rejections():
+    session = loadgen.FakeSession(rng=random.Random(1))
+    method = loadgen.SendMessage(chat_id=1, text=loadgen.strings.ERROR_OVERLOADED)
+
+    result = session._result(method)
+
+    assert result["chat"]["id"] == 1
+    assert session.rejections == {"overloaded": 1}
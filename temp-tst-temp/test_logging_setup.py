@@ -0,0 +1,120 @@
+"""Tests for queue-based logging."""
+
+import json
+import logging
+import sys
+import threading
+
+import pytest
+
+from src import config, logging_setup
+
+
+class ThreadRecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+        self.threads.add(threading.current_thread().name)
+
+
+class CountingArg:
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "arg"
+
+
+@pytest.fixture
+def queue_logging():
+    logging_setup.configure(logging.INFO)
+    yield logging.getLogger("test.logging_setup")
+    logging_setup.stop()
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_json_formatter_outputs_structured_record():
+    record = logging.makeLogRecord(
+        {"name": "src.db", "levelname": "INFO", "msg": "Inserted [%s]", "args": (3,), "trace_id": "ab"}
+    )
+
+    payload = json.loads(logging_setup.JsonFormatter().format(record))
+
+    assert payload["level"] == "INFO"
+    assert payload["logger"] == "src.db"
+    assert payload["message"] == "Inserted [3]"
+    assert payload["trace_id"] == "ab"
+    assert "ts" in payload
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_json_formatter_includes_exception():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.makeLogRecord({"msg": "failed", "exc_info": sys.exc_info()})
+
+    payload = json.loads(logging_setup.JsonFormatter().format(record))
+
+    assert "ValueError: boom" in payload["exc_info"]
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_records_are_formatted_on_listener_thread(queue_logging):
+    recorder = ThreadRecordingHandler()
+    logging_setup._listener.handlers = (*logging_setup._listener.handlers, recorder)
+
+    queue_logging.info("Saved [%s] for user_id=[%s]", "Кофе", 1)
+    logging_setup.stop()
+
+    assert recorder.messages == ["Saved [Кофе] for user_id=[1]"]
+    assert threading.current_thread().name not in recorder.threads
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_mutable_arguments_are_captured_when_logged(queue_logging):
+    recorder = ThreadRecordingHandler()
+    logging_setup._listener.handlers = (*logging_setup._listener.handlers, recorder)
+    costs = [("Кофе", 100.0)]
+
+    queue_logging.info("Costs [%s], total [%.2f], user [%d]", costs, 100.0, 1)
+    costs.append(("Чай", 50.0))
+    queue_logging.info("Costs [%(costs)s]", {"costs": costs})
+    logging_setup.stop()
+
+    assert recorder.messages == [
+        "Costs [[('Кофе', 100.0)]], total [100.00], user [1]",
+        "Costs [[('Кофе', 100.0), ('Чай', 50.0)]]",
+    ]
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_disabled_debug_does_not_format_arguments(queue_logging):
+    arg = CountingArg()
+
+    queue_logging.debug("Value: [%s]", arg)
+
+    assert arg.calls == 0
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_setup_logging_replaces_previous_queue_handler(monkeypatch):
+    monkeypatch.setenv("LOG_FORMAT", "json")
+    config.setup_logging()
+    config.setup_logging()
+
+    handlers = [h for h in logging.getLogger().handlers if isinstance(h, logging_setup.RecordQueueHandler)]
+    assert len(handlers) == 1
+    assert isinstance(logging_setup._listener.handlers[0].formatter, logging_setup.JsonFormatter)
+    logging_setup.stop()
@@ -0,0 +1,117 @@
+"""Tests for the event loop stall watchdog."""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+
+import pytest
+
+from src import loop_watchdog, metrics
+
+
+def block_the_loop(seconds):
+    time.sleep(seconds)  # blocking call the watchdog must point at
+
+
+BLOCKING_LINE = block_the_loop.__code__.co_firstlineno + 1
+THIS_FILE = os.path.relpath(os.path.abspath(__file__), loop_watchdog._PROJECT_ROOT)
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_frame_location_points_at_project_code():
+    location = loop_watchdog.frame_location(sys._getframe())
+
+    assert location.startswith(f"{THIS_FILE}:")
+    assert location.endswith("(test_frame_location_points_at_project_code)")
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_blocking_call_is_reported_with_file_and_line(caplog):
+    watchdog = loop_watchdog.LoopWatchdog(threshold=0.03, sample_interval=0.005)
+    location = f"{THIS_FILE}:{BLOCKING_LINE} (block_the_loop)"
+    before = metrics.EVENT_LOOP_BLOCKS.get(location=location)
+
+    watchdog.start()
+    try:
+        await asyncio.sleep(0.05)
+        with caplog.at_level(logging.WARNING, logger="src.loop_watchdog"):
+            block_the_loop(0.2)
+            await asyncio.sleep(0.1)
+    finally:
+        await watchdog.stop()
+
+    [block] = watchdog.recent
+    assert block.location == location
+    assert 0.1 < block.duration < 0.5
+    assert block.samples > 1
+    assert "block_the_loop" in block.stack
+    assert metrics.EVENT_LOOP_BLOCKS.get(location=location) == before + 1
+    assert metrics.EVENT_LOOP_BLOCKED_SECONDS.get(location=location) >= block.duration
+    assert watchdog.stats.blocks == 1
+    assert location in caplog.text
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_idle_loop_reports_nothing():
+    watchdog = loop_watchdog.LoopWatchdog(threshold=0.05)
+
+    watchdog.start()
+    await asyncio.sleep(0.2)
+    await watchdog.stop()
+
+    assert watchdog.stats.blocks == 0
+    assert not watchdog.recent
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_disabled_by_zero_threshold(monkeypatch):
+    monkeypatch.setenv("LOOP_BLOCK_THRESHOLD_MS", "0")
+
+    assert loop_watchdog.start_from_config() is None
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_long_stall_is_reported_before_it_ends(caplog):
+    watchdog = loop_watchdog.LoopWatchdog(threshold=0.01, sample_interval=0.005)
+
+    watchdog.start()
+    try:
+        await asyncio.sleep(0.03)
+        with caplog.at_level(logging.WARNING, logger="src.loop_watchdog"):
+            block_the_loop(0.3)
+            unblocked_at = time.time()
+            await asyncio.sleep(0.05)
+    finally:
+        await watchdog.stop()
+
+    [ongoing] = [record for record in caplog.records if "still blocked" in record.getMessage()]
+    assert ongoing.created < unblocked_at
+    assert f"{THIS_FILE}:{BLOCKING_LINE} (block_the_loop)" in ongoing.getMessage()
+    assert watchdog.stats.blocks == 1
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_stall_in_progress_is_recorded_on_stop():
+    watchdog = loop_watchdog.LoopWatchdog(threshold=0.03, sample_interval=0.005)
+
+    watchdog.start()
+    await asyncio.sleep(0.05)
+    block_the_loop(0.2)
+    await watchdog.stop()
+
+    [block] = watchdog.recent
+    assert block.location.endswith(f":{BLOCKING_LINE} (block_the_loop)")
+    assert block.duration > 0.1
@@ -61,6 +61,7 @@ def test_allowlist_empty_all_allowed(monkeypatch):
     from src import auth
 
     monkeypatch.setenv("ALLOWED_USER_IDS", "")
+    auth.reload_allow_list()
     assert auth.is_user_allowed(123)
 
 
@@ -72,6 +73,7 @@ def test_allowlist_specific_only_allowed(monkeypatch):
     from src import auth
 
     monkeypatch.setenv("ALLOWED_USER_IDS", "1, 2,3")
+    auth.reload_allow_list()
     assert auth.is_user_allowed(1)
     assert auth.is_user_allowed(2)
     assert auth.is_user_allowed(3)
@@ -120,3 +122,29 @@ def test_parse_multiple_expenses_invalid():
     costs, failed = parsing.parse_multiple_expenses("Кофе 3.5; invalid; Такси 250")
     assert costs == [("Кофе", 3.5), ("Такси", 250.0)]
     assert len(failed) == 1  # "invalid" не парсится
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_parse_multiple_expenses_mixed_separators():
+    costs, failed = parsing.parse_multiple_expenses("Кофе 3.5; Такси 250\nОбед 12,40;;\n\nУжин 15.5")
+    assert costs == [("Кофе", 3.5), ("Такси", 250.0), ("Обед", 12.40), ("Ужин", 15.5)]
+    assert failed == []
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_iter_expenses_reports_positions_lazily():
+    text = "Кофе 3.5; invalid\n\n  Такси 250;Обед 12,40"
+    entries = parsing.iter_expenses(text)
+
+    first = next(entries)
+    assert (first.line, first.offset, first.text, first.cost) == (1, 0, "Кофе 3.5", ("Кофе", 3.5))
+
+    rest = list(entries)
+    assert [(entry.line, entry.text) for entry in rest] == [(1, "invalid"), (3, "Такси 250"), (3, "Обед 12,40")]
+    assert rest[0].cost is None and rest[0].error
+    for entry in rest:
+        start = entry.offset
+        assert text[start:].lstrip().startswith(entry.text)
+    assert [entry.cost for entry in rest[1:]] == [("Такси", 250.0), ("Обед", 12.40)]
@@ -0,0 +1,190 @@
+"""Tests for metrics, the metrics middlewares and the /metrics and /healthz endpoints."""
+
+import asyncio
+import sqlite3
+from dataclasses import dataclass
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.methods import SendMessage
+from aiohttp.test_utils import TestClient, TestServer
+
+from src import db, metrics, metrics_server, middlewares
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_counter_renders_labelled_samples():
+    counter = metrics.Counter("test_total", "Test counter.", ("kind",))
+    counter.inc(kind="a")
+    counter.inc(2, kind='b"')
+
+    assert list(counter.render()) == [
+        "# HELP test_total Test counter.",
+        "# TYPE test_total counter",
+        'test_total{kind="a"} 1',
+        'test_total{kind="b\\""} 2',
+    ]
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("test_seconds", "Test histogram.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+
+    lines = list(histogram.render())
+
+    assert lines[2:] == [
+        'test_seconds_bucket{le="0.1"} 1',
+        'test_seconds_bucket{le="1.0"} 2',
+        'test_seconds_bucket{le="+Inf"} 3',
+        "test_seconds_sum 5.55",
+        "test_seconds_count 3",
+    ]
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_histogram_timer_works_as_decorator():
+    histogram = metrics.Histogram("test_seconds", "Test histogram.", ("query",))
+
+    @histogram.time(query="select")
+    def query():
+        return "rows"
+
+    assert query() == "rows"
+    assert query() == "rows"
+    assert histogram.get_count(query="select") == 2
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_metric_rejects_unknown_labels():
+    with pytest.raises(ValueError):
+        metrics.Counter("test_total", "Test counter.", ("kind",)).inc(other="x")
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_metric_without_samples_cannot_be_created():
+    class Untyped(metrics._Metric):
+        type_name = "untyped"
+
+    with pytest.raises(TypeError):
+        Untyped("test_untyped", "Test metric.")
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_registry_renders_stats_snapshot_as_gauges():
+    @dataclass
+    class Stats:
+        hits: int = 3
+        ratio: float = 0.5
+
+    registry = metrics.Registry()
+    registry.register_stats("test_cache", Stats)
+
+    assert registry.render() == (
+        "# TYPE test_cache_hits gauge\ntest_cache_hits 3\n# TYPE test_cache_ratio gauge\ntest_cache_ratio 0.5\n"
+    )
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_db_calls_are_timed(tmp_path):
+    before = metrics.DB_QUERY_DURATION.get_count(query="get_months_with_expenses")
+    db_path = str(tmp_path / "expenses.db")
+    db.init_db(db_path)
+
+    db.get_months_with_expenses(db_path)
+
+    assert metrics.DB_QUERY_DURATION.get_count(query="get_months_with_expenses") == before + 1
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_handler_metrics_middleware_records_latency_and_errors():
+    async def handle_test(_event, _data):
+        raise RuntimeError("boom")
+
+    data = {"handler": SimpleNamespace(callback=handle_test)}
+    before = metrics.HANDLER_ERRORS.get(handler="handle_test")
+
+    with pytest.raises(RuntimeError):
+        await middlewares.HandlerMetricsMiddleware()(handle_test, object(), data)
+
+    assert metrics.HANDLER_ERRORS.get(handler="handle_test") == before + 1
+    assert metrics.HANDLER_DURATION.get_count(handler="handle_test") >= 1
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_api_metrics_middleware_records_request_latency():
+    before = metrics.API_REQUEST_DURATION.get_count(method="SendMessage")
+    make_request = AsyncMock(return_value="response")
+
+    result = await middlewares.ApiMetricsMiddleware()(make_request, object(), SendMessage(chat_id=1, text="hi"))
+
+    assert result == "response"
+    assert metrics.API_REQUEST_DURATION.get_count(method="SendMessage") == before + 1
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_metrics_endpoint_serves_prometheus_text():
+    metrics.PARSE_FAILURES.inc()
+    async with TestClient(TestServer(metrics_server.create_app())) as client:
+        response = await client.get("/metrics")
+        text = await response.text()
+
+    assert response.status == 200
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE bot_parse_failures_total counter" in text
+    assert "bot_report_cache_hits" in text
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+@pytest.mark.parametrize("healthy", (True, False))
+async def test_healthz_reports_database_reachability(monkeypatch, healthy):
+    def check_connection():
+        if not healthy:
+            raise sqlite3.OperationalError("no such table: expenses")
+
+    monkeypatch.setattr(db, "check_connection", check_connection)
+    async with TestClient(TestServer(metrics_server.create_app())) as client:
+        response = await client.get("/healthz")
+
+    assert response.status == (200 if healthy else 503)
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_check_connection_requires_initialized_database(tmp_path):
+    db_path = str(tmp_path / "expenses.db")
+    with pytest.raises(sqlite3.Error):
+        db.check_connection(db_path)
+
+    db.init_db(db_path)
+    db.check_connection(db_path)
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_event_loop_lag_monitor_observes_samples():
+    before = metrics.EVENT_LOOP_LAG.get_count()
+    task = asyncio.create_task(metrics_server.monitor_event_loop_lag(interval=0.01))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert metrics.EVENT_LOOP_LAG.get_count() > before
@@ -0,0 +1,184 @@
+"""Tests for dispatcher middlewares."""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.types import Update
+
+from src import auth, metrics, middlewares
+from src.bot import create_dispatcher
+from src.concurrency import UpdateLimiter
+from src.rate_limit import RateLimiter
+from src.strings import ERROR_ACCESS_DENIED, ERROR_OVERLOADED, ERROR_RATE_LIMITED
+
+
+def make_update(with_message: bool = True):
+    update = MagicMock(spec=Update)
+    update.message = MagicMock() if with_message else None
+    update.callback_query = None if with_message else MagicMock()
+    target = update.message if with_message else update.callback_query
+    target.answer = AsyncMock()
+    return update, target
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_auth_middleware_passes_allowed_user(monkeypatch):
+    monkeypatch.setattr(auth, "is_user_allowed", lambda _uid: True)
+    handler = AsyncMock(return_value="handled")
+    update, _ = make_update()
+
+    result = await middlewares.AuthMiddleware()(handler, update, {"event_from_user": SimpleNamespace(id=1)})
+
+    assert result == "handled"
+    handler.assert_awaited_once()
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+@pytest.mark.parametrize("with_message", (True, False))
+async def test_auth_middleware_rejects_denied_user(monkeypatch, with_message):
+    monkeypatch.setattr(auth, "is_user_allowed", lambda _uid: False)
+    handler = AsyncMock()
+    update, target = make_update(with_message)
+
+    await middlewares.AuthMiddleware()(handler, update, {"event_from_user": SimpleNamespace(id=1)})
+
+    handler.assert_not_awaited()
+    target.answer.assert_awaited_once_with(ERROR_ACCESS_DENIED)
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_auth_middleware_coalesces_denied_replies(monkeypatch):
+    monkeypatch.setattr(auth, "is_user_allowed", lambda _uid: False)
+    middleware = middlewares.AuthMiddleware(reply_cooldown=60)
+    update, target = make_update()
+
+    before = metrics.ACCESS_DENIED.get()
+
+    for _ in range(5):
+        await middleware(AsyncMock(), update, {"event_from_user": SimpleNamespace(id=1)})
+
+    target.answer.assert_awaited_once_with(ERROR_ACCESS_DENIED)
+    assert metrics.ACCESS_DENIED.get() == before + 5
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_request_context_middleware_attaches_context():
+    seen = {}
+
+    async def handler(event, data):
+        seen.update(data)
+
+    await middlewares.RequestContextMiddleware()(handler, MagicMock(), {"event_from_user": SimpleNamespace(id=42)})
+
+    context = seen["request_context"]
+    assert isinstance(context, middlewares.RequestContext)
+    assert context.user_id == 42
+    assert len(context.trace_id) == 16
+    assert context.elapsed >= 0
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_rate_limit_middleware_drops_and_warns_once():
+    middleware = middlewares.RateLimitMiddleware(RateLimiter(burst=2, rate=0.001))
+    handler = AsyncMock()
+    update, target = make_update()
+    data = {"event_from_user": SimpleNamespace(id=1)}
+
+    for _ in range(5):
+        await middleware(handler, update, data)
+
+    assert handler.await_count == 2
+    target.answer.assert_awaited_once_with(ERROR_RATE_LIMITED)
+    assert middleware.limiter.stats.throttled == 3
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_concurrency_middleware_passes_update_through():
+    middleware = middlewares.ConcurrencyLimitMiddleware(UpdateLimiter(max_in_flight=1, max_queued=1))
+    handler = AsyncMock(return_value="handled")
+    update, _ = make_update()
+
+    result = await middleware(handler, update, {"event_from_user": SimpleNamespace(id=1)})
+
+    assert result == "handled"
+    handler.assert_awaited_once()
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_concurrency_middleware_sheds_with_polite_reply():
+    limiter = UpdateLimiter(max_in_flight=1, max_queued=0)
+    middleware = middlewares.ConcurrencyLimitMiddleware(limiter)
+    handler = AsyncMock()
+    update, target = make_update()
+
+    result = await middleware(handler, update, {"event_from_user": SimpleNamespace(id=1)})
+
+    assert result is None
+    handler.assert_not_awaited()
+    target.answer.assert_awaited_once_with(ERROR_OVERLOADED)
+    assert limiter.stats.shed == 1
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_auth_middleware_answers_callbacks_during_cooldown(monkeypatch):
+    monkeypatch.setattr(auth, "is_user_allowed", lambda _uid: False)
+    middleware = middlewares.AuthMiddleware(reply_cooldown=60)
+    update, target = make_update(with_message=False)
+
+    for _ in range(3):
+        await middleware(AsyncMock(), update, {"event_from_user": SimpleNamespace(id=1)})
+
+    assert [call.args for call in target.answer.await_args_list] == [(ERROR_ACCESS_DENIED,), (), ()]
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_rate_limit_middleware_answers_every_dropped_callback():
+    middleware = middlewares.RateLimitMiddleware(RateLimiter(burst=1, rate=0.001))
+    update, target = make_update(with_message=False)
+    data = {"event_from_user": SimpleNamespace(id=1)}
+
+    for _ in range(3):
+        await middleware(AsyncMock(), update, data)
+
+    assert [call.args for call in target.answer.await_args_list] == [(ERROR_RATE_LIMITED,), ()]
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_dispatcher_rejects_denied_users_before_tracing():
+    outer = [
+        item for item in create_dispatcher().update.outer_middleware if type(item).__module__ == middlewares.__name__
+    ]
+
+    assert isinstance(outer[0], middlewares.AuthMiddleware)
+    assert isinstance(outer[1], middlewares.TracingMiddleware)
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.parametrize(("text", "expected"), [("Кофе 100", True), ("/start", False), (None, False)])
+def test_may_write_expenses_only_for_text_messages(text, expected):
+    update, _ = make_update()
+    update.message.text = text
+
+    assert middlewares.may_write_expenses(update) is expected
+    assert middlewares.may_write_expenses(make_update(with_message=False)[0]) is False
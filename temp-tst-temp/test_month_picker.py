@@ -0,0 +1,98 @@
+"""Tests for arbitrary month navigation."""
+
+import sqlite3
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiogram.types import CallbackQuery, Message
+
+from src import db, reports, strings
+from src.callback_data import pack_month, pack_month_picker, unpack_month, unpack_month_picker
+from src.handlers import handle_month_picker_callback
+
+
+@pytest.fixture()
+def picker_db(tmp_path):
+    db_path = str(tmp_path / "expenses.db")
+    db.init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    dates = ["2023-11-30T23:59:59+00:00", "2024-01-01T00:00:00+00:00", "2024-01-20T10:00:00+00:00"]
+    dates += ["2024-03-05T10:00:00+00:00"]
+    conn.executemany(strings.DB_INSERT_SQL, [("Расход", 1.0, created_at, 1) for created_at in dates])
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+@pytest.fixture
+def picker_callback():
+    callback = MagicMock(spec=CallbackQuery)
+    callback.from_user = MagicMock(id=1)
+    callback.answer = AsyncMock()
+    callback.message = MagicMock(spec=Message)
+    callback.message.edit_text = AsyncMock()
+    return callback
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_month_callback_round_trip():
+    assert pack_month(2024, 3) == "m:202403"
+    assert unpack_month("m:202403") == (2024, 3)
+    assert unpack_month_picker(pack_month_picker(2023)) == 2023
+    for data in ("m:2024", "m:202400", "x:202401", "m:2024011"):
+        with pytest.raises(ValueError):
+            unpack_month(data)
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_get_months_with_expenses(picker_db, tmp_path):
+    assert db.get_months_with_expenses(picker_db) == [(2024, 3), (2024, 1), (2023, 11)]
+
+    empty_path = str(tmp_path / "empty.db")
+    db.init_db(empty_path)
+    assert db.get_months_with_expenses(empty_path) == []
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_months_list_is_cached_until_insert(picker_db):
+    original = db.get_months_with_expenses
+    with patch("src.reports.db.get_months_with_expenses", side_effect=lambda: original(picker_db)) as query:
+        assert await reports.get_months_with_expenses() == [(2024, 3), (2024, 1), (2023, 11)]
+        await reports.get_months_with_expenses()
+        assert query.call_count == 1
+
+        db.insert_expense("Кофе", 1.0, user_id=1, db_path=picker_db)
+        months = await reports.get_months_with_expenses()
+        assert query.call_count == 2
+        assert len(months) == 4
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_month_picker_shows_latest_year(picker_db, picker_callback):
+    picker_callback.data = "months"
+    original = db.get_months_with_expenses
+    with patch("src.reports.db.get_months_with_expenses", side_effect=lambda: original(picker_db)):
+        await handle_month_picker_callback(picker_callback)
+
+    text = picker_callback.message.edit_text.call_args[0][0]
+    keyboard = picker_callback.message.edit_text.call_args[1]["reply_markup"]
+    assert "2024" in text
+    assert [button.callback_data for button in keyboard.inline_keyboard[0]] == ["m:202401", "m:202403"]
+    assert keyboard.inline_keyboard[1][0].callback_data == "mp:2023"
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_month_picker_empty(picker_callback):
+    picker_callback.data = "months"
+    with patch("src.reports.db.get_months_with_expenses", return_value=[]):
+        await handle_month_picker_callback(picker_callback)
+
+    assert picker_callback.message.edit_text.call_args[0][0] == strings.MONTH_PICKER_EMPTY_TEXT
@@ -6,7 +6,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
 from aiogram.types import CallbackQuery, Message, User
 
-from src.db import Expense
+from src.db import Expense, MonthSummary
 from src.handlers import handle_month_selection_callback
 
 
@@ -69,10 +69,9 @@ async def test_monthly_report_with_multiple_users(mock_callback_with_user):
     ]
 
     with (
-        patch("src.handlers.auth.is_user_allowed", return_value=True),
-        patch("src.handlers.db.get_expenses_by_month", return_value=mock_expenses),
+        patch("src.db.get_expenses_by_month", return_value=mock_expenses),
+        patch("src.db.get_month_summary", return_value=MonthSummary(count=len(mock_expenses), total=0.0)),
     ):
-
         await handle_month_selection_callback(mock_callback_with_user)
 
         # Check that message was edited
@@ -111,10 +110,9 @@ async def test_monthly_report_with_multiple_users(mock_callback_with_user):
 async def test_monthly_report_empty_month(mock_callback_with_user):
     """Test monthly report with no expenses."""
     with (
-        patch("src.handlers.auth.is_user_allowed", return_value=True),
-        patch("src.handlers.db.get_expenses_by_month", return_value=[]),
+        patch("src.db.get_expenses_by_month", return_value=[]),
+        patch("src.db.get_month_summary", return_value=MonthSummary(count=len([]), total=0.0)),
     ):
-
         await handle_month_selection_callback(mock_callback_with_user)
 
         # Check that message was edited
@@ -156,10 +154,9 @@ async def test_monthly_report_single_user(mock_callback_with_user):
     ]
 
     with (
-        patch("src.handlers.auth.is_user_allowed", return_value=True),
-        patch("src.handlers.db.get_expenses_by_month", return_value=mock_expenses),
+        patch("src.db.get_expenses_by_month", return_value=mock_expenses),
+        patch("src.db.get_month_summary", return_value=MonthSummary(count=len(mock_expenses), total=0.0)),
     ):
-
         await handle_month_selection_callback(mock_callback_with_user)
 
         # Check that message was edited
@@ -202,10 +199,9 @@ async def test_monthly_report_different_months(mock_callback_with_user):
     ]
 
     with (
-        patch("src.handlers.auth.is_user_allowed", return_value=True),
-        patch("src.handlers.db.get_expenses_by_month", return_value=mock_expenses),
+        patch("src.db.get_expenses_by_month", return_value=mock_expenses),
+        patch("src.db.get_month_summary", return_value=MonthSummary(count=len(mock_expenses), total=0.0)),
     ):
-
         await handle_month_selection_callback(mock_callback_with_user)
 
         # Check that message was edited
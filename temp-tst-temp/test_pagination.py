@@ -0,0 +1,164 @@
+"""Tests for paginated month reports."""
+
+import sqlite3
+from contextlib import contextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiogram.types import CallbackQuery, Message
+
+from src import db, reports, strings
+from src.callback_data import PageCursor, ReportPageRequest, pack_report_page, unpack_report_page
+from src.handlers import handle_month_selection_callback, handle_report_page_callback
+
+
+@pytest.fixture()
+def month_db(tmp_path):
+    """БД с 70 расходами за январь 2024 и одним за февраль."""
+    db_path = str(tmp_path / "expenses.db")
+    db.init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    rows = [(f"Расход {i}", float(i), f"2024-01-{1 + i // 3:02d}T10:00:{i % 60:02d}+00:00", 1) for i in range(70)]
+    rows.append(("Февраль", 1.0, "2024-02-01T00:00:00+00:00", 1))
+    conn.executemany(strings.DB_INSERT_SQL, rows)
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+@contextmanager
+def bind_db(db_path):
+    """Перенаправляет функции страниц и сводок на тестовую БД."""
+    get_page, get_summary = db.get_expenses_page, db.get_month_summary
+    with (
+        patch("src.reports.db.get_expenses_page", lambda *args: get_page(*args, db_path=db_path)),
+        patch("src.reports.db.get_month_summary", lambda y, m: get_summary(y, m, db_path)),
+    ):
+        yield
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "request_",
+    (
+        ReportPageRequest(2024, 1),
+        ReportPageRequest(2024, 12, 3, PageCursor("2024-12-31T23:59:59+00:00", 123456), older=True),
+        ReportPageRequest(2025, 2, 2, PageCursor("2025-02-01T00:00:00+00:00", 1), older=False),
+        ReportPageRequest(2024, 3, 2, PageCursor("2024-03-31 23:59:59", 42)),
+        ReportPageRequest(2024, 3, 2, PageCursor("2024-03-31T23:59:59.123456+00:00", 2**31), older=False),
+    ),
+)
+def test_report_page_callback_round_trip(request_):
+    data = pack_report_page(request_)
+    assert len(data.encode()) <= 64
+    assert unpack_report_page(data) == request_
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.parametrize("data", ("pg", "pg:202413:1", "pg:202401:1:x:1:1", "pg:202401:1:o:1:yesterday", "xx:202401:1"))
+def test_unpack_report_page_rejects_invalid_data(data):
+    with pytest.raises(ValueError):
+        unpack_report_page(data)
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_month_summary_and_first_page(month_db):
+    summary = db.get_month_summary(2024, 1, month_db)
+    assert summary.count == 70
+    assert summary.total == sum(range(70))
+
+    page = db.get_expenses_page(2024, 1, 5, db_path=month_db)
+    assert [expense.description for expense in page] == [f"Расход {i}" for i in range(69, 64, -1)]
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_report_pages_cover_month_in_both_directions(month_db):
+    seen = []
+    with bind_db(month_db):
+        page = await reports.get_month_report_page(ReportPageRequest(2024, 1))
+        assert page.prev_request is None
+        pages = [page]
+        while page.next_request is not None:
+            page = await reports.get_month_report_page(page.next_request)
+            pages.append(page)
+
+        for page in pages:
+            seen += [line for line in page.text.splitlines() if line.startswith("  • ")]
+
+        assert len(pages) == 3
+        assert len(seen) == 70
+        assert "Февраль" not in "".join(seen)
+        assert "(стр. 3)" in pages[-1].text
+        assert "Итого за месяц: 2415.00 ₽ (70 записей)" in pages[-1].text
+
+        back = await reports.get_month_report_page(pages[-1].prev_request)
+        assert back.text == pages[1].text
+        back = await reports.get_month_report_page(back.prev_request)
+        assert back.text == pages[0].text
+        assert back.prev_request is None
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_pages_survive_callback_round_trip_with_naive_subsecond_timestamps(tmp_path):
+    db_path = str(tmp_path / "expenses.db")
+    db.init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    rows = [(f"Расход {i}", 1.0, f"2024-01-15 10:00:00.{i:06d}", 1) for i in range(45)]
+    conn.executemany(strings.DB_INSERT_SQL, rows)
+    conn.commit()
+    conn.close()
+
+    with bind_db(db_path):
+        page = await reports.get_month_report_page(ReportPageRequest(2024, 1))
+        next_page = await reports.get_month_report_page(unpack_report_page(pack_report_page(page.next_request)))
+        back = await reports.get_month_report_page(unpack_report_page(pack_report_page(next_page.prev_request)))
+
+    lines = [line for text in (page.text, next_page.text) for line in text.splitlines() if line.startswith("  • ")]
+    assert len(lines) == 45
+    assert back.text == page.text
+
+
+@pytest.fixture
+def page_callback():
+    callback = MagicMock(spec=CallbackQuery)
+    callback.from_user = MagicMock(id=1)
+    callback.answer = AsyncMock()
+    callback.message = MagicMock(spec=Message)
+    callback.message.edit_text = AsyncMock()
+    return callback
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_large_month_selection_shows_first_page(month_db, page_callback):
+    page_callback.data = "month_current"
+    with (
+        bind_db(month_db),
+        patch("src.handlers.expense_display.get_month_from_callback", return_value=(2024, 1)),
+    ):
+        await handle_month_selection_callback(page_callback)
+
+    text = page_callback.message.edit_text.call_args[0][0]
+    keyboard = page_callback.message.edit_text.call_args[1]["reply_markup"]
+    assert "(стр. 1)" in text
+    assert keyboard.inline_keyboard[0][0].text == strings.BUTTON_NEXT_PAGE
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_report_page_callback_shows_requested_page(month_db, page_callback):
+    page_callback.data = pack_report_page(ReportPageRequest(2024, 1))
+    with bind_db(month_db):
+        await handle_report_page_callback(page_callback)
+
+    assert "Расход 69 —" in page_callback.message.edit_text.call_args[0][0]
+    page_callback.answer.assert_called_once_with()
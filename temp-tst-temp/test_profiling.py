@@ -0,0 +1,157 @@
+"""Tests for on-demand update profiling."""
+
+import asyncio
+import logging
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src import auth, handlers, middlewares, profiling, strings
+from src.send_scheduler import SendPriority, _send_priority
+
+
+def busy_work():
+    return sum(i * i for i in range(1000))
+
+
+def make_message(user_id=1):
+    return SimpleNamespace(from_user=SimpleNamespace(id=user_id), chat=SimpleNamespace(id=user_id), answer=AsyncMock())
+
+
+@pytest.fixture
+def profiler(monkeypatch, tmp_path):
+    profiler = profiling.UpdateProfiler(output_dir=str(tmp_path))
+    monkeypatch.setattr(profiling, "_profiler", profiler)
+    yield profiler
+    if profiler.active:
+        profiler.stop()
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ("args", "expected"),
+    [
+        (None, (strings.PROFILE_DEFAULT_UPDATES, None)),
+        ("  ", (strings.PROFILE_DEFAULT_UPDATES, None)),
+        ("250", (250, None)),
+        ("30s", (None, 30.0)),
+        ("1.5S", (None, 1.5)),
+        ("0", None),
+        ("-5", None),
+        ("100000", None),
+        ("9999s", None),
+        ("abc", None),
+    ],
+)
+def test_parse_profile_args(args, expected):
+    assert profiling.parse_profile_args(args) == expected
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_profiles_given_number_of_updates_and_sends_summary(profiler, tmp_path):
+    priorities = []
+    bot = MagicMock(
+        send_document=AsyncMock(side_effect=lambda *args, **kwargs: priorities.append(_send_priority.get()))
+    )
+    middleware = middlewares.ProfilingMiddleware(profiler)
+
+    async def handler(event, data):
+        return busy_work()
+
+    assert profiler.start(updates=2, bot=bot, chat_id=42)
+    assert not profiler.start(updates=5)
+
+    await middleware(handler, object(), {})
+    assert profiler.active
+    await middleware(handler, object(), {})
+    assert not profiler.active
+
+    [task] = profiler._finishing
+    result = await task
+
+    assert result.updates == 2
+    assert (tmp_path / result.stats_path).exists()
+    assert "busy_work" in (tmp_path / result.text_path).read_text(encoding="utf-8")
+    [call] = bot.send_document.await_args_list
+    assert call.args[0] == 42
+    assert call.kwargs["caption"].startswith("🔬 Профиль: 2 обновлений")
+    assert priorities == [SendPriority.BACKGROUND]
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_failed_write_is_logged_and_task_released(profiler, monkeypatch, caplog):
+    monkeypatch.setattr(profiling, "write_profile", MagicMock(side_effect=OSError("disk full")))
+
+    assert profiler.start(updates=1)
+    profiler.count_update()
+    [task] = profiler._finishing
+
+    with caplog.at_level(logging.ERROR, logger="src.profiling"):
+        assert await task is None
+
+    assert not profiler._finishing
+    assert "disk full" in caplog.text
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_time_limited_session_stops_itself(profiler):
+    assert profiler.start(seconds=0.05)
+    await asyncio.sleep(0.1)
+
+    assert not profiler.active
+    assert profiler.stop() is None
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_middleware_is_passthrough_when_inactive(profiler):
+    profiler.count_update = MagicMock()
+    handler = AsyncMock(return_value="ok")
+
+    assert await middlewares.ProfilingMiddleware(profiler)(handler, object(), {}) == "ok"
+    profiler.count_update.assert_not_called()
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_profile_command_requires_admin(profiler, monkeypatch):
+    monkeypatch.setenv("ADMIN_USER_IDS", "7")
+    message = make_message(user_id=1)
+
+    await handlers.handle_profile(message, MagicMock(), SimpleNamespace(args=None))
+
+    message.answer.assert_awaited_once_with(strings.ERROR_ADMIN_ONLY)
+    assert not profiler.active
+    assert auth.is_admin(7)
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_profile_command_starts_and_stops(profiler, monkeypatch):
+    monkeypatch.setenv("ADMIN_USER_IDS", "7")
+    message = make_message(user_id=7)
+
+    await handlers.handle_profile(message, MagicMock(), SimpleNamespace(args="30s"))
+    assert profiler.active
+    await handlers.handle_profile(message, MagicMock(), SimpleNamespace(args="stop"))
+    await handlers.handle_profile(message, MagicMock(), SimpleNamespace(args="stop"))
+    await handlers.handle_profile(message, MagicMock(), SimpleNamespace(args="often"))
+
+    assert [call.args[0] for call in message.answer.await_args_list] == [
+        strings.PROFILE_STARTED_SECONDS_TEMPLATE.format(seconds=30.0),
+        strings.PROFILE_STOPPED,
+        strings.PROFILE_NOT_RUNNING,
+        strings.PROFILE_USAGE,
+    ]
+    await asyncio.sleep(0.05)
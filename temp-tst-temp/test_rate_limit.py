@@ -0,0 +1,102 @@
+"""Tests for per-user token-bucket rate limiting."""
+
+import pytest
+
+from src import config, strings
+from src.rate_limit import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_token_bucket_burst_and_refill():
+    bucket = TokenBucket(capacity=2, rate=1, now=0)
+
+    assert bucket.consume(0)
+    assert bucket.consume(0)
+    assert not bucket.consume(0)
+
+    assert bucket.consume(1.0)
+    assert not bucket.consume(1.0)
+
+    assert bucket.is_full(10)
+    assert bucket.tokens == 2
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_rate_limiter_is_per_user():
+    clock = FakeClock()
+    limiter = RateLimiter(burst=1, rate=1, clock=clock)
+
+    assert limiter.allow(1)
+    assert not limiter.allow(1)
+    assert limiter.allow(2)
+
+    clock.now = 1.0
+    assert limiter.allow(1)
+
+    stats = limiter.stats
+    assert stats.allowed == 3
+    assert stats.throttled == 1
+    assert stats.tracked_users == 2
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_rate_limiter_warns_once_per_streak():
+    clock = FakeClock()
+    limiter = RateLimiter(burst=1, rate=1, clock=clock)
+
+    limiter.allow(1)
+    assert not limiter.allow(1)
+    assert limiter.should_warn(1)
+    assert not limiter.allow(1)
+    assert not limiter.should_warn(1)
+
+    clock.now = 1.0
+    assert limiter.allow(1)
+    assert not limiter.allow(1)
+    assert limiter.should_warn(1)
+    assert limiter.stats.warnings_sent == 2
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_rate_limiter_prunes_idle_buckets():
+    clock = FakeClock()
+    limiter = RateLimiter(burst=1, rate=1, max_tracked_users=2, clock=clock)
+
+    limiter.allow(1)
+    limiter.allow(2)
+    clock.now = 10.0
+    limiter.allow(3)
+
+    assert limiter.stats.tracked_users == 1
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ("burst", "rate", "expected"),
+    [
+        ("20", "2", (20.0, 2.0)),
+        ("0", "2", (0.0, 2.0)),
+        ("0.5", "2", (1.0, 2.0)),
+        ("-3", "2", (0.0, 2.0)),
+        ("5", "0", (5.0, strings.RATE_LIMIT_RATE_DEFAULT)),
+        ("5", "-1", (5.0, strings.RATE_LIMIT_RATE_DEFAULT)),
+    ],
+)
+def test_rate_limit_config_is_clamped(monkeypatch, burst, rate, expected):
+    monkeypatch.setenv("RATE_LIMIT_BURST", burst)
+    monkeypatch.setenv("RATE_LIMIT_RATE", rate)
+
+    assert (config.get_rate_limit_burst(), config.get_rate_limit_rate()) == expected
@@ -0,0 +1,181 @@
+"""Tests for the month report cache."""
+
+import asyncio
+import multiprocessing
+import threading
+from datetime import UTC, datetime
+from unittest.mock import patch
+
+import pytest
+
+from src import db, reports
+from src.report_cache import ReportCache, get_report_cache
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_report_cache_returns_fresh_entries():
+    cache = ReportCache()
+    cache.put((2024, 1, "by_user"), "report", cache.get_version(2024, 1))
+
+    assert cache.get((2024, 1, "by_user")) == "report"
+    assert cache.get((2024, 2, "by_user")) is None
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_report_cache_drops_entries_after_version_bump():
+    cache = ReportCache()
+    cache.put((2024, 1, "by_user"), "old", cache.get_version(2024, 1))
+    cache.put((2024, 2, "by_user"), "other", cache.get_version(2024, 2))
+
+    cache.bump_version(2024, 1)
+
+    assert cache.get((2024, 1, "by_user")) is None
+    assert cache.get((2024, 2, "by_user")) == "other"
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_report_cache_rejects_report_built_from_stale_version():
+    cache = ReportCache()
+    version = cache.get_version(2024, 1)
+    cache.bump_version(2024, 1)  # данные изменились во время построения отчёта
+    cache.put((2024, 1, "by_user"), "stale", version)
+
+    assert cache.get((2024, 1, "by_user")) is None
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_report_cache_shared_generation_invalidates_other_processes():
+    generation = multiprocessing.Value("q", 0)
+    ours, theirs = ReportCache(), ReportCache()
+    ours.attach_shared_generation(generation)
+    theirs.attach_shared_generation(generation)
+    theirs.put((2024, 1, "by_user"), "report", theirs.get_version(2024, 1))
+
+    ours.bump_version(2024, 2)
+
+    assert generation.value == 1
+    assert theirs.get((2024, 1, "by_user")) is None
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_report_cache_evicts_least_recently_used():
+    cache = ReportCache(max_entries=2)
+    cache.put((2024, 1, "a"), "1", 0)
+    cache.put((2024, 2, "a"), "2", 0)
+    cache.get((2024, 1, "a"))
+    cache.put((2024, 3, "a"), "3", 0)
+
+    assert cache.get((2024, 1, "a")) == "1"
+    assert cache.get((2024, 2, "a")) is None
+    assert cache.stats.entries == 2
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_get_month_report_queries_db_once_until_insert(tmp_path):
+    db_path = str(tmp_path / "expenses.db")
+    db.init_db(db_path)
+    now = datetime.now(UTC)
+    original = db.get_expenses_by_month
+
+    with patch("src.reports.db.get_expenses_by_month", side_effect=lambda y, m: original(y, m, db_path)) as query:
+        first = await reports.get_month_report(now.year, now.month)
+        assert await reports.get_month_report(now.year, now.month) == first
+        assert query.call_count == 1
+
+        db.insert_expense("Кофе", 100.0, user_id=1, db_path=db_path)
+
+        report = await reports.get_month_report(now.year, now.month)
+        assert query.call_count == 2
+        assert "Кофе — 100.00 ₽" in report
+
+    assert get_report_cache().stats.hits == 1
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_request_after_insert_does_not_join_stale_build():
+    release = threading.Event()
+    calls = []
+
+    def slow_render(year, month, view):
+        calls.append(get_report_cache().get_version(year, month))
+        number = len(calls)
+        if number == 1:
+            release.wait(5)
+        return f"report v{number}"
+
+    with patch("src.reports.render_month_report", side_effect=slow_render):
+        stale = asyncio.create_task(reports.get_month_report(2024, 1))
+        while not calls:
+            await asyncio.sleep(0.001)
+
+        get_report_cache().bump_version(2024, 1)
+        fresh = await reports.get_month_report(2024, 1)
+        release.set()
+
+        assert await stale == "report v1"
+        assert fresh == "report v2"
+        assert await reports.get_month_report(2024, 1) == "report v2"
+        assert len(calls) == 2
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_prefetch_warms_reports_for_selection():
+    with (
+        patch("src.reports.db.get_month_summary", return_value=db.MonthSummary(count=0, total=0.0)),
+        patch("src.reports.db.get_expenses_by_month", return_value=[]) as query,
+    ):
+        await reports.start_prefetch(1, [(2024, 2), (2024, 1)])
+        assert query.call_count == 2
+
+        await reports.get_month_report(2024, 2)
+        assert query.call_count == 2
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_prefetch_is_cancelled_when_user_backs_out():
+    started = asyncio.Event()
+
+    async def slow_warm(months):
+        started.set()
+        await asyncio.sleep(10)
+
+    with patch("src.reports.warm_month_reports", side_effect=slow_warm):
+        task = reports.start_prefetch(1, [(2024, 1)])
+        await started.wait()
+
+        assert reports.cancel_prefetch(1)
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert not reports.cancel_prefetch(1)
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_new_prefetch_replaces_previous_one():
+    async def slow_warm(months):
+        await asyncio.sleep(10)
+
+    with patch("src.reports.warm_month_reports", side_effect=slow_warm):
+        first = reports.start_prefetch(1, [(2024, 1)])
+        second = reports.start_prefetch(1, [(2024, 1)])
+        await asyncio.sleep(0)
+
+        assert first.cancelled()
+        assert reports.cancel_prefetch(1)
+        await asyncio.gather(second, return_exceptions=True)
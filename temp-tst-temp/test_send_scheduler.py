@@ -0,0 +1,177 @@
+"""Tests for the outbound send scheduler."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, SendMessage
+
+from src import config, strings
+from src.send_scheduler import SendPriority, SendScheduler, SendSchedulerMiddleware, background_priority
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_scheduler_allows_chat_burst_without_waiting():
+    scheduler = SendScheduler(global_rate=100, chat_rate=1, chat_burst=3)
+
+    waits = [await scheduler.acquire(1) for _ in range(3)]
+
+    assert max(waits) < 0.05
+    assert scheduler.stats.sent == 3
+    assert scheduler.stats.queue_depth == 0
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_scheduler_throttled_chat_does_not_block_other_chats():
+    scheduler = SendScheduler(global_rate=100, chat_rate=5, chat_burst=1)
+    order = []
+
+    async def send(chat_id):
+        await scheduler.acquire(chat_id)
+        order.append(chat_id)
+
+    await asyncio.gather(send(1), send(1), send(2))
+
+    assert order == [1, 2, 1]
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_scheduler_serves_interactive_before_background():
+    scheduler = SendScheduler(global_rate=20, chat_rate=100, chat_burst=100)
+    await asyncio.gather(*(scheduler.acquire(chat_id) for chat_id in range(20)))
+    order = []
+
+    async def send(chat_id, priority):
+        await scheduler.acquire(chat_id, priority)
+        order.append(priority)
+
+    await asyncio.gather(
+        send(100, SendPriority.BACKGROUND),
+        send(101, SendPriority.BACKGROUND),
+        send(102, SendPriority.INTERACTIVE),
+    )
+
+    assert order[0] == SendPriority.INTERACTIVE
+    assert scheduler.stats.max_queue_depth >= 3
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_background_priority_context():
+    scheduler = SendScheduler(global_rate=20, chat_rate=100, chat_burst=100)
+    await asyncio.gather(*(scheduler.acquire(chat_id) for chat_id in range(20)))
+    order = []
+
+    async def send(name, background):
+        if background:
+            with background_priority():
+                await scheduler.acquire(name)
+        else:
+            await scheduler.acquire(name)
+        order.append(name)
+
+    await asyncio.gather(send("bg", True), send("fg", False))
+
+    assert order == ["fg", "bg"]
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_middleware_retries_after_flood_control():
+    scheduler = SendScheduler()
+    middleware = SendSchedulerMiddleware(scheduler)
+    method = SendMessage(chat_id=1, text="hi")
+    make_request = AsyncMock(side_effect=[TelegramRetryAfter(method, "flood", retry_after=0), "ok"])
+
+    assert await middleware(make_request, None, method) == "ok"
+    assert make_request.await_count == 2
+    assert scheduler.stats.retries == 1
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_middleware_gives_up_after_max_retries():
+    middleware = SendSchedulerMiddleware(SendScheduler(), max_retries=1)
+    method = SendMessage(chat_id=1, text="hi")
+    make_request = AsyncMock(side_effect=TelegramRetryAfter(method, "flood", retry_after=0))
+
+    with pytest.raises(TelegramRetryAfter):
+        await middleware(make_request, None, method)
+    assert make_request.await_count == 2
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_middleware_passes_through_methods_without_chat():
+    scheduler = SendScheduler()
+    middleware = SendSchedulerMiddleware(scheduler)
+    make_request = AsyncMock(return_value=True)
+
+    await middleware(make_request, None, AnswerCallbackQuery(callback_query_id="1"))
+
+    assert scheduler.stats.sent == 0
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_scheduler_sends_with_rates_below_one():
+    scheduler = SendScheduler(global_rate=0.5, chat_rate=0.5, chat_burst=0.5)
+
+    waited = await asyncio.wait_for(scheduler.acquire(1), timeout=1)
+
+    assert waited < 0.05
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.parametrize(("global_rate", "chat_rate"), [(0, 1), (30, 0), (-1, 1)])
+def test_scheduler_rejects_non_positive_rates(global_rate, chat_rate):
+    with pytest.raises(ValueError):
+        SendScheduler(global_rate=global_rate, chat_rate=chat_rate)
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_acquire_raises_when_scheduler_loop_fails(monkeypatch):
+    scheduler = SendScheduler()
+    monkeypatch.setattr(scheduler, "_chat_delay", MagicMock(side_effect=RuntimeError("boom")))
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await asyncio.wait_for(scheduler.acquire(1), timeout=1)
+    assert scheduler.stats.queue_depth == 0
+
+    monkeypatch.undo()
+    assert await asyncio.wait_for(scheduler.acquire(1), timeout=1) < 0.05
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ("global_rate", "chat_rate", "chat_burst", "expected"),
+    [
+        ("60", "2", "5", (60.0, 2.0, 5.0)),
+        ("0", "-1", "0.5", (strings.OUTBOUND_GLOBAL_RATE_DEFAULT, strings.OUTBOUND_CHAT_RATE_DEFAULT, 1.0)),
+        ("0.5", "0.2", "-3", (0.5, 0.2, 1.0)),
+    ],
+)
+def test_outbound_config_is_clamped(monkeypatch, global_rate, chat_rate, chat_burst, expected):
+    monkeypatch.setenv("OUTBOUND_GLOBAL_RATE", global_rate)
+    monkeypatch.setenv("OUTBOUND_CHAT_RATE", chat_rate)
+    monkeypatch.setenv("OUTBOUND_CHAT_BURST", chat_burst)
+
+    actual = (config.get_outbound_global_rate(), config.get_outbound_chat_rate(), config.get_outbound_chat_burst())
+
+    assert actual == expected
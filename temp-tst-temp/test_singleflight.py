@@ -0,0 +1,90 @@
+"""Tests for single-flight request coalescing."""
+
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src import reports
+from src.singleflight import SingleFlight
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_single_flight_shares_one_computation():
+    flight = SingleFlight()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    results = await asyncio.gather(*(flight.do("key", compute) for _ in range(10)))
+
+    assert results == ["result"] * 10
+    assert calls == 1
+    assert flight.stats.shared == 9
+    assert flight.stats.in_flight == 0
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_single_flight_propagates_errors_and_forgets_key():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    async def ok():
+        return 1
+
+    assert await flight.do("key", ok) == 1
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_single_flight_cancelled_waiter_does_not_cancel_others():
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    first = asyncio.create_task(flight.do("key", compute))
+    second = asyncio.create_task(flight.do("key", compute))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "done"
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_concurrent_month_reports_hit_db_once():
+    calls = 0
+    lock = threading.Lock()
+
+    def slow_query(year, month):
+        nonlocal calls
+        with lock:
+            calls += 1
+        time.sleep(0.05)
+        return []
+
+    with patch("src.reports.db.get_expenses_by_month", side_effect=slow_query):
+        results = await asyncio.gather(*(reports.get_month_report(2024, 1) for _ in range(5)))
+
+    assert calls == 1
+    assert len(set(results)) == 1
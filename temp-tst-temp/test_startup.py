@@ -0,0 +1,81 @@
+"""Tests for startup profiling and the import budget."""
+
+import logging
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.startup import StartupProfiler
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Суммарное собственное время импорта модулей src при `import src.bot`, мкс.
+# Сейчас около 15 мс; бюджет с запасом на медленные машины и компиляцию байткода
+SRC_IMPORT_BUDGET_US = 150_000
+
+# Подсистемы, которые не должны загружаться при обычном запуске
+LAZY_MODULES = ("src.workers", "multiprocessing", "src.metrics_server", "aiohttp.web")
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_profiler_records_phases_and_reports(caplog):
+    profiler = StartupProfiler(enabled=True)
+    with profiler.phase("init_db"):
+        pass
+
+    with caplog.at_level(logging.INFO, logger="src.startup"):
+        profiler.report()
+
+    assert [name for name, _ in profiler.phases] == ["init_db"]
+    assert "Startup phase [init_db]" in caplog.text
+    assert "Startup finished" in caplog.text
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_disabled_profiler_records_nothing(caplog):
+    profiler = StartupProfiler(enabled=False)
+    with profiler.phase("init_db"):
+        pass
+
+    with caplog.at_level(logging.INFO, logger="src.startup"):
+        profiler.report()
+
+    assert profiler.phases == []
+    assert caplog.text == ""
+
+
+def run_import(code: str, *flags: str) -> subprocess.CompletedProcess[str]:
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+
+@pytest.mark.slow
+@pytest.mark.integration
+def test_rarely_used_subsystems_are_not_imported_at_startup():
+    result = run_import(f"import sys, src.bot; print([m for m in {LAZY_MODULES!r} if m in sys.modules])")
+
+    assert result.stdout.strip() == "[]"
+
+
+@pytest.mark.slow
+@pytest.mark.integration
+def test_src_import_time_within_budget():
+    result = run_import("import src.bot", "-X", "importtime")
+
+    self_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        if name.strip().startswith("src"):
+            self_times[name.strip()] = int(self_us)
+
+    assert "src.bot" in self_times
+    assert sum(self_times.values()) < SRC_IMPORT_BUDGET_US, sorted(self_times.items(), key=lambda item: -item[1])
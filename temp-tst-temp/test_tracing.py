@@ -0,0 +1,136 @@
+"""Tests for per-update tracing and the trace summary CLI."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from aiogram.types import Update
+
+from src import middlewares, trace_summary, tracing
+
+
+class CollectingExporter:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, trace):
+        self.traces.append(trace.to_dict())
+
+
+@pytest.fixture
+def exporter():
+    return CollectingExporter()
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_spans_are_noops_outside_a_trace():
+    with tracing.span("db.query") as span:
+        assert span is None
+
+    assert tracing.traced("parse")(lambda: "ok")() == "ok"
+    assert tracing.current_trace_id() is None
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_unsampled_update_is_not_traced(exporter):
+    tracer = tracing.Tracer(sample_rate=0.5, exporter=exporter, rng=lambda: 0.9)
+
+    with tracer.start_trace("update") as trace:
+        assert trace is None
+
+    assert exporter.traces == []
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_trace_collects_nested_spans_across_threads(exporter):
+    tracer = tracing.Tracer(sample_rate=1.0, exporter=exporter)
+    parse = tracing.traced("parse_multiple_expenses")(lambda text: text.split())
+
+    with tracer.start_trace("update", user_id=1):
+        with tracing.span("handler.handle_text"):
+            parse("кофе 100")
+            await asyncio.to_thread(parse, "такси 250")
+
+    [trace] = exporter.traces
+    spans = {span["name"]: span for span in trace["spans"]}
+    assert trace["name"] == "update"
+    assert trace["attributes"] == {"user_id": 1}
+    assert spans["handler.handle_text"]["parent_id"] == spans["update"]["span_id"]
+    assert spans["parse_multiple_expenses"]["parent_id"] == spans["handler.handle_text"]["span_id"]
+    assert sum(span["name"] == "parse_multiple_expenses" for span in trace["spans"]) == 2
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_tracing_middleware_starts_trace_for_update(exporter):
+    tracer = tracing.Tracer(sample_rate=1.0, exporter=exporter)
+    update = MagicMock(spec=Update)
+    update.event_type = "message"
+    seen = []
+
+    async def handler(_event, _data):
+        seen.append(tracing.current_trace_id())
+
+    await middlewares.TracingMiddleware(tracer)(handler, update, {"event_from_user": SimpleNamespace(id=7)})
+
+    [trace] = exporter.traces
+    assert seen == [trace["trace_id"]]
+    assert trace["attributes"] == {"update_type": "message", "user_id": 7}
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_exporter_writes_rotating_jsonl(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = tracing.TraceExporter(str(path), max_bytes=2000, backup_count=2)
+    tracer = tracing.Tracer(sample_rate=1.0, exporter=exporter)
+    exporter.start()
+    for _ in range(30):
+        with tracer.start_trace("update"):
+            with tracing.span("db.insert_expenses"):
+                pass
+    exporter.stop()
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert lines
+    assert all(json.loads(line)["spans"][1]["name"] == "db.insert_expenses" for line in lines)
+    assert (tmp_path / "traces.jsonl.1").exists()
+
+
+def make_trace(trace_id, duration_ms, span_ms):
+    return {
+        "trace_id": trace_id,
+        "name": "update",
+        "ts": 0,
+        "duration_ms": duration_ms,
+        "attributes": {"user_id": 1},
+        "spans": [
+            {"span_id": "r", "parent_id": None, "name": "update", "offset_ms": 0, "duration_ms": duration_ms},
+            {"span_id": "h", "parent_id": "r", "name": "handler.handle_text", "offset_ms": 1, "duration_ms": span_ms},
+            {"span_id": "d", "parent_id": "h", "name": "db.insert_expenses", "offset_ms": 2, "duration_ms": span_ms},
+        ],
+    }
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_summary_lists_slowest_traces_first(tmp_path, capsys):
+    path = tmp_path / "traces.jsonl"
+    lines = [json.dumps(make_trace("fast", 5.0, 1.0)), json.dumps(make_trace("slow", 500.0, 400.0)), '{"broken']
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+    assert trace_summary.main([str(path), "--top", "1"]) == 0
+
+    output = capsys.readouterr().out
+    assert "Slowest 1 of 2 traces" in output
+    assert "trace_id=slow" in output
+    assert "trace_id=fast" not in output
+    assert "      db.insert_expenses" in output
+    assert trace_summary.aggregate_spans([make_trace("a", 5.0, 1.0)])[0][:2] == ("handler.handle_text", 1)
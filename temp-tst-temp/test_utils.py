@@ -0,0 +1,46 @@
+"""Tests for reply building helpers."""
+
+import pytest
+
+from src import utils
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_build_expenses_reply_combines_sections():
+    reply = utils.build_expenses_reply(["✅ a", "✅ b"], ["❌ db"], ["❌ parse"])
+
+    assert reply.startswith("✅ Сохранено 2 расходов:\n✅ a\n✅ b")
+    assert "⚠️ Не удалось сохранить 1 записей:\n❌ db" in reply
+    assert reply.endswith("⚠️ Ошибки парсинга 1 записей:\n❌ parse")
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_build_expenses_reply_skips_empty_sections():
+    assert utils.build_expenses_reply(["✅ a"], [], []) == "✅ a"
+    assert utils.build_expenses_reply([], [], []) == ""
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_split_message_short_text_is_single_chunk():
+    assert utils.split_message("hello") == ["hello"]
+    assert utils.split_message("") == []
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_split_message_cuts_at_newlines():
+    text = "\n".join(["x" * 30] * 10)
+    chunks = utils.split_message(text, limit=100)
+
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert "\n".join(chunks) == text
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_split_message_hard_splits_long_lines():
+    chunks = utils.split_message("y" * 250, limit=100)
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
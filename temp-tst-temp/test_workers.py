@@ -0,0 +1,272 @@
+"""Tests for the multi-process supervisor mode."""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import sqlite3
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest, TelegramNetworkError, TelegramRetryAfter
+from aiogram.methods import GetUpdates
+from aiogram.types import Update
+
+from benchmarks.fake_api import FakeBotApi
+from src import bot as bot_module, db, strings, workers
+
+TOKEN = "123456:fake"
+
+
+def make_update(update_id: int, user_id: int | None = None, callback: bool = False) -> Update:
+    payload = {"update_id": update_id}
+    if user_id is not None:
+        user = {"id": user_id, "is_bot": False, "first_name": "Test"}
+        if callback:
+            payload["callback_query"] = {"id": "1", "from": user, "chat_instance": "1", "data": "view_expenses"}
+        else:
+            chat = {"id": user_id, "type": "private"}
+            payload["message"] = {"message_id": 1, "date": 0, "chat": chat, "from": user, "text": "кофе 100"}
+    return Update.model_validate(payload)
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.parametrize("callback", (False, True))
+def test_get_shard_routes_by_user_id(callback):
+    assert workers.get_update_user_id(make_update(1, user_id=7, callback=callback)) == 7
+    assert workers.get_shard(make_update(1, user_id=7, callback=callback), 4) == 3
+    assert workers.get_shard(make_update(2, user_id=7, callback=callback), 4) == 3
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_get_shard_falls_back_to_update_id():
+    assert workers.get_update_user_id(make_update(6)) is None
+    assert workers.get_shard(make_update(6), 4) == 2
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.parametrize(("metrics_port", "index", "expected"), (("0", 1, 0), ("9100", 0, 9101), ("9100", 2, 9103)))
+def test_worker_metrics_port_follows_supervisor_port(monkeypatch, metrics_port, index, expected):
+    monkeypatch.setenv("METRICS_PORT", metrics_port)
+
+    assert workers.get_worker_metrics_port(index) == expected
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_dump_update_round_trips():
+    update = make_update(5, user_id=42)
+
+    restored = Update.model_validate(workers.dump_update(update))
+
+    assert restored == update
+    assert restored.message.text == "кофе 100"
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_consume_updates_feeds_dispatcher_until_stop():
+    updates = queue.Queue()
+    for update_id in (1, 2):
+        updates.put(workers.dump_update(make_update(update_id, user_id=1)))
+    updates.put(workers.STOP)
+    dp = MagicMock()
+    dp.feed_update = AsyncMock()
+
+    taken = SimpleNamespace(value=0)
+
+    await workers.consume_updates(dp, MagicMock(), updates, taken)
+
+    fed = [call.args[1].update_id for call in dp.feed_update.await_args_list]
+    assert fed == [1, 2]
+    assert taken.value == 3
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_restart_moves_unread_updates_to_new_queue(monkeypatch):
+    supervisor = workers.Supervisor(2)
+    started = []
+    monkeypatch.setattr(supervisor, "_start_worker", started.append)
+    supervisor._processes[1] = SimpleNamespace(is_alive=lambda: True, exitcode=None)
+    for update_id in range(1, 5):
+        supervisor.dispatch(make_update(update_id, user_id=1))
+    # Процесс прочитал первое обновление и умер, не прочитав остальные
+    supervisor._taken[1].value = 1
+    supervisor._processes[1] = SimpleNamespace(is_alive=lambda: False, exitcode=-9)
+
+    supervisor.restart_dead_workers()
+
+    requeued = [supervisor._queues[1].get(timeout=5)["update_id"] for _ in range(3)]
+    assert requeued == [2, 3, 4]
+    assert started == [1]
+    assert supervisor._taken[1].value == 0
+    supervisor.dispatch(make_update(5, user_id=1))
+    assert [payload["update_id"] for payload in supervisor._pending[1]] == [2, 3, 4, 5]
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_fetch_updates_backs_off_after_api_errors(monkeypatch):
+    method = GetUpdates()
+    bot = MagicMock()
+    bot.get_updates = AsyncMock(
+        side_effect=[
+            TelegramRetryAfter(method, "flood", retry_after=42),
+            TelegramBadRequest(method, "conflict"),
+            TelegramNetworkError(method, "timeout"),
+            ["update"],
+        ]
+    )
+    sleep = AsyncMock()
+    monkeypatch.setattr(workers.asyncio, "sleep", sleep)
+
+    assert await workers.fetch_updates(bot, 10) == ["update"]
+
+    delays = [call.args[0] for call in sleep.await_args_list]
+    assert delays == [42.0, strings.POLLING_RETRY_DELAY, strings.POLLING_RETRY_DELAY]
+    assert bot.get_updates.await_args.kwargs["offset"] == 10
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_worker_share_of_global_rate_can_send(monkeypatch):
+    monkeypatch.setenv("BOT_TOKEN", TOKEN)
+    bot = bot_module.create_bot(global_rate=strings.OUTBOUND_GLOBAL_RATE_DEFAULT / 64)
+    [scheduler_middleware] = [item for item in bot.session.middleware if hasattr(item, "scheduler")]
+
+    async def first_send():
+        try:
+            return await asyncio.wait_for(scheduler_middleware.scheduler.acquire(1), timeout=1)
+        finally:
+            await bot.session.close()
+
+    assert asyncio.run(first_send()) < 0.05
+
+
+@pytest.mark.fast
+@pytest.mark.unit
+def test_init_db_enables_wal(tmp_path):
+    db_path = str(tmp_path / "expenses.db")
+
+    db.init_db(db_path)
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def push_month_callback(api, user_id, year, month):
+    user = {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"}
+    message = {"message_id": 1, "date": 0, "chat": {"id": user_id, "type": "private"}, "text": "menu"}
+    api.push_update(
+        {
+            "callback_query": {
+                "id": str(user_id),
+                "from": user,
+                "chat_instance": "1",
+                "message": message,
+                "data": f"m:{year:04d}{month:02d}",
+            }
+        }
+    )
+
+
+async def wait_for(predicate, timeout=30.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.05)
+
+
+def replies(api, chat_id, method="sendMessage"):
+    return [
+        message["text"] for message in api.messages if message["chat_id"] == chat_id and message["method"] == method
+    ]
+
+
+def traced_users(path):
+    with open(path, encoding="utf-8") as file:
+        return {json.loads(line)["attributes"]["user_id"] for line in file}
+
+
+@pytest.mark.slow
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_supervisor_shards_orders_invalidates_and_restarts(tmp_path, monkeypatch):
+    api = FakeBotApi()
+    await api.start()
+    monkeypatch.chdir(tmp_path)
+    for name, value in {
+        "BOT_TOKEN": TOKEN,
+        "BOT_API_BASE_URL": api.base_url,
+        "ALLOWED_USER_IDS": "",
+        "MAX_CONCURRENT_UPDATES": "0",
+        "METRICS_PORT": "0",
+        "LOOP_BLOCK_THRESHOLD_MS": "0",
+        "OUTBOUND_CHAT_RATE": "1000",
+        "OUTBOUND_CHAT_BURST": "1000",
+        "TRACE_SAMPLE_RATE": "1",
+        "TRACE_FILE": str(tmp_path / "traces.jsonl"),
+    }.items():
+        monkeypatch.setenv(name, value)
+    # Короткий long polling: иначе остановка тестового сервера ждёт незавершённый getUpdates
+    monkeypatch.setattr(strings, "POLLING_TIMEOUT", 1)
+    db.init_db()
+    bot = bot_module.create_bot()
+    supervisor = asyncio.create_task(workers.run_supervisor(bot, 2))
+    now = datetime.now(UTC)
+
+    try:
+        # Сообщения каждого пользователя обрабатываются по порядку даже без общего лимита обновлений
+        for number in range(10):
+            api.push_message(1, f"чай{number} {number + 1}")
+            api.push_message(2, f"кофе{number} {number + 1}")
+        await wait_for(lambda: len(api.messages) == 20)
+        for user_id, description in ((1, "чай"), (2, "кофе")):
+            saved = [
+                next(word for word in text.split() if word.startswith(description)) for text in replies(api, user_id)
+            ]
+            assert saved == [f"{description}{number}" for number in range(10)]
+
+        # Отчёт, закэшированный в процессе пользователя 1, сбрасывается записью из процесса пользователя 2
+        push_month_callback(api, 1, now.year, now.month)
+        await wait_for(lambda: replies(api, 1, "editMessageText"))
+        api.push_message(2, "такси 250")
+        await wait_for(lambda: len(replies(api, 2)) == 11)
+        push_month_callback(api, 1, now.year, now.month)
+        await wait_for(lambda: len(replies(api, 1, "editMessageText")) == 2)
+        first_report, second_report = replies(api, 1, "editMessageText")
+        assert "такси" not in first_report
+        assert "такси" in second_report
+
+        # Упавший процесс перезапускается и получает обновления, которые он не успел прочитать из очереди
+        [crashed] = [child for child in multiprocessing.active_children() if child.name == "worker-1"]
+        os.kill(crashed.pid, signal.SIGSTOP)
+        api.push_message(1, "обед 300")
+        await wait_for(lambda: not api._updates)
+        crashed.kill()
+        await asyncio.to_thread(crashed.join, 5)
+        await wait_for(lambda: len(replies(api, 1)) == 11)
+        [restarted] = [child for child in multiprocessing.active_children() if child.name == "worker-1"]
+        assert restarted.pid != crashed.pid
+        assert "обед" in replies(api, 1)[-1]
+    finally:
+        supervisor.cancel()
+        await asyncio.gather(supervisor, return_exceptions=True)
+        await api.stop()
+
+    # Каждый пользователь обрабатывался только в процессе своего шарда
+    assert traced_users(tmp_path / "traces.worker-0.jsonl") == {2}
+    assert traced_users(tmp_path / "traces.worker-1.jsonl") == {1}
+    conn = sqlite3.connect(tmp_path / "expenses.db")
+    assert conn.execute("SELECT COUNT(*) FROM expenses").fetchone()[0] == 22
+    conn.close()